@@ -0,0 +1,311 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+BatchUtils.py
+
+This module contains the batch mode for playing the test cases of testCase.txt in parallel. Every game
+(each test case, or each repetition of a test case with its own random seed) is sent to a worker process
+with its own pair of players. The screen output and the boards of each game are collected by the worker and
+printed/written in the order of the test cases once the game is over, so the output reads the same as in
+test mode no matter which game finishes first.
+"""
+
+""" Imports """
+## Python Library Imports
+from collections import namedtuple
+from cStringIO import StringIO
+from multiprocessing import Pool, TimeoutError, cpu_count
+import random
+import signal
+import sys
+from time import time
+
+## Source code imports
+import GameClasses
+import GameRecord
+import GameUtils
+import Heuristics
+import MemoryMonitor
+import SetupUtils
+import StatusTable
+import Tablebase
+
+
+## Result of one game of a batch
+GameResult = namedtuple('GameResult', ['case_name', 'repetition', 'seed', 'status', 'turns', 'elapsed', 'screen', 'record', 'nodes', 'peak_memory',
+                                       'search_time', 'moves_by_source', 'cutoffs', 'first_move_cutoffs'])
+
+## Extra seconds the batch waits for a worker after a game's own timeout should have stopped it
+TIMEOUT_GRACE = 30
+
+
+class GameTimeout(Exception):
+    """
+    Raised inside a worker when a game takes longer than the per-game timeout of the batch.
+    """
+    pass
+
+
+### Worker Functions ###
+def _init_worker(trace_memory=False):
+    """
+    Makes the worker processes ignore KeyboardInterrupt, which is handled by the batch process instead
+    (a worker cannot ask the user whether to continue like alphabeta_search does), and starts tracing memory if asked to.
+    """
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    if trace_memory:
+        MemoryMonitor.start()
+
+def _raise_timeout(signum, frame):
+    """
+    Signal handler that stops the game of a worker once its timeout has passed.
+    """
+    raise GameTimeout('game timed out')
+
+def play_case(case, n, repetition=0, seed=None, timeout=None, player_options=None, output_format=GameRecord.TEXT, quiet=False):
+    """
+    Plays one test case with a new pair of players and collects its output. Intended to run in a worker process of run_batch.
+        Arguments:
+            case -- a line from the test case file.
+            n -- the maximum number of moves.
+            repetition -- the number of the repetition of the test case. Default is 0.
+            seed -- the seed of the random tie-breaks of the players, or None to leave the random generator as it is. Default is None.
+            timeout -- the number of seconds the game may take, or None. Default is None.
+            player_options -- a dictionary of keyword arguments for both players (see Player). Default is None.
+            output_format -- the format of the record of the game (see GameRecord). Default is GameRecord.TEXT.
+            quiet -- a Boolean value indicating whether to skip rendering the boards (see GameRecord). Default is False.
+        Returns:
+            an instance of GameResult
+    """
+    if seed is not None:
+        random.seed(seed)
+    # The peak memory of the game is measured from here
+    MemoryMonitor.reset_peak()
+    player_options = player_options or {}
+    screen = StringIO()
+    record = StringIO()
+    case_name, status, turns = case.split(' ')[0].rstrip(':'), 'invalid', 0
+    player_x = player_y = None
+    start = time()
+    stdout, sys.stdout = sys.stdout, screen
+    # Only the main thread of a process can receive signals, so the timeout needs SIGALRM and a Unix platform
+    use_alarm = timeout is not None and hasattr(signal, 'setitimer')
+    if use_alarm:
+        handler = signal.signal(signal.SIGALRM, _raise_timeout)
+        signal.setitimer(signal.ITIMER_REAL, timeout)
+    try:
+        player_x = GameClasses.Player('W', **player_options)
+        player_y = GameClasses.Player('B', **player_options)
+        test_case = SetupUtils.test_case_root(case, n, player_x, player_y)
+        if test_case is not None:
+            case_name, root_state = test_case
+            game_record = GameRecord.GameRecord(record, output_format, quiet)
+            final_state = GameUtils.play(root_state, test_mode=True, case_name=case_name, record=game_record)
+            if final_state is None:
+                status = 'stopped'
+            else:
+                status, turns = final_state.game_status, final_state.level/2
+    except GameTimeout:
+        status = 'timeout'
+    finally:
+        if use_alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, handler)
+        sys.stdout = stdout
+    players = [player for player in [player_x, player_y] if player is not None]
+    nodes = sum(player.total_nodes for player in players)
+    search_time = sum(player.search_time for player in players)
+    moves_by_source = {}
+    for player in players:
+        for source, moves in player.moves_by_source.items():
+            moves_by_source[source] = moves_by_source.get(source, 0) + moves
+    peak_memory = max([MemoryMonitor.usage()[1]] + [player.peak_memory for player in players])/float(MemoryMonitor.MB)
+    cutoffs = sum(player.cutoffs for player in players)
+    first_move_cutoffs = sum(player.first_move_cutoffs for player in players)
+    return GameResult(case_name, repetition, seed, status, turns, time() - start, screen.getvalue(), record.getvalue(), nodes, peak_memory,
+                      search_time, moves_by_source, cutoffs, first_move_cutoffs)
+
+def _play_job(job):
+    """
+    Unpacks the arguments of play_case, since Pool.apply_async pickles a single job tuple more simply than keyword arguments.
+    """
+    return play_case(*job)
+
+
+### Batch Functions ###
+def run_batch(test_cases, n, workers=None, repetitions=1, timeout=None, seed=0, player_options=None, quiet=False, result_file=GameClasses.RESULT_FILE,
+              output_format=GameRecord.TEXT, trace_memory=False):
+    """
+    Plays every test case (repetitions times each) in a pool of worker processes and reports the results in the order of the test cases.
+        Arguments:
+            test_cases -- a list of lines from the test case file (see SetupUtils.read_test_cases).
+            n -- the maximum number of moves.
+            workers -- the number of worker processes. Default is None, which uses one per CPU core.
+            repetitions -- the number of games played from each test case. Repetition r is played with the seed seed + r. Default is 1.
+            timeout -- the number of seconds a game may take before it is stopped and reported as 'timeout', or None. Default is None.
+            seed -- the seed of the first repetition, or None to leave the tie-breaks unseeded. Default is 0.
+            player_options -- a dictionary of keyword arguments for both players (see Player). Default is None.
+            quiet -- a Boolean value indicating whether to skip rendering the boards, which leaves one line per game in the result file. Default is False.
+            result_file -- the path of the file the games are appended to, or None to not write them. Default is GameClasses.RESULT_FILE.
+            output_format -- GameRecord.TEXT to write the boards, or GameRecord.JSON to write one JSON object per game. Default is GameRecord.TEXT.
+            trace_memory -- a Boolean value indicating whether the workers trace the memory of Python objects with tracemalloc (if available)
+                            instead of measuring their resident set size (see MemoryMonitor). Default is False.
+        Returns:
+            a list of GameResult instances, in the order of the test cases and repetitions
+    """
+    if workers is None:
+        workers = cpu_count()
+    assert type(workers) is int and workers > 0, 'There must be at least one worker.'
+    assert type(repetitions) is int and repetitions > 0, 'Each test case must be played at least once.'
+    # Load (or generate) the tables once so that the workers do not all do it at the same time
+    StatusTable.load()
+    Heuristics.load()
+    if player_options is None or player_options.get('use_tablebase', True):
+        Tablebase.load()
+
+    jobs = [(case, n, repetition, None if seed is None else seed + repetition, timeout, player_options, output_format, quiet)
+            for case in test_cases for repetition in range(repetitions)]
+    # One handle to the result file for the whole batch
+    batch_record = GameRecord.GameRecord(result_file)
+    # Each game gets a new worker process, so that the peak memory of a game is not that of an earlier game where the peak cannot be reset
+    pool = Pool(workers, _init_worker, (trace_memory,), maxtasksperchild=1)
+    results = []
+    try:
+        pending = [pool.apply_async(_play_job, (job,)) for job in jobs]
+        for job, async_result in zip(jobs, pending):
+            try:
+                if timeout is None:
+                    # Waiting with a timeout keeps the batch process responsive to KeyboardInterrupt
+                    result = async_result.get(1e9)
+                else:
+                    result = async_result.get(timeout + TIMEOUT_GRACE)
+            except TimeoutError:
+                case, _, repetition, job_seed = job[:4]
+                result = GameResult(case.split(' ')[0].rstrip(':'), repetition, job_seed, 'timeout', 0, timeout, '', '', 0, 0.0, 0.0, {}, 0, 0)
+            _report(result, batch_record)
+            results.append(result)
+        pool.close()
+    except KeyboardInterrupt:
+        print '\nBatch interrupted! Stopping the workers...'
+        raise
+    finally:
+        pool.terminate()
+        pool.join()
+        batch_record.close()
+    return results
+
+def _report(result, batch_record):
+    """
+    Prints the output of a finished game and writes its record to the result file of the batch.
+    """
+    sys.stdout.write(result.screen)
+    batch_record.write(result.record)
+
+def print_summary(results, elapsed=None):
+    """
+    Prints a table with the outcome of each game of a batch and the number of games per outcome.
+        Arguments:
+            results -- a list of GameResult instances, as returned by run_batch.
+            elapsed -- the wall time of the batch in seconds, or None. Default is None.
+        Returns:
+            None
+    """
+    print '\n%-20s %5s %10s %-24s %6s %9s %10s' % ('Test case', 'Rep', 'Seed', 'Status', 'Turns', 'Time (s)', 'Peak (MB)')
+    for result in results:
+        print '%-20s %5i %10s %-24s %6i %9.2f %10.1f' % (result.case_name, result.repetition, result.seed, result.status, result.turns, result.elapsed,
+                                                      result.peak_memory)
+    counts = {}
+    for result in results:
+        counts[result.status] = counts.get(result.status, 0) + 1
+    print '\n' + ', '.join('%s: %i' % (status, count) for status, count in sorted(counts.items()))
+    if elapsed is not None:
+        game_time = sum(result.elapsed for result in results)
+        nodes = sum(result.nodes for result in results)
+        print '%i games in %.2f s of wall time (%.2f s summed over the games)' % (len(results), elapsed, game_time)
+        print 'Throughput: %.2f games/s' % (len(results)/elapsed if elapsed else 0.0)
+        # The moves looked up in the tablebase take no search, so the search is measured over the searched moves only
+        moves_by_source = {}
+        for result in results:
+            for source, moves in result.moves_by_source.items():
+                moves_by_source[source] = moves_by_source.get(source, 0) + moves
+        print 'Moves: ' + (', '.join('%s %i' % (source, moves) for source, moves in sorted(moves_by_source.items())) or 'none')
+        searched = sum(moves_by_source.get(source, 0) for source in GameClasses.SEARCHED_SOURCES)
+        if searched:
+            search_time = sum(result.search_time for result in results)
+            print 'Search: %i nodes in %.2f s over %i searched moves, %.0f nodes/s, %.4f s per move' % (nodes, search_time, searched,
+                                                                                                     nodes/search_time if search_time else 0.0, search_time/searched)
+            cutoffs = sum(result.cutoffs for result in results)
+            if cutoffs:
+                first_move_cutoffs = sum(result.first_move_cutoffs for result in results)
+                print 'Move ordering: %i of %i cutoffs (%.1f%%) by the first move searched' % (first_move_cutoffs, cutoffs, 100.0*first_move_cutoffs/cutoffs)
+        else:
+            print 'Search: no move was searched (use --no-tablebase to measure the search)'
+
+def batch_mode_setup(n, workers=None, repetitions=1, timeout=None, seed=0, quiet=False, player_options=None, result_file=GameClasses.RESULT_FILE,
+                     output_format=GameRecord.TEXT, test_cases=SetupUtils.TEST_CASE_FILE, trace_memory=False):
+    """
+    A function to set up batch mode, which plays the test cases of a test case file like test mode but in parallel (see run_batch),
+    and prints the summary of the batch.
+        Arguments:
+            n -- the maximum number of moves.
+            workers -- the number of worker processes. Default is None, which uses one per CPU core.
+            repetitions -- the number of games played from each test case. Default is 1.
+            timeout -- the number of seconds a game may take, or None. Default is None.
+            seed -- the seed of the first repetition, or None. Default is 0.
+            quiet -- a Boolean value indicating whether to skip rendering the boards. Default is False.
+            player_options -- a dictionary of keyword arguments for both players (see Player). Default is None.
+            result_file -- the path of the file the games are appended to, or None. Default is GameClasses.RESULT_FILE.
+            output_format -- the format of the records of the games (see GameRecord). Default is GameRecord.TEXT.
+            test_cases -- the path of the test case file. Default is SetupUtils.TEST_CASE_FILE.
+            trace_memory -- a Boolean value indicating whether the workers trace memory with tracemalloc (see run_batch). Default is False.
+        Returns:
+            a list of GameResult instances
+    """
+    start = time()
+    results = run_batch(SetupUtils.read_test_cases(test_cases), n, workers, repetitions, timeout, seed, player_options, quiet, result_file,
+                        output_format, trace_memory)
+    print_summary(results, time() - start)
+    return results
+
+
+def main(argv=None):
+    """
+    Runs batch mode from the command line without any prompts, e.g. python BatchUtils.py 35 --workers 4 --repetitions 10 --timeout 120 --quiet
+        Arguments:
+            argv -- the list of command line arguments. Default is None, which uses sys.argv[1:].
+        Returns:
+            a list of GameResult instances
+    """
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description='Play the test cases of a test case file in parallel, without any prompts.')
+    parser.add_argument('n', type=int, nargs='?', default=35, help='the maximum number of moves (default: 35)')
+    parser.add_argument('--test-cases', default=SetupUtils.TEST_CASE_FILE, help='the test case file (default: %s)' % SetupUtils.TEST_CASE_FILE)
+    parser.add_argument('--workers', type=int, default=None, help='the number of worker processes (default: one per CPU core)')
+    parser.add_argument('--repetitions', type=int, default=1, help='the number of games played from each test case (default: 1)')
+    parser.add_argument('--timeout', type=float, default=None, help='the number of seconds a game may take (default: no limit)')
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the first repetition (default: 0)')
+    parser.add_argument('--quiet', action='store_true', help='skip rendering the boards, only print the summary and write one line per game')
+    parser.add_argument('--format', choices=GameRecord.FORMATS, default=GameRecord.TEXT, help='write the boards (text) or one JSON object per game (json) (default: text)')
+    parser.add_argument('--result-file', default=GameClasses.RESULT_FILE, help='the file the games are appended to (default: %s)' % GameClasses.RESULT_FILE)
+    parser.add_argument('--ply', type=int, default=4, help='the depth of the search (default: 4)')
+    parser.add_argument('--time-budget', type=float, default=None, help='the number of seconds the search may take per move, searching iteratively deeper (default: no budget)')
+    parser.add_argument('--engine', choices=GameClasses.SEARCH_ENGINES, default='alphabeta', help='the search engine of the players (default: alphabeta)')
+    parser.add_argument('--mate-moves', type=int, default=None, help='look for a forced checkmate within this many moves with a proof-number search (default: do not)')
+    parser.add_argument('--no-tablebase', action='store_true', help='always search instead of looking moves up in the tablebase')
+    parser.add_argument('--stats-file', default=None, help='a file the statistics of every move are appended to, one JSON object per line (default: none)')
+    parser.add_argument('--memory-limit', type=float, default=None, help='the megabytes of memory above which a player releases the states it keeps (default: no limit)')
+    parser.add_argument('--trace-memory', action='store_true', help='measure memory with tracemalloc (if available) instead of the resident set size')
+    args = parser.parse_args(argv)
+    player_options = {'ply': args.ply, 'time_budget': args.time_budget, 'use_tablebase': not args.no_tablebase, 'stats_file': args.stats_file,
+                      'memory_limit': args.memory_limit, 'search_engine': args.engine,
+                      'mate_moves': args.mate_moves}
+    return batch_mode_setup(args.n, args.workers, args.repetitions, args.timeout, args.seed, args.quiet, player_options, args.result_file,
+                            args.format, args.test_cases, args.trace_memory)
+
+
+if __name__ == '__main__':
+    """
+    Runs batch mode from the command line (see main).
+    """
+    main()
@@ -0,0 +1,280 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark.py
+
+This module contains the search benchmark suite, for measuring the cost of the engine's work per node. It plays
+the first moves of a fixed set of positions (a starting position and every test case of testCase.txt, including
+the ones commented out) with fixed seeds, at each of several search depths. It reports nodes and states created
+per second, percentiles of the time per move and the peak memory of each depth, writes them to a JSON file, and
+compares them to a saved baseline within given thresholds.
+"""
+
+""" Imports """
+## Python Library Imports
+import json
+from multiprocessing import Pool
+import random
+from re import findall
+import resource
+import sys
+from time import time
+
+## Source code imports
+import GameClasses
+import Heuristics
+import MemoryMonitor
+import SetupUtils
+import StatusTable
+
+
+## Starting position of the benchmarks (the squares of KX, RX and KY, see GameUtils.square_index) and the maximum number of moves
+START_SQUARES = (9, 47, 27)
+MAX_MOVES = 35
+## Search depths of the benchmark suite, and the number of moves played from each position
+DEFAULT_PLIES = (2, 4, 6)
+DEFAULT_MOVES = 4
+## File the results of the benchmark suite are written to
+BENCHMARK_FILE = 'benchmark.json'
+## Largest relative change of each measure that does not count as a regression against the baseline. Rates regress when
+## they drop, the others when they grow.
+DEFAULT_THRESHOLDS = {'nodes_per_second': 0.10, 'states_per_second': 0.10, 'latency_p50': 0.15, 'latency_p90': 0.20, 'peak_memory_mb': 0.10}
+HIGHER_IS_BETTER = ['nodes_per_second', 'states_per_second']
+
+
+### Position Functions ###
+def start_state(player_x=None, player_y=None, squares=START_SQUARES, n=MAX_MOVES):
+    """
+    Returns the root state of the benchmarks.
+        Arguments:
+            player_x -- an instance of Player representing player x. Default is None, which creates one.
+            player_y -- an instance of Player representing player y. Default is None, which creates one.
+            squares -- the squares of KX, RX and KY. Default is START_SQUARES.
+            n -- the maximum number of moves. Default is MAX_MOVES.
+        Returns:
+            an instance of GameState
+    """
+    if player_x is None:
+        player_x = GameClasses.Player('W')
+    if player_y is None:
+        player_y = GameClasses.Player('B')
+    KX_square, RX_square, KY_square = squares
+    return GameClasses.GameState(player_x.kings[KX_square], player_x.rooks[RX_square], player_y.kings[KY_square], n*2)
+
+def read_positions(path=SetupUtils.TEST_CASE_FILE):
+    """
+    Reads the positions of the benchmark suite: the starting position and every test case of the test case file,
+    including the ones commented out, in either syntax (W.K(5,6) or x.K(5,6)).
+        Arguments:
+            path -- the path of the test case file. Default is SetupUtils.TEST_CASE_FILE.
+        Returns:
+            a list of (name, squares) tuples, where squares are the squares of KX, RX and KY
+    """
+    positions = [('start', START_SQUARES)]
+    test_case_file = open(path)
+    for line in test_case_file:
+        pieces = findall(r'([WBXYwbxy])\.([KRkr])\((\d),(\d)\)', line)
+        squares = {}
+        for owner, piece, f, r in pieces:
+            name = ('X' if owner.upper() in 'WX' else 'Y') + piece.upper()
+            squares[name] = (int(f) - 1) + 8*(int(r) - 1)
+        if sorted(squares) == ['XK', 'XR', 'YK'] and len(pieces) == 3:
+            positions.append((line.split(':')[0].strip('# '), (squares['XK'], squares['XR'], squares['YK'])))
+    test_case_file.close()
+    return positions
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of a list of values (the nearest-rank method), or 0.0 if the list is empty.
+        Arguments:
+            values -- a list of numbers.
+            p -- the percentile, between 0 and 100.
+        Returns:
+            a number
+    """
+    if not values:
+        return 0.0
+    values = sorted(values)
+    rank = max(1, int(-(-p*len(values) // 100)))
+    return values[min(rank, len(values)) - 1]
+
+
+### Benchmark Functions ###
+def search_benchmark(positions, ply, moves=DEFAULT_MOVES, seed=0, search_mode='board', search_engine='alphabeta'):
+    """
+    Plays the first moves of each position with both players searching ply plies deep (without the tablebase), and measures each move.
+        Arguments:
+            positions -- a list of (name, squares) tuples, as returned by read_positions.
+            ply -- the depth of the search.
+            moves -- the number of moves (plies) played from each position. Default is DEFAULT_MOVES.
+            seed -- the seed of the random tie-breaks, set again before each position. Default is 0.
+            search_mode -- the search mode of the players (see Player). Default is 'board'.
+            search_engine -- the search engine of the players (see Player). Default is 'alphabeta'.
+        Returns:
+            a dictionary of the measures of this depth
+    """
+    StatusTable.load()
+    Heuristics.load()
+    latencies = []
+    nodes = states = 0
+    positions_played = 0
+    total_time = 0.0
+    for name, squares in positions:
+        random.seed(seed)
+        player_x = GameClasses.Player('W', use_tablebase=False, ply=ply, search_mode=search_mode, search_engine=search_engine)
+        player_y = GameClasses.Player('B', use_tablebase=False, ply=ply, search_mode=search_mode, search_engine=search_engine)
+        state = start_state(player_x, player_y, squares)
+        if state.game_status != 'continue':
+            continue
+        positions_played += 1
+        for _ in range(moves):
+            if state.is_leaf:
+                break
+            player = state.current_player
+            created = GameClasses.GameState.created
+            start = time()
+            state = player.move(state)
+            elapsed = time() - start
+            states += GameClasses.GameState.created - created
+            nodes += player.nodes
+            total_time += elapsed
+            latencies.append(elapsed*1000)
+    return {'ply': ply,
+            'positions': positions_played,
+            'moves': len(latencies),
+            'nodes': nodes,
+            'states': states,
+            'time': total_time,
+            'nodes_per_second': nodes/total_time if total_time else 0.0,
+            'states_per_second': states/total_time if total_time else 0.0,
+            'latency_p50': percentile(latencies, 50),
+            'latency_p90': percentile(latencies, 90),
+            'latency_p99': percentile(latencies, 99),
+            'latency_max': max(latencies) if latencies else 0.0,
+            'peak_memory_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*MemoryMonitor.MAXRSS_UNIT/float(MemoryMonitor.MB)}
+
+def _search_benchmark_job(job):
+    """
+    Unpacks the arguments of search_benchmark, for running it in a process of its own.
+    """
+    return search_benchmark(*job)
+
+def run_suite(plies=DEFAULT_PLIES, moves=DEFAULT_MOVES, seed=0, search_mode='board', path=SetupUtils.TEST_CASE_FILE, search_engine='alphabeta'):
+    """
+    Runs the search benchmark at each depth in a new process, so that the peak memory of each depth is measured on its own.
+        Arguments:
+            plies -- the depths of the search. Default is DEFAULT_PLIES.
+            moves -- the number of moves played from each position. Default is DEFAULT_MOVES.
+            seed -- the seed of the random tie-breaks. Default is 0.
+            search_mode -- the search mode of the players (see Player). Default is 'board'.
+            path -- the path of the test case file. Default is SetupUtils.TEST_CASE_FILE.
+            search_engine -- the search engine of the players (see Player). Default is 'alphabeta'.
+        Returns:
+            a dictionary with the settings of the suite and the measures of each depth (keyed by the depth as a string)
+    """
+    # Load (or generate) the tables once, before the processes are started
+    StatusTable.load()
+    Heuristics.load()
+    positions = read_positions(path)
+    results = {}
+    for ply in plies:
+        pool = Pool(1)
+        try:
+            results[str(ply)] = pool.apply(_search_benchmark_job, ((positions, ply, moves, seed, search_mode, search_engine),))
+        finally:
+            pool.terminate()
+            pool.join()
+    return {'seed': seed, 'moves': moves, 'search_mode': search_mode, 'search_engine': search_engine, 'positions': [name for name, _ in positions],
+            'python': sys.version.split()[0], 'plies': results}
+
+def compare(results, baseline, thresholds=None):
+    """
+    Compares the results of the benchmark suite to a baseline.
+        Arguments:
+            results -- a dictionary as returned by run_suite.
+            baseline -- a dictionary as returned by run_suite (e.g. read from an earlier benchmark file).
+            thresholds -- a dictionary of the largest relative change of each measure that is not a regression. Default is None, which uses DEFAULT_THRESHOLDS.
+        Returns:
+            a list of strings describing the regressions (empty if there are none)
+    """
+    if thresholds is None:
+        thresholds = DEFAULT_THRESHOLDS
+    regressions = []
+    for ply, measures in sorted(results['plies'].items()):
+        base = baseline.get('plies', {}).get(ply)
+        if base is None:
+            continue
+        for measure, threshold in sorted(thresholds.items()):
+            old, new = base.get(measure), measures.get(measure)
+            if not old or new is None:
+                continue
+            change = (new - old)/float(old)
+            if measure in HIGHER_IS_BETTER:
+                change = -change
+            if change > threshold:
+                regressions.append('ply %s: %s went from %.4g to %.4g (%+.1f%%, threshold %.1f%%)' % (ply, measure, old, new, 100*(new - old)/old, 100*threshold))
+    return regressions
+
+def print_suite(results):
+    """
+    Prints the results of the benchmark suite as a table.
+        Arguments:
+            results -- a dictionary as returned by run_suite.
+        Returns:
+            None
+    """
+    print '%i positions, %i moves each, seed %i, %s search with %s' % (len(results['positions']), results['moves'], results['seed'], results['search_mode'],
+                                                                       results.get('search_engine', 'alphabeta'))
+    print '%4s %6s %10s %10s %10s %10s %10s %10s %10s' % ('Ply', 'Moves', 'Nodes', 'Nodes/s', 'States/s', 'p50 (ms)', 'p90 (ms)', 'p99 (ms)', 'Peak (MB)')
+    for ply, measures in sorted(results['plies'].items(), key=lambda item: int(item[0])):
+        print '%4s %6i %10i %10.0f %10.0f %10.2f %10.2f %10.2f %10.1f' % (ply, measures['moves'], measures['nodes'], measures['nodes_per_second'],
+                                                                       measures['states_per_second'], measures['latency_p50'], measures['latency_p90'],
+                                                                       measures['latency_p99'], measures['peak_memory_mb'])
+
+def main(argv=None):
+    """
+    Runs the benchmarks from the command line, e.g. python Benchmark.py --output benchmark.json --baseline baseline.json
+        Arguments:
+            argv -- the list of command line arguments. Default is None, which uses sys.argv[1:].
+        Returns:
+            the exit status: 1 if a measure regressed against the baseline, otherwise 0
+    """
+    from argparse import ArgumentParser
+    parser = ArgumentParser(description='Measure the speed and memory use of the search.')
+    parser.add_argument('--plies', type=int, nargs='+', default=None, help='the depths of the search (default: 2 4 6)')
+    parser.add_argument('--moves', type=int, default=DEFAULT_MOVES, help='the number of moves played from each position (default: %i)' % DEFAULT_MOVES)
+    parser.add_argument('--seed', type=int, default=0, help='the seed of the random tie-breaks (default: 0)')
+    parser.add_argument('--search-mode', choices=['board', 'tree'], default='board', help='the search mode of the players (default: board)')
+    parser.add_argument('--engine', choices=GameClasses.SEARCH_ENGINES, default='alphabeta', help='the search engine of the players (default: alphabeta)')
+    parser.add_argument('--test-cases', default=SetupUtils.TEST_CASE_FILE, help='the test case file (default: %s)' % SetupUtils.TEST_CASE_FILE)
+    parser.add_argument('--output', default=BENCHMARK_FILE, help='the JSON file the results are written to (default: %s)' % BENCHMARK_FILE)
+    parser.add_argument('--baseline', default=None, help='a JSON file of earlier results to compare to')
+    parser.add_argument('--threshold', type=float, default=None, help='the largest relative change of any measure that is not a regression (default: per measure)')
+    args = parser.parse_args(argv)
+    results = run_suite(args.plies or DEFAULT_PLIES, args.moves, args.seed, args.search_mode, args.test_cases, args.engine)
+    print_suite(results)
+    output_file = open(args.output, 'w')
+    json.dump(results, output_file, indent=2, sort_keys=True)
+    output_file.close()
+    if args.baseline is None:
+        return 0
+    baseline_file = open(args.baseline)
+    baseline = json.load(baseline_file)
+    baseline_file.close()
+    thresholds = None
+    if args.threshold is not None:
+        thresholds = dict((measure, args.threshold) for measure in DEFAULT_THRESHOLDS)
+    regressions = compare(results, baseline, thresholds)
+    for regression in regressions:
+        print 'Regression: %s' % regression
+    if not regressions:
+        print 'No regressions against %s.' % args.baseline
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    """
+    Runs the benchmarks from the command line (see main).
+    """
+    sys.exit(main())
@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Bitboards.py
+
+This module contains the bitboard representation of the board used by GameState. A bitboard is a 64-bit
+integer with one bit per square (bit 0 is file 1, rank 1 and bit 63 is file 8, rank 8), so sets of squares
+can be combined with integer AND/OR instead of scanning lists of positions. The attack masks of the king
+and the rook are precomputed for every square once when the module is imported.
+"""
+
+""" Imports """
+## Source code imports
+from Pieces import Position
+
+
+### Square Functions ###
+def bit(square):
+    """
+    Returns the bitboard containing only the given square.
+        Arguments:
+            square -- an int between 0 and 63, as returned by GameUtils.square_index.
+        Returns:
+            a bitboard
+    """
+    return 1 << square
+
+def squares(mask):
+    """
+    Returns the squares contained in a bitboard, in increasing order.
+        Arguments:
+            mask -- a bitboard
+        Returns:
+            a list of ints between 0 and 63
+    """
+    result = []
+    while mask:
+        lowest = mask & -mask
+        result.append(lowest.bit_length() - 1)
+        mask ^= lowest
+    return result
+
+def popcount(mask):
+    """
+    Returns the number of squares contained in a bitboard.
+        Arguments:
+            mask -- a bitboard
+        Returns:
+            an int between 0 and 64
+    """
+    return bin(mask).count('1')
+
+## One shared Position instance per square, indexed by square
+POSITIONS = [Position(square % 8 + 1, square / 8 + 1) for square in range(64)]
+
+def position(square):
+    """
+    Returns the position of the given square. The same instance is returned for every call with the same square.
+        Arguments:
+            square -- an int between 0 and 63
+        Returns:
+            an instance of Position
+    """
+    return POSITIONS[square]
+
+def positions(mask):
+    """
+    Returns the positions of the squares contained in a bitboard.
+        Arguments:
+            mask -- a bitboard
+        Returns:
+            a list of Position instances
+    """
+    return [position(square) for square in squares(mask)]
+
+
+### Attack Masks ###
+## Steps (in files and ranks) of the four directions a rook moves in: east, west, north and south
+ROOK_DIRECTIONS = [(1, 0), (-1, 0), (0, 1), (0, -1)]
+
+def _ray(square, df, dr):
+    """
+    Returns the bitboard of the squares from the given square (exclusive) to the edge of the board in one direction.
+    """
+    f, r = square % 8 + df, square / 8 + dr
+    mask = 0
+    while 0 <= f < 8 and 0 <= r < 8:
+        mask |= 1 << (r*8 + f)
+        f, r = f + df, r + dr
+    return mask
+
+def _king_mask(square):
+    """
+    Returns the bitboard of the squares neighbouring the given square.
+    """
+    f, r = square % 8, square / 8
+    mask = 0
+    for df in (-1, 0, 1):
+        for dr in (-1, 0, 1):
+            if (df or dr) and 0 <= f+df < 8 and 0 <= r+dr < 8:
+                mask |= 1 << ((r+dr)*8 + f+df)
+    return mask
+
+def _rook_attacks(rook, king):
+    """
+    Returns the bitboard of the squares attacked by a rook, where the rook's lines stop in front of its own king.
+    The opposing king does not block the rook, so the squares behind it stay under attack.
+    """
+    mask = 0
+    for rays in ROOK_RAYS:
+        ray = rays[rook]
+        # Cut the ray off at the king if the king stands on it
+        if ray >> king & 1:
+            ray &= ~(rays[king] | 1 << king)
+        mask |= ray
+    return mask
+
+## King attack masks indexed by square
+KING_MASKS = [_king_mask(square) for square in range(64)]
+## Rook rays indexed by direction (as in ROOK_DIRECTIONS), then by square
+ROOK_RAYS = [[_ray(square, df, dr) for square in range(64)] for df, dr in ROOK_DIRECTIONS]
+## Rook attack masks (with the rook's own king as the only blocker) indexed by rook*64 + king
+ROOK_ATTACKS = [_rook_attacks(rook, king) for rook in range(64) for king in range(64)]
+
+def _between(square1, square2):
+    """
+    Returns the bitboard of the squares strictly between two squares on the same rank or file (empty otherwise).
+    """
+    for rays in ROOK_RAYS:
+        if rays[square1] >> square2 & 1:
+            return rays[square1] & ~(rays[square2] | 1 << square2)
+    return 0
+
+## Squares strictly between two squares on the same rank or file, indexed by square1*64 + square2
+BETWEEN = [_between(square1, square2) for square1 in range(64) for square2 in range(64)]
+
+def rook_attacks(rook, king):
+    """
+    Returns the bitboard of the squares attacked by a rook when its own king stands on the given square.
+        Arguments:
+            rook -- the square of the rook.
+            king -- the square of the rook's own king.
+        Returns:
+            a bitboard
+    """
+    return ROOK_ATTACKS[rook << 6 | king]
@@ -1,40 +1,286 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
-from Pieces import Rook,King
+from Pieces import Rook,King,Position
 from Board import Board
 
 """ Imports """
 ## Python Library Imports
 from collections import namedtuple, deque
 from itertools import islice
+from multiprocessing import Pool, Value
 from numpy import inf
 from random import choice
 from re import split
+import signal
+from threading import Event, Lock, Thread
+from time import time
 
 ## Source code imports
+import Bitboards
 import GameUtils
+import Heuristics
+import MemoryMonitor
+import MoveOrdering
+import ProofNumber
+import SearchBoard
+import SearchStats
+import StatusTable
+import Symmetry
+import Tablebase
+import Transposition
+
+
+## The file the boards of played games are appended to
+RESULT_FILE = 'gameResult.txt'
+## The deepest a search can go (limited by the number of depth keys for the transposition table)
+MAX_PLY = len(Transposition.DEPTH_KEYS) - 1
+## Default number of states the tree search keeps cached below the current state from one move to the next
+TREE_BUDGET = 100000
+
+
+class SearchAborted(Exception):
+    """
+    Raised inside the search when the time or node budget of the current move runs out (or its cancellation token
+    is cancelled), so that the iterative deepening can fall back to the deepest iteration it completed.
+    """
+    pass
+
+
+## The move picked by Player.anytime_search, with its value and the depth of the deepest iteration completed
+SearchResult = namedtuple('SearchResult', ['child', 'score', 'depth'])
+
+
+class CancellationToken(object):
+    """
+    Stops a search from outside (e.g. from another thread) without losing the iterations it has completed (see Player.anytime_search).
+    The search looks at the token every 256 nodes, like it looks at the clock.
+    """
+    def __init__(self, deadline=None):
+        """
+        Initializer for the token.
+            Arguments:
+                deadline -- the time (as returned by time.time) at which the token cancels itself, or None. Default is None.
+        """
+        self.deadline = deadline
+        self._event = Event()
+
+    """ METHODS """
+    def cancel(self):
+        """
+        Cancels the searches using the token. Can be called from any thread.
+        """
+        self._event.set()
+
+    """ PROPERTIES """
+    @property
+    def cancelled(self):
+        """
+        Returns a Boolean value indicating whether the token has been cancelled or its deadline has passed.
+        """
+        return self._event.is_set() or (self.deadline is not None and time() > self.deadline)
+
+
+### Parallel Search Workers ###
+## The player and the shared best value of a worker process of the parallel search (see Player._parallel_search)
+_worker_player = None
+_worker_best = None
+_worker_search = None
+## Relative distance below the best value at which the workers set their alpha level, also the width of the null windows of the search engines
+TIE_MARGIN = 1e-9
+## The sources of the moves that were found by searching (see SearchStats.source), which the search time of a player covers
+SEARCHED_SOURCES = ('search', 'mate search')
+## The search engines a player can search the game tree with (see Player.search_engine)
+SEARCH_ENGINES = ['alphabeta', 'pvs', 'mtdf']
+
+def _init_search_worker(name, options, best):
+    """
+    Sets up a worker process of the parallel search with its own player, which keeps its transposition table between searches.
+    KeyboardInterrupt is ignored since it is handled by the searching process.
+    """
+    global _worker_player, _worker_best
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _worker_player = Player(name, use_tablebase=False, options=options)
+    _worker_best = best
+
+def _search_move(board, code, ply, deadline, search):
+    """
+    Searches one root move in a worker process of the parallel search.
+        Arguments:
+            board -- a copy of the SearchBoard of the root position.
+            code -- the move code of the root move.
+            ply -- the depth of the search.
+            deadline -- the time (as returned by time.time) at which the search is aborted, or None.
+            search -- the number of the search, which tells the worker when a new search has started.
+        Returns:
+            (value, nodes, counters, ordering) where value is None if the search was aborted, counters are the statistics of the search
+            (see SearchStats.counters) and ordering are the cutoff counters of the move orderer (see MoveOrdering.MoveOrderer.counters), or None
+    """
+    global _worker_search
+    player = _worker_player
+    if search != _worker_search:
+        _worker_search = search
+        if player.transposition_table is not None:
+            player.transposition_table.new_search()
+            player._first_generation = player.transposition_table.generation
+        if player.move_orderer is not None:
+            player.move_orderer.new_search()
+    if player.move_orderer is not None:
+        player.move_orderer.reset_counters()
+    # Any alpha level below the best value keeps the values of the moves that tie with it exact
+    best = _worker_best.value
+    alpha = best - max(abs(best), 1.0)*TIE_MARGIN
+    player.nodes = 0
+    player.stats = SearchStats.SearchStats()
+    try:
+        value = player._board_search(board, [code], ply, deadline, None, alpha)[0]
+    except SearchAborted:
+        value = None
+    if value is not None:
+        with _worker_best.get_lock():
+            if value > _worker_best.value:
+                _worker_best.value = value
+    ordering = player.move_orderer.counters() if player.move_orderer is not None else None
+    return (value, player.nodes, player.stats.counters(), ordering)
+
+
+class SearchOptions(object):
+    """
+    The options of a player's search: the search engine, its budgets and the memory it may keep. They are grouped apart from the
+    player itself so that new options do not lengthen the arguments of Player, and so that they can be passed on as one object
+    (e.g. to the players of the worker processes of the parallel search).
+    """
+    def __init__(self, tt_size=Transposition.DEFAULT_SIZE, ply=4, time_budget=None, node_budget=None, max_ply=MAX_PLY, move_ordering=True, use_symmetry=True,
+                 search_mode='board', workers=1, memory_limit=None, search_engine='alphabeta', mate_moves=None, mate_node_budget=ProofNumber.DEFAULT_NODE_BUDGET,
+                 tree_budget=TREE_BUDGET):
+        """
+        Initializer for the search options.
+            Arguments:
+                tt_size -- the number of entries of the transposition table used by the search, or 0 to search without one. Default value is Transposition.DEFAULT_SIZE.
+                ply -- the depth of the search when there is no time or node budget. Default value is 4.
+                time_budget -- the number of seconds the search may take per move, or None. Default value is None.
+                node_budget -- the number of nodes the search may visit per move, or None. Default value is None.
+                max_ply -- the deepest the search goes when deepened iteratively within a budget. Default value is MAX_PLY.
+                move_ordering -- a Boolean value indicating whether the search sorts the moves of each node with killer moves and history scores. Default value is set to True.
+                use_symmetry -- a Boolean value indicating whether positions that are equivalent under the board symmetries share transposition table entries. Default value is set to True.
+                search_mode -- 'tree' to search with a GameState per node, or 'board' to make and unmake moves on one SearchBoard. Default value is 'board'.
+                workers -- the number of worker processes the children of the root are searched in, or 1 to search in this process only. Default value is 1.
+                memory_limit -- the number of megabytes of memory (see MemoryMonitor.usage) above which the player releases the states it keeps
+                                after a move (see Player.check_memory), or None for no limit. This is a soft limit, only checked after each move. Default value is None.
+                search_engine -- 'alphabeta' to search every child of the root with a full window, 'pvs' for principal variation search
+                                 or 'mtdf' for MTD(f) (see Player._search_moves). All of them pick the same moves. Default value is 'alphabeta'.
+                mate_moves -- the number of moves within which player X looks for a forced checkmate with a proof-number search before
+                              searching heuristically (see Player._mate_move), or None to not look for one. Default value is None.
+                mate_node_budget -- the number of nodes the proof-number search may create per move. Default value is ProofNumber.DEFAULT_NODE_BUDGET.
+                tree_budget -- the number of states the tree search keeps cached below its move for the next searches (see Player.prune_tree),
+                               or None for no limit. Only used in 'tree' search mode. Default value is TREE_BUDGET.
+        """
+        assert type(ply) is int and ply > 0 and type(max_ply) is int and 0 < max_ply <= MAX_PLY
+        assert search_mode in ['tree', 'board'], "search_mode must be either 'tree' or 'board'."
+        assert type(workers) is int and workers > 0, 'There must be at least one worker.'
+        assert search_engine in SEARCH_ENGINES, 'search_engine must be one of %s.' % ', '.join(SEARCH_ENGINES)
+        assert mate_moves is None or (type(mate_moves) is int and mate_moves > 0), 'mate_moves must be a positive number of moves.'
+        self.tt_size = tt_size
+        self.ply = ply
+        self.time_budget = time_budget
+        self.node_budget = node_budget
+        self.max_ply = max_ply
+        self.move_ordering = move_ordering
+        self.use_symmetry = use_symmetry
+        self.search_mode = search_mode
+        self.workers = workers
+        self.memory_limit = memory_limit
+        self.search_engine = search_engine
+        self.mate_moves = mate_moves
+        self.mate_node_budget = mate_node_budget
+        self.tree_budget = tree_budget
 
 
 class Player(object):
     """
     Player class is used to represent the owner of the pieces and who is making the moves in the game.
     """
-    def __init__(self, name, input_mode=False):
+    def __init__(self, name, input_mode=False, use_tablebase=True, stats_file=None, ponder=False, options=None, **search_options):
         """
         Initializer for the player class.
             Arguments:
                 name -- a string containing the name of the player. Must either be 'X' or 'Y'.
                 input_mode -- a Boolean value indicating whether the player will use moves from input (for competition mode). Default value is set to False.
+                use_tablebase -- a Boolean value indicating whether moves are looked up in the KRK tablebase before searching the game tree. Default value is set to True.
+                stats_file -- the path of a file (or a file-like object) the statistics of each move are appended to, or None. Default value is None.
+                ponder -- a Boolean value indicating whether the player searches the likely replies of an opponent in input mode while the
+                          opponent enters its move (see start_pondering). Default value is set to False.
+                options -- an instance of SearchOptions. Default value is None, which creates one from the other keyword arguments.
+                search_options -- the keyword arguments of SearchOptions, if options is None (e.g. Player('W', ply=6, search_engine='pvs')).
         """
         # Assert that player was correctly initialized with a valid name
         assert name.upper() in ['W', 'B'], 'Player name must be either X or Y.'
         assert type(input_mode) is bool
+        assert type(use_tablebase) is bool
+        assert type(ponder) is bool
+        assert options is None or not search_options, 'The search options are either given as a SearchOptions or as keyword arguments.'
+        if options is None:
+            options = SearchOptions(**search_options)
         
         # Set-up instance attributes for the player
         self.name = name.upper()
         self.input_mode = input_mode
-        self.ply = 4
+        self.use_tablebase = use_tablebase
+        self.options = options
+        self.ply = options.ply
+        self.time_budget = options.time_budget
+        self.node_budget = options.node_budget
+        self.max_ply = options.max_ply
+        self.nodes = 0
+        # Nodes visited by all the searches of the player and the seconds spent in the searches that picked a move,
+        # and the number of moves found each way (see SearchStats.source), for measuring throughput
+        self.total_nodes = 0
+        self.search_time = 0.0
+        self.moves_by_source = {}
+        # Cutoffs of the searches that picked a move, and those caused by the first move searched (see MoveOrdering.MoveOrderer.stats)
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+        # Statistics of the current (or last) move's search, and where they are logged
+        self.stats = SearchStats.SearchStats()
+        self.stats_file = stats_file
+        self.memory_limit = options.memory_limit
+        # The memory in use right after the player last released its states (see check_memory), and the peak memory of the moves of the current game
+        self._released_memory = 0
+        self.peak_memory = 0
         self.state_deque = deque()
+        # The transposition table persists across the moves of one game
+        self.transposition_table = Transposition.TranspositionTable(options.tt_size) if options.tt_size else None
+        self.move_orderer = MoveOrdering.MoveOrderer(MAX_PLY+1) if options.move_ordering else None
+        self.use_symmetry = options.use_symmetry
+        self.search_mode = options.search_mode
+        self.tree_budget = options.tree_budget
+        # The first transposition table generation of the current move: entries of older generations were stored by earlier moves
+        self._first_generation = 0
+        self.search_engine = options.search_engine
+        self.mate_moves = options.mate_moves
+        self.mate_node_budget = options.mate_node_budget
+        # The proof tree of the forced checkmate being played, as (node reached by the last move, its placement, its level)
+        self._proof_tree = None
+        # The cancellation token of the current search, and the (child_values, depth) of its deepest completed iteration
+        self._token = None
+        self._progress = None
+        # The thread searching the replies to the moves the opponent may enter, and what it found, as a dictionary of
+        # {Zobrist key of the position after the opponent's move: (move code of the reply, its statistics, the proof tree after it)}
+        self.ponder = ponder
+        self._ponder_thread = None
+        self._pondered = {}
+        # The stop flag of the pondering thread, and the key and cancellation token of the position it is searching, guarded by a lock
+        self._ponder_lock = Lock()
+        self._ponder_stop = False
+        self._ponder_key = None
+        self._ponder_token = None
+        # The worker processes of the parallel search are started with the first search that needs them
+        self.workers = options.workers
+        self._pool = None
+        self._shared_best = None
+        self._searches = 0
+        # One shared piece per square, so that moves do not create new piece and Position objects (player Y has no rook)
+        self.kings = [King(self, position) for position in Bitboards.POSITIONS]
+        self.rooks = [Rook(self, position) for position in Bitboards.POSITIONS] if self.name == 'W' else None
     
     def __str__(self):
         """
@@ -44,6 +290,31 @@ class Player(object):
         
     """ METHODS """
     
+    def new_game(self):
+        """
+        Resets the data the player keeps from one move to the next (the transposition table, the move ordering and the states
+        it has moved from) before a new game starts.
+        """
+        self.stop_pondering()
+        self.peak_memory = 0
+        self.state_deque.clear()
+        self._proof_tree = None
+        self.shutdown_workers()
+        if self.transposition_table is not None:
+            self.transposition_table.clear()
+        if self.move_orderer is not None:
+            self.move_orderer.clear()
+    
+    def shutdown_workers(self):
+        """
+        Stops the worker processes of the parallel search, if they were started. They are started again by the next search that needs them.
+        """
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+            self._shared_best = None
+    
     def parse_position(self, ordered_pair):
         """
         Parses an ordered pair for making a move. Note: externally, the positions are considered as having row and column values 1-8.
@@ -64,10 +335,11 @@ class Player(object):
         if len(strs) == 3:
             # If the first string is K
             f, r = GameUtils.check_coordinates(strs[1], strs[2])
+            square = GameUtils.square_index(Position(f, r))
             if strs[0].upper() == 'K':
-                return King(self, Position(f, r))
+                return self.kings[square]
             elif strs[0].upper() == 'R' and self.name == 'W':
-                return Rook(self, Position(f, r))
+                return self.rooks[square]
 
     def move(self, current_state):
         """
@@ -90,6 +362,118 @@ class Player(object):
         else:
             return self._minimax_move(current_state)
     
+    def check_memory(self, state):
+        """
+        Releases the states the player keeps (see release_memory) if the memory in use is above the player's memory limit.
+        The resident set size of the process does not shrink when the states are freed, since Python keeps the memory for
+        new objects. So once the states have been released, they are only released again when the memory in use has grown
+        past what it was right after that release, i.e. when the states kept since then take more memory than was freed.
+            Arguments:
+                state -- the current game state.
+            Returns:
+                a Boolean value indicating whether the memory was released
+        """
+        if self.memory_limit is None or MemoryMonitor.usage()[0] <= max(self.memory_limit*MemoryMonitor.MB, self._released_memory):
+            return False
+        self.release_memory(state)
+        self._released_memory = MemoryMonitor.usage()[0]
+        self.stats.released = True
+        return True
+    
+    def release_memory(self, state):
+        """
+        Releases the states kept alive by the game so far: the states the player has moved from, the children (and their whole subtrees)
+        cached by the tree search below the current state, and the chain of its ancestors. Cycles are still detected since each state
+        keeps the repetition entries of its last ancestors (see SearchBoard.history_entry).
+            Arguments:
+                state -- the current game state.
+            Returns:
+                None
+        """
+        self.state_deque.clear()
+        self._proof_tree = None
+        state._children = []
+        state.parent = None
+    
+    def prune_tree(self, state):
+        """
+        Limits the states the tree search keeps cached below a state to self.tree_budget (if it is not None). The states below the move that was played
+        are all that is kept after a move (see GameState.cleanup), since the next searches start from there. They are kept level by
+        level, closest to the state first, and the children of the states beyond the budget are dropped. Only the tree search
+        (search_mode 'tree') keeps states: the board search creates none below the root, so all it keeps are the entries of the
+        transposition table. A state keeps no search values or bounds, only its position and the repetition entries of the line from
+        the game down to it (see SearchBoard.history_entry), so the kept states are the same as the ones the next searches would create.
+        Their values are not kept since they depend on the depth from the root of the search that found them (see _path_dependent),
+        and the next search starts 2 plies lower, so the next search starts from the values in the transposition table instead.
+        The kept states are marked (see GameState.kept), so that the next search counts the ones it visits again in SearchStats.reused_states.
+            Arguments:
+                state -- the state reached by the move that was played.
+            Returns:
+                the number of states kept below the state
+        """
+        kept = 0
+        states = [state]
+        while states:
+            next_states = []
+            for parent in states:
+                children = getattr(parent, '_children', None)
+                if not children:
+                    continue
+                if self.tree_budget is not None and kept + len(children) > self.tree_budget:
+                    parent._children = []
+                else:
+                    kept += len(children)
+                    for _, child in children:
+                        child.kept = True
+                        next_states.append(child)
+            states = next_states
+        return kept
+    
+    def start_pondering(self, state):
+        """
+        Starts searching the replies to the moves the opponent can make from the given state in a background thread, while the
+        opponent (in input mode) enters its move. The opponent's moves are searched in the order of this player's heuristic, worst
+        for this player first, since those are the moves the opponent is most likely to make. The search of each reply is the one
+        this player would make after the move (see search), so a reply that was searched in time is played at once (see stop_pondering).
+            Arguments:
+                state -- the current game state, with the opponent to move.
+            Returns:
+                None
+        """
+        self.stop_pondering()
+        if state.is_leaf:
+            return
+        # The legal moves are computed here, so that the thread and the opponent's input do not both compute them
+        state.legal_moves
+        self._ponder_stop = False
+        self._ponder_thread = Thread(target=self._ponder, args=(state,), name='Pondering player %s' % self.name)
+        self._ponder_thread.daemon = True
+        self._ponder_thread.start()
+    
+    def stop_pondering(self, state=None):
+        """
+        Stops the pondering started by start_pondering once the opponent has made its move. If the reply to the move is being searched,
+        that search is finished first, since the player would have to make it anyway. The searches of the other moves are cancelled.
+        It must be called before the player searches again, since the pondering thread searches with the player's own state (see _ponder).
+            Arguments:
+                state -- the game state reached by the opponent's move, or None if the game was stopped. Default is None.
+            Returns:
+                a Boolean value indicating whether the reply to the move was searched, so that the next move is played from the pondering
+        """
+        if self._ponder_thread is None:
+            return False
+        key = state.zobrist if state is not None else None
+        with self._ponder_lock:
+            self._ponder_stop = True
+            if self._ponder_token is not None and self._ponder_key != key:
+                self._ponder_token.cancel()
+        self._ponder_thread.join()
+        self._ponder_thread = None
+        # Only the reply to the move that was made is kept
+        pondered = self._pondered
+        self._pondered = {key: pondered[key]} if key in pondered else {}
+        return bool(self._pondered)
+    
     def heuristic(self, state, depth):
         """
         Returns the heuristic value of the given state and depth (relative to the current game state) based on the current player.
@@ -97,6 +481,7 @@ class Player(object):
                 state -- an instance of GameState for which the heuristic function is evaluated.
                 depth -- the distance of the given state from the current game state as given by the mini-max algorithm.
         """        
+        self.stats.leaves += 1
         # Return the heuristic value based on the player
         if self.name == 'W':
             return self._heuristic_x(state, depth)
@@ -108,12 +493,277 @@ class Player(object):
         Search game to determine best action; use alpha-beta pruning.
         This version cuts off search and uses an evaluation function.
         Adapted (and modified) from: http://aima.cs.berkeley.edu/python/games.html
+        If the player has a time or node budget, the search is deepened iteratively until the budget runs out (see iterative_deepening),
+        otherwise it searches self.ply plies deep. The statistics of the search are left in self.stats (see search).
             Arguments:
                 state - the state node representing the current game state.
             Returns:
                 child - a game state representing the node chosen by the alpha-beta mini-max search algorithm.
         """
-
+        return self.search(state)[0]
+    
+    def search(self, state, token=None, log=True):
+        """
+        Picks a move like alphabeta_search and also returns the statistics of its search. If the player has a stats_file,
+        the statistics are appended to it. If the player has a memory_limit, it is checked after the move (see check_memory).
+            Arguments:
+                state - the state node representing the current game state.
+                token - a CancellationToken that stops the search early (see anytime_search), or None. Default is None.
+                log - a Boolean value indicating whether to append the statistics to the stats_file. Default is True.
+            Returns:
+                child - a game state representing the node chosen, or None if the user stopped the game.
+                stats - an instance of SearchStats.SearchStats.
+        """
+        stats = self.stats = SearchStats.SearchStats()
+        stats.level = state.level
+        MemoryMonitor.reset_peak()
+        tt = self.transposition_table
+        if tt is not None:
+            tt_counters = (tt.probes, tt.hits, tt.cutoffs)
+        start = time()
+        child = self._search(state, token)
+        stats.time = time() - start
+        if child is None:
+            stats.source = 'stopped'
+        elif self.memory_limit is not None:
+            self.check_memory(child)
+        stats.memory, stats.peak_memory = MemoryMonitor.usage()
+        self.peak_memory = max(self.peak_memory, stats.peak_memory)
+        if tt is not None:
+            stats.tt_probes, stats.tt_hits, stats.tt_cutoffs = [now - before for now, before in zip((tt.probes, tt.hits, tt.cutoffs), tt_counters)]
+        if log:
+            self._count_move(stats)
+            if self.stats_file is not None:
+                stats.write(self.stats_file)
+        return (child, stats)
+    
+    def anytime_search(self, state, token=None):
+        """
+        Picks a move like search, but can be stopped at any time with a cancellation token (or its deadline) and is never interrupted
+        by a prompt. The search is deepened iteratively (up to self.ply plies if the player has no time or node budget), and once the
+        token is cancelled it returns the best move of the deepest iteration it completed. The first iteration is always completed,
+        so that there is a move to return.
+            Arguments:
+                state -- the state node representing the current game state.
+                token -- a CancellationToken, or None to search like search does. Default is None.
+            Returns:
+                an instance of SearchResult with the child chosen, its value (None if the move came from the tablebase or the proof-number search)
+                and the depth of the search. The statistics of the search are left in self.stats.
+        """
+        child, stats = self.search(state, token or CancellationToken())
+        return SearchResult(child, stats.score, stats.depth)
+    
+    def _search(self, state, token=None):
+        """
+        Picks the move of alphabeta_search, counting the statistics of the search in self.stats. Only intended to be called by search.
+        Without a cancellation token, a KeyboardInterrupt asks the user how to go on, otherwise it is left to the caller.
+        """
+        # Positions the tablebase knows the outcome of are answered by a lookup instead of a search
+        if self.use_tablebase:
+            child = self._tablebase_move(state)
+            if child is not None:
+                self.stats.source = 'tablebase'
+                state.cleanup(child)
+                return child
+        
+        # A forced checkmate found by the proof-number search overrides the heuristic move
+        if self.mate_moves is not None and self.name == 'W':
+            child = self._mate_move(state)
+            if child is not None:
+                self.stats.source = 'mate search'
+                state.cleanup(child)
+                return child
+        
+        if self.move_orderer is not None:
+            self.move_orderer.new_search()
+            self.move_orderer.reset_counters()
+        if self.transposition_table is not None:
+            self._first_generation = self.transposition_table.generation + 1
+        
+        # This is the major bottleneck of the program, so a KeyboardInterrupt exception handler
+        # has been put here to deal make sure the user is sure before exiting the program for good.
+        self._progress = None
+        while True:
+            try:
+                # This is where the alpha-beta function is actually called
+                if token is not None:
+                    max_depth = self.ply if self.time_budget is None and self.node_budget is None else None
+                    child_values, _ = self.iterative_deepening(state, token=token, max_depth=max_depth)
+                elif self.time_budget is None and self.node_budget is None:
+                    self.nodes = 0
+                    start = time()
+                    child_values = self._search_root(state, self.ply)
+                    self.stats.depth, self.stats.depth_times = self.ply, [time() - start]
+                else:
+                    child_values, _ = self.iterative_deepening(state)
+                self.total_nodes += self.nodes
+                self.stats.nodes = self.nodes
+                break
+            except KeyboardInterrupt:
+                if token is not None:
+                    raise
+                # Handles KeyboardInterrupt
+                condition = lambda r: r.upper() in ['YES','Y','NO','N']
+                response = GameUtils.query_until('\nGame interrupted!!! If you choose not to continue, the game will terminate. \nOtherwise, it will play the best move '
+                                                 'found so far, or restart the last search if it has not completed an iteration yet. Continue with the game? (Y/N)', condition)
+                if response.upper() in ['N','NO']:
+                    response = GameUtils.query_until('\nThere may be other games (if this is test mode), would you like to continue to the next game? (Y/N)', condition)
+                    if response.upper() in ['Y','YES']:
+                        return
+                    else:
+                        print 'Exiting...'
+                        exit(0)
+                # The iterations completed by iterative_deepening are not searched again
+                if self._progress is not None:
+                    child_values, _ = self._progress
+                    self.total_nodes += self.nodes
+                    self.stats.nodes = self.nodes
+                    break
+        # Sort children in non-increasing order of heuristic value
+        child_values.sort(key=lambda tup: tup[0], reverse=True)
+        winners = []
+        max_val = -inf
+        # Iterate through each to see if there are multiple winners
+        for (hval, child) in child_values:
+            if hval >= max_val:
+                max_val = hval
+                winners.append(child)
+            else:
+                # Breaks out of iteration when heuristic value decreases
+                break
+        # Make sure a child state is chosen, otherwise we have a serious problem
+        assert len(winners) != 0, 'No winners picked!!!'
+        # Randomly select a child from the list if necessary
+        child = choice(winners)
+        self.stats.score = max_val
+        if self.move_orderer is not None:
+            self.stats.move_ordering = self.move_orderer.stats()
+        state.cleanup(child)
+        if self.search_mode == 'tree':
+            self.prune_tree(child)
+        return child
+    
+    def iterative_deepening(self, state, time_budget=None, node_budget=None, token=None, max_depth=None):
+        """
+        Searches the game tree one ply deeper at a time until the time or node budget runs out, up to self.max_ply plies
+        (or the end of the game). Each iteration leaves the best moves it found in the transposition table and orders the root
+        children by the values of the previous iteration, so that the next iteration is searched in a better order.
+        The first iteration is always completed, so that there is a move to return even with a tiny budget.
+        The deepest completed iteration is also kept in self._progress, so that an interrupted search can still play its move.
+            Arguments:
+                state -- the state node representing the current game state.
+                time_budget -- the number of seconds the search may take. Default is None, which uses self.time_budget.
+                node_budget -- the number of nodes the search may visit. Default is None, which uses self.node_budget.
+                token -- a CancellationToken that stops the search after the first iteration, or None. Its deadline is
+                            kept like a time budget. Default is None.
+                max_depth -- the deepest iteration. Default is None, which uses self.max_ply.
+            Returns:
+                child_values -- a list of (value, child) tuples for the children of state from the deepest completed iteration.
+                depth -- the depth of that iteration.
+        """
+        if time_budget is None:
+            time_budget = self.time_budget
+        if node_budget is None:
+            node_budget = self.node_budget
+        start = time()
+        deadline = start + time_budget if time_budget is not None else None
+        if token is not None and token.deadline is not None:
+            deadline = token.deadline if deadline is None else min(deadline, token.deadline)
+        # There is no point in searching past the end of the game
+        max_depth = max(1, min(max_depth or self.max_ply, state.max_level - state.level))
+        
+        self.nodes = 0
+        self.stats.depth_times = []
+        self._progress = None
+        child_values = None
+        depth = 0
+        try:
+            while depth < max_depth:
+                iteration_start = time()
+                try:
+                    if child_values is None:
+                        # The first iteration is searched without a budget
+                        iteration_values = self._search_root(state, depth+1)
+                    else:
+                        # Search the best children of the previous iteration first
+                        children = [child for _, child in sorted(child_values, key=lambda tup: tup[0], reverse=True)]
+                        self._token = token
+                        iteration_values = self._search_root(state, depth+1, children, deadline, node_budget)
+                except SearchAborted:
+                    break
+                child_values = iteration_values
+                depth += 1
+                self._progress = (child_values, depth)
+                self.stats.depth = depth
+                self.stats.depth_times.append(time() - iteration_start)
+                # Do not start another iteration that would only get through a fraction of its tree
+                if deadline is not None and time() - start > (deadline - start)/2.0:
+                    break
+                if token is not None and token.cancelled:
+                    break
+        finally:
+            self._token = None
+        return (child_values, depth)
+    
+    def _search_root(self, state, ply, children=None, deadline=None, node_limit=None):
+        """
+        Runs the alpha-beta search on each child of the root state. Only intended to be called by alphabeta_search and iterative_deepening.
+        Depending on self.search_mode, the game tree is searched with GameState nodes or on one SearchBoard (see _board_search_root).
+            Arguments:
+                state -- the state node representing the current game state.
+                ply -- the depth of the search.
+                children -- the children of state in the order they should be searched. Default is None, which uses state.children.
+                deadline -- the time (as returned by time.time) at which the search is aborted. Default is None, for no time limit.
+                node_limit -- the value of self.nodes at which the search is aborted. Default is None, for no node limit.
+            Returns:
+                a list of (value, child) tuples for the children of state.
+            Raises:
+                SearchAborted -- if the deadline or node limit is reached.
+        """
+        if self.transposition_table is not None:
+            self.transposition_table.new_search()
+        if self.search_mode == 'board':
+            return self._board_search_root(state, ply, children, deadline, node_limit)
+        
+        orderer = self.move_orderer
+        pvs = self.search_engine == 'pvs'
+        lookup = lambda state, alpha, beta, depth: self._tt_lookup(state, alpha, beta, depth, ply)
+        record = lambda key, transform, v, alpha, beta, depth, best_move: self._tt_record(key, transform, v, alpha, beta, depth, best_move, ply)
+        
+        def ordered_children(state, depth, best_move):
+            """
+            Yields the children of a state, starting with the best move stored in the transposition table.
+            The remaining children are sorted by the move orderer if the player has one, otherwise they come in the order of state.children.
+            """
+            if orderer is not None:
+                for code, move in orderer.order(state, depth, best_move):
+                    yield state.get_child(move, code)
+                return
+            if best_move is not None:
+                first = state.child_from_code(best_move)
+                if first is not None:
+                    yield first
+            for child in state.children:
+                if child.last_move != best_move:
+                    yield child
+        
+        def count_node(state):
+            """
+            Counts a visit of a state, and the first visit of a state that was kept from the search of an earlier move (see prune_tree).
+            """
+            self._count_node(deadline, node_limit)
+            if state.kept:
+                state.kept = False
+                self.stats.reused_states += 1
+        
+        def cutoff(child, depth, index):
+            """
+            Lets the move orderer know which child caused a cutoff, and how early it was searched.
+            """
+            self.stats.record_cutoff(depth)
+            if orderer is not None:
+                orderer.record_cutoff(child.last_move, depth, ply - depth, index)
+        
         ## Nested functions for assessing MAX and MIN nodes ##
         def max_value(state, alpha, beta, depth):
             """
@@ -126,14 +776,34 @@ class Player(object):
                 Returns:
                     heuristic value
             """
-            if state.is_leaf or depth >= self.ply or (self.name == 'W' and state.check_cycle(min_length=4,max_length=8)):
-                return (state, self.heuristic(state, depth))
+            count_node(state)
+            if depth >= ply or state.is_leaf:
+                return self.heuristic(state, depth)
+            if self.name == 'W' and state.check_cycle(min_length=4,max_length=8):
+                self.stats.cycle_stops += 1
+                return self.heuristic(state, depth)
+            key, transform, best_move, value = lookup(state, alpha, beta, depth)
+            if value is not None:
+                return value
+            alpha_0 = alpha
             v = -inf
-            for child in state.children:
-                v = max(v, min_value(child, alpha, beta, depth+1))
+            for index, child in enumerate(ordered_children(state, depth, best_move)):
+                if pvs and index and alpha > -inf:
+                    # Principal variation search: a null window only tells whether a later child is better than the best one so far
+                    null_beta = min(beta, alpha + max(abs(alpha), 1.0)*TIE_MARGIN)
+                    child_value = min_value(child, alpha, null_beta, depth+1)
+                    if null_beta <= child_value < beta:
+                        child_value = min_value(child, alpha, beta, depth+1)
+                else:
+                    child_value = min_value(child, alpha, beta, depth+1)
+                if child_value > v:
+                    v = child_value
+                    best_move = child.last_move
                 if v >= beta:
-                    return v
+                    cutoff(child, depth, index)
+                    break
                 alpha = max(alpha, v)
+            record(key, transform, v, alpha_0, beta, depth, best_move)
             return v
     
         def min_value(state, alpha, beta, depth):
@@ -147,58 +817,415 @@ class Player(object):
                 Returns:
                     heuristic value
             """
-            if state.is_leaf or depth >= self.ply:
+            count_node(state)
+            if depth >= ply or state.is_leaf:
                 return self.heuristic(state, depth)
+            key, transform, best_move, value = lookup(state, alpha, beta, depth)
+            if value is not None:
+                return value
+            beta_0 = beta
             v = inf
-            for child in state.children:
-                v = min(v, max_value(child, alpha, beta, depth+1))
+            for index, child in enumerate(ordered_children(state, depth, best_move)):
+                if pvs and index and beta < inf:
+                    null_alpha = max(alpha, beta - max(abs(beta), 1.0)*TIE_MARGIN)
+                    child_value = max_value(child, null_alpha, beta, depth+1)
+                    if alpha < child_value <= null_alpha:
+                        child_value = max_value(child, alpha, beta, depth+1)
+                else:
+                    child_value = max_value(child, alpha, beta, depth+1)
+                if child_value < v:
+                    v = child_value
+                    best_move = child.last_move
                 if v <= alpha:
-                    return v
+                    cutoff(child, depth, index)
+                    break
                 beta = min(beta, v)
+            record(key, transform, v, alpha, beta_0, depth, best_move)
             return v
     
         ## Search is actually initiated through calling a lambda function of min_value on
         ## the current state's children, since the root node will always be MAX
-        alpha_beta = lambda child: min_value(child, -inf, inf, 0)
+        children = list(state.children if children is None else children)
+        alpha_beta = lambda index, alpha, beta: min_value(children[index], alpha, beta, 0)
+        return zip(self._search_moves(alpha_beta, len(children), state), children)
+    
+    def _board_search_root(self, state, ply, children=None, deadline=None, node_limit=None):
+        """
+        Runs the same alpha-beta search as _search_root, but on a single SearchBoard that moves are made and unmade on,
+        so that no GameState is created below the children of the root. Only intended to be called by _search_root.
+        If the player has more than one worker, the children are searched in parallel (see _parallel_search).
+            Arguments:
+                state -- the state node representing the current game state.
+                ply -- the depth of the search.
+                children -- the children of state in the order they should be searched. Default is None, which uses state.children.
+                deadline -- the time (as returned by time.time) at which the search is aborted. Default is None, for no time limit.
+                node_limit -- the value of self.nodes at which the search is aborted. Default is None, for no node limit.
+            Returns:
+                a list of (value, child) tuples for the children of state.
+            Raises:
+                SearchAborted -- if the deadline or node limit is reached.
+        """
+        if children is None:
+            children = list(state.children)
+        board = SearchBoard.SearchBoard(state)
+        codes = [child.last_move for child in children]
+        # A node budget cannot be shared between processes, so it is kept by searching in this process
+        if self.workers > 1 and node_limit is None and len(codes) > 1:
+            values = self._parallel_search(board, codes, ply, deadline)
+        else:
+            values = self._board_search(board, codes, ply, deadline, node_limit)
+        return zip(values, children)
+    
+    def _board_search(self, board, codes, ply, deadline=None, node_limit=None, alpha=-inf):
+        """
+        Searches the positions reached by the given moves from the position on a SearchBoard (the root of the search).
+            Arguments:
+                board -- the SearchBoard of the root position. It is left unchanged.
+                codes -- the move codes of the root moves to search.
+                ply -- the depth of the search.
+                deadline -- the time (as returned by time.time) at which the search is aborted. Default is None, for no time limit.
+                node_limit -- the value of self.nodes at which the search is aborted. Default is None, for no node limit.
+                alpha -- the alpha level each move is searched with. Values at or below alpha are only upper bounds. Default is -inf.
+            Returns:
+                a list of the values of the moves
+            Raises:
+                SearchAborted -- if the deadline or node limit is reached.
+        """
+        orderer = self.move_orderer
+        pvs = self.search_engine == 'pvs'
         
-        # This is the major bottleneck of the program, so a KeyboardInterrupt exception handler
-        # has been put here to deal make sure the user is sure before exiting the program for good.
-        while True:
+        def ordered_codes(depth, best_move):
+            """
+            Returns the move codes of the legal moves on the board in the order they are searched (see ordered_children in _search_root).
+            """
+            codes = board.legal_codes()
+            if orderer is not None:
+                return orderer.order_codes(codes, board.KX, board.KY, depth, best_move)
+            if best_move in codes:
+                codes.remove(best_move)
+                codes.insert(0, best_move)
+            return codes
+        
+        ## Nested functions for assessing MAX and MIN nodes ##
+        def max_value(alpha, beta, depth):
+            """
+            Alpha-beta pruning for MAX nodes, searching the position on the board
+                Arguments:
+                    alpha -- the alpha level
+                    beta -- the beta level
+                    depth -- the depth from the root node
+                Returns:
+                    heuristic value
+            """
+            self._count_node(deadline, node_limit)
+            if board.is_leaf or depth >= ply:
+                return self.heuristic(board, depth)
+            if self.name == 'W' and board.check_cycle(min_length=4,max_length=8):
+                self.stats.cycle_stops += 1
+                return self.heuristic(board, depth)
+            key, transform, best_move, value = self._tt_lookup(board, alpha, beta, depth, ply)
+            if value is not None:
+                return value
+            alpha_0 = alpha
+            v = -inf
+            for index, code in enumerate(ordered_codes(depth, best_move)):
+                board.make_move(code)
+                if pvs and index and alpha > -inf:
+                    # Principal variation search (see max_value in _search_root)
+                    null_beta = min(beta, alpha + max(abs(alpha), 1.0)*TIE_MARGIN)
+                    child_value = min_value(alpha, null_beta, depth+1)
+                    if null_beta <= child_value < beta:
+                        child_value = min_value(alpha, beta, depth+1)
+                else:
+                    child_value = min_value(alpha, beta, depth+1)
+                board.unmake_move()
+                if child_value > v:
+                    v = child_value
+                    best_move = code
+                if v >= beta:
+                    self.stats.record_cutoff(depth)
+                    if orderer is not None:
+                        orderer.record_cutoff(code, depth, ply - depth, index)
+                    break
+                alpha = max(alpha, v)
+            self._tt_record(key, transform, v, alpha_0, beta, depth, best_move, ply)
+            return v
+        
+        def min_value(alpha, beta, depth):
+            """
+            Alpha-beta pruning for MIN nodes, searching the position on the board
+                Arguments:
+                    alpha -- the alpha level
+                    beta -- the beta level
+                    depth -- the depth from the root node
+                Returns:
+                    heuristic value
+            """
+            self._count_node(deadline, node_limit)
+            if board.is_leaf or depth >= ply:
+                return self.heuristic(board, depth)
+            key, transform, best_move, value = self._tt_lookup(board, alpha, beta, depth, ply)
+            if value is not None:
+                return value
+            beta_0 = beta
+            v = inf
+            for index, code in enumerate(ordered_codes(depth, best_move)):
+                board.make_move(code)
+                if pvs and index and beta < inf:
+                    null_alpha = max(alpha, beta - max(abs(beta), 1.0)*TIE_MARGIN)
+                    child_value = max_value(null_alpha, beta, depth+1)
+                    if alpha < child_value <= null_alpha:
+                        child_value = max_value(alpha, beta, depth+1)
+                else:
+                    child_value = max_value(alpha, beta, depth+1)
+                board.unmake_move()
+                if child_value < v:
+                    v = child_value
+                    best_move = code
+                if v <= alpha:
+                    self.stats.record_cutoff(depth)
+                    if orderer is not None:
+                        orderer.record_cutoff(code, depth, ply - depth, index)
+                    break
+                beta = min(beta, v)
+            self._tt_record(key, transform, v, alpha, beta_0, depth, best_move, ply)
+            return v
+        
+        def alpha_beta(index, alpha, beta):
+            """
+            Searches the root move with the given index within the window (alpha, beta).
+            """
+            board.make_move(codes[index])
             try:
-                # This is where the alpha-beta function is actually called
-                child_values = [(alpha_beta(child), child) for child in state.children]
-                break
-            except KeyboardInterrupt:
-                # Handles KeyboardInterrupt
-                condition = lambda r: r.upper() in ['YES','Y','NO','N']
-                response = GameUtils.query_until('\nGame interrupted!!! If you choose not to continue, the game will terminate. \nOtherwise, it will restart the last search. Continue with the game? (Y/N)', condition)
-                if response.upper() in ['N','NO']:
-                    response = GameUtils.query_until('\nThere may be other games (if this is test mode), would you like to continue to the next game? (Y/N)', condition)
-                    if response.upper() in ['Y','YES']:
-                        return
-                    else:
-                        print 'Exiting...'
-                        exit(0)
-        # Sort children in non-increasing order of heuristic value
-        child_values.sort(key=lambda tup: tup[0], reverse=True)
-        winners = []
-        max_val = -inf
-        # Iterate through each to see if there are multiple winners
-        for (hval, child) in child_values:
-            if hval >= max_val:
-                max_val = hval
-                winners.append(child)
+                return min_value(alpha, beta, 0)
+            finally:
+                board.unmake_move()
+        
+        return self._search_moves(alpha_beta, len(codes), board, alpha)
+    
+    def _search_moves(self, search, count, root, alpha=-inf):
+        """
+        Searches the root moves with the search engine of the player. With 'alphabeta' every move is searched with the window (alpha, inf).
+        The other engines only find the exact values of the moves that can tie with the best one found so far, which is all the random
+        tie-break of alphabeta_search needs: every move after the first is tested with a null window just below the best value
+        (see TIE_MARGIN), and only the moves that reach it are searched again, with a full window by 'pvs' (whose nodes search
+        their later children with null windows as well) or with a series of null windows by 'mtdf' (see _mtdf).
+            Arguments:
+                search -- a function search(index, alpha, beta) that searches the root move with the given index within the window (alpha, beta).
+                            Like max_value and min_value, it returns the value of the move if it lies within the window, otherwise a bound on it.
+                count -- the number of root moves.
+                root -- the root position (a GameState or a SearchBoard), whose heuristic value is the first guess of MTD(f).
+                alpha -- the alpha level. Values at or below alpha are only upper bounds. Default is -inf.
+            Returns:
+                a list of the values of the moves
+        """
+        if self.search_engine == 'alphabeta':
+            return [search(index, alpha, inf) for index in range(count)]
+        guess = self.heuristic(root, 0) if self.search_engine == 'mtdf' else None
+        values = []
+        best = -inf
+        for index in range(count):
+            threshold = alpha if best == -inf else max(alpha, best - max(abs(best), 1.0)*TIE_MARGIN)
+            lower = -inf
+            if threshold > -inf:
+                null_beta = threshold + max(abs(threshold), 1.0)*TIE_MARGIN
+                value = search(index, threshold, null_beta)
+                if value < null_beta:
+                    # The value is exact if it lies above the threshold, otherwise the move is not among the best
+                    values.append(value)
+                    best = max(best, value)
+                    continue
+                lower = value
+            if self.search_engine == 'pvs':
+                value = search(index, threshold, inf)
             else:
-                # Breaks out of iteration when heuristic value decreases
-                break
-        # Make sure a child state is chosen, otherwise we have a serious problem
-        assert len(winners) != 0, 'No winners picked!!!'
-        # Randomly select a child from the list if necessary
-        child = choice(winners)
-        state.cleanup(child)
-        return child
+                value = guess = self._mtdf(search, index, guess, lower)
+            values.append(value)
+            best = max(best, value)
+        return values
+    
+    def _mtdf(self, search, index, guess, lower=-inf, upper=inf):
+        """
+        Finds the exact value of a root move with MTD(f): a series of null window searches that each tell whether the value lies
+        above or below a test value, moving the bounds on the value until they meet. Relies on the transposition table to not
+        search the same nodes again for every test. Only intended to be called by _search_moves.
+            Arguments:
+                search -- the search function of the root moves (see _search_moves).
+                index -- the index of the root move.
+                guess -- the value the first test is made at.
+                lower -- a lower bound on the value. Default is -inf.
+                upper -- an upper bound on the value. Default is inf.
+            Returns:
+                the value of the move
+        """
+        value = guess
+        while lower < upper:
+            # The test value must lie above the lower bound, or the test would not move it
+            beta = min(upper, value if value > lower else lower + max(abs(lower), 1.0)*TIE_MARGIN)
+            alpha = beta - max(abs(beta), 1.0)*TIE_MARGIN
+            value = search(index, alpha, beta)
+            if value <= alpha:
+                upper = value
+            elif value >= beta:
+                lower = value
+            else:
+                return value
+        return lower
+    
+    def _parallel_search(self, board, codes, ply, deadline=None):
+        """
+        Searches the root moves in the worker processes. The first move (the most promising one) is searched in this process first,
+        and its value is shared with the workers as the best value found so far. Each worker searches its move with an alpha level
+        just below the best value when it starts, so moves that cannot be among the best are cut off early, while the moves that tie
+        with the best one still get their exact value (which keeps the random tie-break of alphabeta_search the same).
+            Arguments:
+                board -- the SearchBoard of the root position.
+                codes -- the move codes of the root moves to search.
+                ply -- the depth of the search.
+                deadline -- the time (as returned by time.time) at which the search is aborted. Default is None, for no time limit.
+            Returns:
+                a list of the values of the moves
+            Raises:
+                SearchAborted -- if the deadline is reached.
+        """
+        # Young brothers wait: the first move gives the workers a bound to search the others with
+        values = self._board_search(board, codes[:1], ply, deadline)
+        if self._pool is None:
+            options = SearchOptions(tt_size=self.transposition_table.size if self.transposition_table is not None else 0,
+                                    move_ordering=self.move_orderer is not None, use_symmetry=self.use_symmetry, search_engine=self.search_engine)
+            self._shared_best = Value('d', -inf)
+            self._pool = Pool(self.workers, _init_search_worker, (self.name, options, self._shared_best))
+        self._shared_best.value = values[0]
+        self._searches += 1
+        try:
+            jobs = [self._pool.apply_async(_search_move, (board, code, ply, deadline, self._searches)) for code in codes[1:]]
+            aborted = False
+            token = self._token
+            for job in jobs:
+                # The workers cannot see the cancellation token, so they are started again if it is cancelled
+                while token is not None and not job.ready():
+                    job.wait(0.01)
+                    if token.cancelled:
+                        self.shutdown_workers()
+                        raise SearchAborted('search cancelled')
+                # Waiting with a timeout keeps this process responsive to KeyboardInterrupt
+                value, nodes, counters, ordering = job.get(1e9)
+                self.nodes += nodes
+                self.stats.merge(counters)
+                if ordering is not None:
+                    self.move_orderer.merge(ordering)
+                aborted = aborted or value is None
+                values.append(value)
+        except KeyboardInterrupt:
+            # The workers would go on with the interrupted search, so they are started again
+            self.shutdown_workers()
+            raise
+        if aborted:
+            raise SearchAborted('time budget exhausted')
+        return values
+    
+    def _count_node(self, deadline, node_limit):
+        """
+        Counts a searched node and raises SearchAborted once the node budget or the time budget has run out, or the cancellation token
+        of the search (see iterative_deepening) has been cancelled.
+            Arguments:
+                deadline -- the time (as returned by time.time) at which the search is aborted, or None.
+                node_limit -- the value of self.nodes at which the search is aborted, or None.
+        """
+        self.nodes += 1
+        if node_limit is not None and self.nodes > node_limit:
+            raise SearchAborted('node budget exhausted')
+        # Only look at the clock (and the cancellation token) every 256 nodes since it is comparatively expensive
+        if not self.nodes & 255:
+            if deadline is not None and time() > deadline:
+                raise SearchAborted('time budget exhausted')
+            if self._token is not None and self._token.cancelled:
+                raise SearchAborted('search cancelled')
+    
+    def _tt_lookup(self, state, alpha, beta, depth, ply):
+        """
+        Looks up a state in the transposition table.
+            Arguments:
+                state -- the current state (a GameState or a SearchBoard)
+                alpha -- the alpha level
+                beta -- the beta level
+                depth -- the depth from the root node
+                ply -- the depth of the search
+            Returns:
+                (key, transform, best_move, value) where transform maps the state to the canonical form it is stored under (or is None
+                without symmetry), and value is the stored score if it settles the search of this state, otherwise None. The key is None
+                if the value of the state depends on how it was reached (see _path_dependent), so that it is not stored either.
+        """
+        tt = self.transposition_table
+        if tt is None:
+            return (None, None, None, None)
+        path_dependent = self._path_dependent(state, ply - depth)
+        # Equivalent positions under the board symmetries share an entry
+        if self.use_symmetry:
+            position, transform = Symmetry.canonicalise(*(state.squares + (state.level % 2,)))
+            key = Transposition.zobrist_key(*position)
+        else:
+            key, transform = state.zobrist, None
+        # The heuristic depends on the depth, so states are only shared between nodes at the same depth
+        key ^= Transposition.DEPTH_KEYS[depth]
+        entry = tt.probe(key)
+        if entry is None:
+            return (None if path_dependent else key, transform, None, None)
+        best_move = entry.best_move
+        if best_move is not None and transform is not None:
+            best_move = Symmetry.inverse_move(best_move, transform)
+        # The best move still orders the children of a path-dependent state, but its score cannot be used
+        if path_dependent:
+            return (None, transform, best_move, None)
+        if entry.draft >= ply - depth:
+            if entry.flag == Transposition.EXACT or (entry.flag == Transposition.LOWER and entry.score >= beta) or (entry.flag == Transposition.UPPER and entry.score <= alpha):
+                tt.cutoffs += 1
+                if entry.generation < self._first_generation:
+                    self.stats.reused += 1
+                return (key, transform, best_move, entry.score)
+        return (key, transform, best_move, None)
+    
+    def _tt_record(self, key, transform, v, alpha, beta, depth, best_move, ply):
+        """
+        Stores the value of a searched state in the transposition table.
+            Arguments:
+                key -- the key returned by _tt_lookup (None if the value is not stored)
+                transform -- the transform returned by _tt_lookup
+                v -- the value found by the search
+                alpha -- the alpha level the state was searched with
+                beta -- the beta level the state was searched with
+                depth -- the depth from the root node
+                best_move -- the move code of the best child
+                ply -- the depth of the search
+        """
+        tt = self.transposition_table
+        if tt is None or key is None:
+            return
+        if v <= alpha:
+            flag = Transposition.UPPER
+        elif v >= beta:
+            flag = Transposition.LOWER
+        else:
+            flag = Transposition.EXACT
+        if best_move is not None and transform is not None:
+            best_move = Symmetry.transform_move(best_move, transform)
+        tt.store(key, ply - depth, flag, v, best_move)
             
     ## Private methods
+    def _path_dependent(self, state, draft):
+        """
+        Returns whether searching a state the given number of plies deep can give a value that depends on how the state was reached,
+        rather than only on its position and depth, so that it cannot be shared through the transposition table. That is the case if the
+        search can reach the maximum level of the game (a leaf that depends on the level), or if player X's cycle check (its cycle stops
+        and the cycle penalty of its heuristic) may detect a cycle below the state given the line that leads to it (see SearchBoard.may_cycle).
+            Arguments:
+                state -- the current state (a GameState or a SearchBoard)
+                draft -- the number of plies searched below the state
+        """
+        if state.level + draft >= state.max_level:
+            return True
+        return self.name == 'W' and SearchBoard.may_cycle(state.history, state.level, draft, 4, 8)
+    
     def _minimax_move(self, current_state):
         """
         This method makes a move for the player as AI based off of the current game state. Only intended to be called by the self.move method.
@@ -211,8 +1238,146 @@ class Player(object):
         game_status = current_state.game_status
         # Returns the next move only if the game status is OK, otherwise returns None
         if game_status in ['continue', 'check']:
+            # A reply searched while the opponent was entering its move is played without searching again
+            if self._pondered:
+                child = self._pondered_move(current_state)
+                if child is not None:
+                    return child
             return self.alphabeta_search(current_state)
     
+    def _tablebase_move(self, current_state):
+        """
+        This method picks a perfect move by looking up the position reached by each legal move in the KRK tablebase.
+        Player X picks a move with the fewest plies to checkmate, while player Y picks a move that reaches a draw or,
+        failing that, the most plies to checkmate. Ties are broken randomly like in the alpha-beta search.
+            Arguments:
+                current_state -- the game state returned by the last player, representing the current state of the game.
+            Returns:
+                a child node resulting from the move picked from the tablebase, or None if player X cannot force a checkmate
+                (the heuristic search decides the move in that case).
+        """
+        # The side to move after this move
+        side = (current_state.level + 1) % 2
+        move_values = []
+        for move in current_state.legal_moves:
+            KX, RX, KY = current_state.KX, current_state.RX, current_state.KY
+            if move.owner is current_state.player_y:
+                KY = move
+            elif isinstance(move, Rook):
+                RX = move
+            else:
+                KX = move
+            move_values.append((Tablebase.probe_pieces(KX, RX, KY, side), move))
+        if self.name == 'W':
+            # Only moves that keep a forced checkmate are considered
+            move_values = [(plies, move) for plies, move in move_values if plies is not None]
+            if not move_values:
+                return None
+            best = min(plies for plies, _ in move_values)
+        else:
+            # A draw is the best outcome for player Y, otherwise delay the checkmate as long as possible
+            if any(plies is None for plies, _ in move_values):
+                best = None
+            else:
+                best = max(plies for plies, _ in move_values)
+        winners = [move for plies, move in move_values if plies == best]
+        # Make sure a move is chosen, otherwise we have a serious problem
+        assert len(winners) != 0, 'No winners picked!!!'
+        return current_state.child_from_move(choice(winners))
+
+    def _mate_move(self, current_state):
+        """
+        This method looks for a forced checkmate within self.mate_moves moves with a proof-number search (see ProofNumber.py),
+        and picks the first move of the fastest one. The proof tree is kept, so the next moves of the checkmate are looked up
+        in it instead of searched again: it covers every reply of player Y.
+            Arguments:
+                current_state -- the game state returned by the last player, representing the current state of the game.
+            Returns:
+                a child node resulting from the first move of the checkmate, or None if no checkmate was proven within the node budget
+                (the heuristic search decides the move in that case).
+        """
+        node = None
+        if self._proof_tree is not None:
+            previous, placement, level = self._proof_tree
+            # Only player Y's king has moved since the last move if the game went on from the position of the proof tree
+            if current_state.level == level + 1 and current_state.placement | 63 == placement | 63:
+                node = previous.child(current_state.last_move)
+        if node is None:
+            search = ProofNumber.ProofNumberSearch(SearchBoard.SearchBoard(current_state), self.mate_moves, self.mate_node_budget)
+            search.search()
+            self.stats.mate_nodes = search.nodes
+            self.total_nodes += search.nodes
+            if search.root.outcome == ProofNumber.PROVEN:
+                node = search.root
+        if node is None:
+            self._proof_tree = None
+            return None
+        mating_node = node.mating_child()
+        child = current_state.child_from_code(mating_node.code)
+        self._proof_tree = (mating_node, child.placement, child.level)
+        return child
+    
+    def _ponder(self, state):
+        """
+        Searches the replies to the opponent's moves from the given state until stop_pondering is called, keeping each completed
+        search in self._pondered. Runs in the thread started by start_pondering.
+        Each reply is searched with self.search, which uses the player's shared state: self.stats, self.nodes and self.total_nodes,
+        the transposition table, the move orderer, the proof tree and the GameState.created counter. This is only safe because the
+        player never searches in another thread while pondering: stop_pondering joins this thread before the player makes its move,
+        so the statistics of the move played are never mixed with those of a pondered search.
+        """
+        evaluate = self._heuristic_x if self.name == 'W' else self._heuristic_y
+        # The moves that end the game have no reply to search
+        children = [child for child in (state.child_from_move(move) for move in state.legal_moves) if not child.is_leaf]
+        children.sort(key=lambda child: evaluate(child, 1))
+        # Each reply starts from the proof tree of the current position, and keeps the one its own search leaves
+        proof_tree = self._proof_tree
+        try:
+            for child in children:
+                token = CancellationToken()
+                with self._ponder_lock:
+                    if self._ponder_stop:
+                        break
+                    self._ponder_key, self._ponder_token = child.zobrist, token
+                self._proof_tree = proof_tree
+                reply, stats = self.search(child, token, log=False)
+                if reply is not None and not token.cancelled:
+                    self._pondered[child.zobrist] = (reply.last_move, stats, self._proof_tree)
+        finally:
+            with self._ponder_lock:
+                self._ponder_key, self._ponder_token = None, None
+            self._proof_tree = proof_tree
+    
+    def _count_move(self, stats):
+        """
+        Counts a move the player made in self.moves_by_source, the time of its search in self.search_time if it was searched
+        (heuristically or by the proof-number search), and the cutoffs of its move orderer.
+        """
+        self.moves_by_source[stats.source] = self.moves_by_source.get(stats.source, 0) + 1
+        if stats.source in SEARCHED_SOURCES:
+            self.search_time += stats.time
+        if stats.move_ordering is not None:
+            self.cutoffs += stats.move_ordering['cutoffs']
+            self.first_move_cutoffs += stats.move_ordering['first_move_cutoffs']
+    
+    def _pondered_move(self, current_state):
+        """
+        Returns the child for the reply to the opponent's last move that was searched while pondering (see start_pondering),
+        or None if it was not searched. The statistics of that search are left in self.stats.
+        """
+        pondered, self._pondered = self._pondered, {}
+        if current_state.zobrist not in pondered:
+            return None
+        code, stats, self._proof_tree = pondered[current_state.zobrist]
+        stats.pondered = True
+        self.stats = stats
+        self._count_move(stats)
+        if self.stats_file is not None:
+            stats.write(self.stats_file)
+        child = current_state.child_from_code(code)
+        current_state.cleanup(child)
+        return child
+    
     def _input_move(self, current_state):
         """
         This method allows user input to make a move so that someone else (a person or a program) can play against this program. Only intended to be called by the self.move method.
@@ -232,110 +1397,24 @@ class Player(object):
            
     def _heuristic_x(self, state, depth):
         """
-        A private method that returns the heuristic value of player x in the given instance of GameState.
+        A private method that returns the heuristic value of player x in the given state, looked up with Heuristics.evaluate_x.
         Intended to be called from the heuristic(state, depth) method.
             Arguments:
-                state -- an instance of GameState for which the heuristic function is evaluated.
+                state -- an instance of GameState (or SearchBoard) for which the heuristic function is evaluated.
                 depth -- the distance of the given state from the current game state as given by the mini-max algorithm.
         """
-        # Get the positions of the three pieces on the chess board in the current state
-        KX_position = state.KX.position
-        RX_position = state.RX.position
-        KY_position = state.KY.position
-        
-        # Initialize values for bonus and penalty
-        bonus = 0
-        penalty = 0
-        
-        # Count the number of attacking positions KY has. The more it has, the more deduction from the heuristic value.
-        # The deduction gets reduced as KY moves away from the center or gets blocked by the rook
-        KY_moves = filter(state.king_filter(state.KY), state.y_attacking_positions)
-        KY_moves_n = len(KY_moves)
-        # Center Manhattan distance of KY
-        KY_cmd = GameUtils.cent_man_dist(KY_position)
-        RX_cmd = GameUtils.cent_man_dist(RX_position)
-
-        # Got to avoid cycles!
-        if state.check_cycle(min_length=4, max_length=8):
-            penalty += 1000
-        
-        # Allot bonus/penalties based on game status
-        if state.game_status == 'checkmate':
-            bonus += 1000/float(depth+1)
-        elif state.game_status in ['stalemate', 'insufficient materials']:
-            penalty += 1000/float(depth+1)
-        
-        if state.current_player is state.player_y:
-            # Allot penalty for moving rook to a space where the king can take it out
-            if GameUtils.chesbyshev_distance(KY_position, RX_position) == 1:
-                penalty += 1000
-            # Small bonus for pushing the King against the opposing King
-            if GameUtils.chesbyshev_distance(KY_position, KX_position) == 2:
-                bonus += 20
-                
-        # Absolute difference between the x and y distances of RX and KY
-        # The larger the better --> this indicates that the king is more vulnerable to the rook
-        RX_KY_df = abs(KY_position.file - RX_position.file)
-        RX_KY_dr = abs(KY_position.rank - RX_position.rank)
-        RX_KY_test = (max(RX_KY_df, RX_KY_dr)/float(min(RX_KY_df, RX_KY_dr)+1))-1
-        if state.KX.between(RX_position, KY_position):
-            # But this should be punished if KX is blocking because this protects KY
-            RX_KY_test = -2*RX_KY_test
-        # Manhattan distance between KX and KY
-        KX_KY_man = GameUtils.man_dist(KX_position,KY_position)
-        
-        return 9.7*KY_cmd + 1.6*(14 - KX_KY_man) + RX_KY_test - (10*KY_moves_n/float(KY_cmd+1)) + bonus - penalty
+        cycle = state.check_cycle(min_length=4, max_length=8)
+        return Heuristics.evaluate_x(state.table_index, state.game_status, cycle, depth)
 
     def _heuristic_y(self, state, depth):
         """
-        A private method that returns the heuristic value of player y in the given instance of GameState.
+        A private method that returns the heuristic value of player y in the given state, looked up with Heuristics.evaluate_y.
         Intended to be called from the heuristic(state, depth) method.
             Arguments:
-                state -- an instance of GameState for which the heuristic function is evaluated.
+                state -- an instance of GameState (or SearchBoard) for which the heuristic function is evaluated.
                 depth -- the distance of the given state from the current game state as given by the mini-max algorithm.
         """
-        # Get the positions of the three pieces on the chess board in the current state
-        KX_position = state.KX.position
-        RX_position = state.RX.position
-        KY_position = state.KY.position
-        
-        # Initialize values for bonus and penalty
-        bonus = 0
-        penalty = 0
-        
-        # Allot bonus for checkmate
-        if state.game_status == 'checkmate':
-            penalty += 1000/float(depth+1)
-        elif state.game_status in ['stalemate', 'insufficient materials']:
-            bonus += 1000/float(depth+1)    
-            
-        # Allot penalty for rook having same row or column as king, aka "check" or "checkmate"
-        if state.piece_under_attack(state.KY):
-            penalty += 500
-            
-        # Bonus for offensive moves
-        if state.current_player is state.player_x:
-            if GameUtils.chesbyshev_distance(KY_position, RX_position) == 1:
-                #print 'bonus given to player y for having king posted near rook X'
-                bonus += 250
-            if GameUtils.chesbyshev_distance(KY_position, KX_position) == 2:
-                #print 'bonus given to player y for having king posted near king X'
-                bonus += 10
-        
-        # Count the number of legal moves KY has. The more moves it has, the greater the heuristic value.
-        # This addition is worth less if KY moves away from center of the board
-        KY_moves = len(filter(state.king_filter(state.KY), state.y_attacking_positions))
-        
-        # Center Manhattan distance for KY
-        KY_cmd = GameUtils.cent_man_dist(KY_position)
-        
-        # Absolute difference between the x and y distances of RX and KY
-        # The closer to zero the better --> this indicates that the king is less vulnerable to the rook
-        RX_KY_diff = abs(abs(KY_position.file - RX_position.file) - abs(KY_position.rank - RX_position.rank))
-        
-        return -9.3*RX_KY_diff - 5.7*KY_cmd + (10*KY_moves/float(KY_cmd+1)) + penalty - bonus
-    
-
+        return Heuristics.evaluate_y(state.table_index, state.game_status, depth)
     
 
 
@@ -346,11 +1425,17 @@ class GameState(object):
     Thus, instances of this class are primarily used for states that are considered during
     the process of searching the game tree.
     """
+    # Attributes are kept in slots instead of a __dict__ since many states are created during a search
+    __slots__ = ('KX', 'RX', 'KY', 'player_x', 'player_y', 'KX_bb', 'RX_bb', 'KY_bb', 'KX_attacks', 'RX_attacks', 'KY_attacks',
+                 'x_attacks', 'placement', 'history', 'zobrist', 'last_move', 'level', 'max_level', 'legal_moves', 'game_status', '_children',
+                 'parent', 'is_leaf', 'x_attacking_positions', 'y_attacking_positions', 'board', 'kept')
+    # Number of states created so far, for measuring throughput (see Benchmark.py)
+    created = 0
     
     """
     Overriding native Python methods for instances of this class
     """
-    def __init__(self, KX, RX, KY, max_level, level=0, parent=None):
+    def __init__(self, KX, RX, KY, max_level, level=0, parent=None, zobrist=None, last_move=None):
         """
         Constructor for the chessboard state node.
             Arguments:
@@ -358,6 +1443,8 @@ class GameState(object):
                 RX   -- Player X's rook and its designated position.
                 KY   -- Player Y's king and its designated position.
                 level  -- Int value to designate the level of the node (in reference to the original root node). Default is 0.
+                zobrist -- the Zobrist key of the state if it is already known (updated from the parent's key). Default is None, which computes it.
+                last_move -- the move code (see Transposition.move_code) of the move that led to this state. Default is None.
             Returns:
                 None
         """
@@ -365,6 +1452,7 @@ class GameState(object):
         assert isinstance(KX, King) and isinstance(RX, Rook) and isinstance(KY, King)
         assert KX.owner is RX.owner and KX.owner is not KY.owner
         assert type(level) is int
+        GameState.created += 1
         
         # Set the piece position objects as attributes to the current state
         self.KX = KX
@@ -374,23 +1462,41 @@ class GameState(object):
         # Setting the players
         self.player_x = KX.owner
         self.player_y = KY.owner
+        
+        # Bitboards of the pieces (the bitboards of the squares they attack are computed on first access, see __getattr__)
+        KX_square = GameUtils.square_index(KX.position)
+        RX_square = GameUtils.square_index(RX.position)
+        KY_square = GameUtils.square_index(KY.position)
+        self.KX_bb = Bitboards.bit(KX_square)
+        self.RX_bb = Bitboards.bit(RX_square)
+        self.KY_bb = Bitboards.bit(KY_square)
+        # States are compared and hashed by the placement of the pieces
+        self.placement = SearchBoard.placement_key(KX_square, RX_square, KY_square)
+        # Repetition entries of the last ancestors and this state, for detecting cycles without walking the parents
+        if parent is None:
+            self.history = (SearchBoard.history_entry((), self.placement),)
+        else:
+            self.history = parent.history[-2*SearchBoard.MAX_CYCLE_LENGTH:] + (SearchBoard.history_entry(parent.history, self.placement),)
+        
+        # Zobrist key of the state
+        if zobrist is None:
+            zobrist = Transposition.zobrist_key(KX_square, RX_square, KY_square, level % 2)
+        self.zobrist = zobrist
+        self.last_move = last_move
                 
         # Initialize game variables
         self.level = level
         self.max_level = max_level
-        self.legal_moves = self._get_legal_moves()
-        self.game_status = self._get_game_status()
         self._children = []
         self.parent = parent
-	
+        # Set on the states kept below the move that was played until a search visits them (see Player.prune_tree)
+        self.kept = False
         
-        # Make sure the game status is okay/not terminal
-        if self.game_status in ['continue', 'check'] and self.max_level > self.level:
-            self.is_leaf = False
-        # If not, erase any legal moves and set it as a leaf
-        else:
-            self.legal_moves = []
+        # game_status, is_leaf and legal_moves are looked up on first access (see __getattr__), since many states
+        # are pruned or evaluated at the search horizon without needing them. Reaching the maximum level always makes a leaf.
+        if self.level >= self.max_level:
             self.is_leaf = True
+            self.legal_moves = []
     
     def __str__(self):
         """
@@ -421,20 +1527,45 @@ class GameState(object):
         if attr == 'y_attacking_positions':
             self.y_attacking_positions = self._positions_under_attack(self.player_y)
             return super(GameState, self).__getattribute__(attr)        
+        # Compute the bitboards of the squares attacked by the pieces and set the attributes
+        if attr in ('KX_attacks', 'RX_attacks', 'KY_attacks', 'x_attacks'):
+            KX_square, RX_square, KY_square = self.squares
+            self.KX_attacks = Bitboards.KING_MASKS[KX_square]
+            self.RX_attacks = Bitboards.rook_attacks(RX_square, KX_square)
+            self.KY_attacks = Bitboards.KING_MASKS[KY_square]
+            self.x_attacks = self.KX_attacks | self.RX_attacks
+            return super(GameState, self).__getattribute__(attr)
+        # Look up the game status and set the attribute
+        if attr == 'game_status':
+            self.game_status = self._get_game_status()
+            return self.game_status
+        # The state is a leaf unless the game goes on (the maximum level is checked first, without looking up the game status)
+        if attr == 'is_leaf':
+            self.is_leaf = not (self.max_level > self.level and self.game_status in ['continue', 'check'])
+            return self.is_leaf
+        # Leaves have no legal moves, otherwise look them up and set the attribute
+        if attr == 'legal_moves':
+            self.legal_moves = [] if self.is_leaf else self._get_legal_moves()
+            return self.legal_moves
+        raise AttributeError('%r object has no attribute %r' % (self.__class__.__name__, attr))
     
     ### Comparison Operators ###
     def __eq__(self, other):
-        return isinstance(other, self.__class__) and self.KX == other.KX and self.RX == other.RX and self.KY == other.KY
+        return isinstance(other, self.__class__) and self.placement == other.placement
     
     def __ne__(self, other):
         return not self.__eq__(other)
     
+    def __hash__(self):
+        return self.placement
+    
     """ METHODS """        
     ## Instance Methods
     def check_cycle(self, min_length=2, max_length=6):
         """
         Checks to see if the current state is in a cycle, i.e. if the states have been repeating.
             Arguments:
+                min_length -- the minimum length of a cycle to check.
                 max_length -- the maximum length of a cycle to check. This number should be even since
                                 there are 2 players, so cycles will have an even length.
             Returns:
@@ -442,6 +1573,9 @@ class GameState(object):
         """
         # Must be even
         assert min_length % 2 == 0 and max_length % 2 == 0 and max_length > min_length
+        # Cycles up to SearchBoard.MAX_CYCLE_LENGTH plies long are answered from the repetition entries in constant time
+        if max_length <= SearchBoard.MAX_CYCLE_LENGTH:
+            return SearchBoard.has_cycle(self.history, self.level, min_length, max_length)
         # Early return if there is no parent
         if self.level < 4:
             return False
@@ -479,17 +1613,72 @@ class GameState(object):
             Returns:
                 a child state with the new move
         """
+        # Update the Zobrist key with the piece leaving its old position and entering the new one
+        piece_index, square = self.move_code(move) >> 6, GameUtils.square_index(move.position)
+        if piece_index == Transposition.KY_INDEX:
+            old_square = self.KY_bb.bit_length() - 1
+        elif piece_index == Transposition.RX_INDEX:
+            old_square = self.RX_bb.bit_length() - 1
+        else:
+            old_square = self.KX_bb.bit_length() - 1
+        keys = Transposition.PIECE_KEYS[piece_index]
+        zobrist = self.zobrist ^ keys[old_square] ^ keys[square] ^ Transposition.SIDE_KEY
+        last_move = Transposition.move_code(piece_index, square)
+        
         ## If the owner is player x, then it can be a rook or a king
-        if move.owner is self.player_x:
-            # If its a rook
-            if isinstance(move, Rook):
-                return GameState(self.KX, move, self.KY, self.max_level, level=self.level+1, parent=self)
-            # Otherwise it must be a king
-            else:
-                return GameState(move, self.RX, self.KY, self.max_level, level=self.level+1, parent=self)
+        if piece_index == Transposition.RX_INDEX:
+            return GameState(self.KX, move, self.KY, self.max_level, level=self.level+1, parent=self, zobrist=zobrist, last_move=last_move)
+        # Otherwise it must be a king
+        elif piece_index == Transposition.KX_INDEX:
+            return GameState(move, self.RX, self.KY, self.max_level, level=self.level+1, parent=self, zobrist=zobrist, last_move=last_move)
         # If not player x, then this must be player y's king
         else:
-            return GameState(self.KX, self.RX, move, self.max_level, level=self.level+1, parent=self)
+            return GameState(self.KX, self.RX, move, self.max_level, level=self.level+1, parent=self, zobrist=zobrist, last_move=last_move)
+    
+    def child_from_code(self, code):
+        """
+        Returns the child state for a legal move given as a move code, reusing the child if it was already created.
+            Arguments:
+                code -- a move code as returned by move_code.
+            Returns:
+                the child state, or None if the move is not legal in this state.
+        """
+        for move in self.legal_moves:
+            if self.move_code(move) == code:
+                return self.get_child(move, code)
+        return None
+    
+    def get_child(self, move, code):
+        """
+        Returns the child state for a legal move, reusing the child if it was already created and caching it otherwise.
+            Arguments:
+                move -- an instance of Rook or King with a new position, which must be one of the legal moves.
+                code -- the move code of move.
+            Returns:
+                the child state
+        """
+        for _, child in self._children:
+            if child.last_move == code:
+                return child
+        child = self.child_from_move(move)
+        self._children.append((move, child))
+        return child
+    
+    def move_code(self, move):
+        """
+        Returns the move code of a move, which is how moves are stored in the transposition table.
+            Arguments:
+                move -- an instance of Rook or King with a new position.
+            Returns:
+                an int (see Transposition.move_code)
+        """
+        if move.owner is self.player_y:
+            piece_index = Transposition.KY_INDEX
+        elif isinstance(move, Rook):
+            piece_index = Transposition.RX_INDEX
+        else:
+            piece_index = Transposition.KX_INDEX
+        return Transposition.move_code(piece_index, GameUtils.square_index(move.position))
         
     def piece_under_attack(self, piece):
         """
@@ -504,47 +1693,35 @@ class GameState(object):
         # Type assertion
         assert isinstance(piece, King) or isinstance(piece, Rook)
         
-        # Find opponent
+        # Check the position against the bitboard of squares attacked by the opponent
+        square = GameUtils.square_index(piece.position)
         if piece.owner is self.player_x:
-            opponent = self.player_y
+            return bool(self.KY_attacks >> square & 1)
         else:
-            opponent = self.player_x
-        
-        # Return the boolean result of checking whether the position is in the list of positions under attack by the opponent.
-        if opponent is self.player_x:
-            KX_attacking, RX_attacking = zip(*self.x_attacking_positions)
-            return piece.position in KX_attacking or piece.position in RX_attacking
-        else:
-            return piece.position in self.y_attacking_positions
+            return bool(self.x_attacks >> square & 1)
     
-    def rook_filter(self):
+    def king_mask(self, king):
         """
-        Creates an anonymous function for use as a filter for the rook's attacking positions
-        based on the fact that spaces blocked by its own king are not under attack by that rook.
+        Returns the bitboard of the king's attacking positions, leaving out the positions the king is not permitted to move to
+        (checked/"attacked" positions and its own rook's position) when it is the king's turn.
             Arguments:
-                None (there is only one rook so this is unnecessary)
+                king -- the king in question. the key difference is whether the king belongs to player X or Y.
             Returns:
-                rook_filter -- a lambda function to use as a filter for the rook's attacking positions,
-                                or a None value which can also be used as a filter function.
+                a bitboard of positions
         """
-        # Default rook_filter to None
-        rook_filter = None
+        # Assert argument is a king
+        assert isinstance(king, King)
         
-        # If KX and RX are in the same column
-        if self.KX.position.file == self.RX.position.file:
-            # Filter out positions past KX
-            if self.KX.position.rank > self.RX.position.rank:
-                rook_filter = lambda position: self.KX.position.rank > position.rank
-            else:
-                rook_filter = lambda position: self.KX.position.rank < position.rank
-        # If KX and RX are in the same row
-        elif self.KX.position.rank == self.RX.position.rank:
-            # Filter out positions past KX
-            if self.KX.position.file > self.RX.position.file:
-                rook_filter = lambda position: self.KX.position.file > position.file
-            else:
-                rook_filter = lambda position: self.KX.position.file < position.file
-        return rook_filter
+        # If this is KX, exclude positions next to KY and RX's position on X's turn
+        if king.owner is self.player_x:
+            if self.current_player is self.player_x:
+                return self.KX_attacks & ~(self.KY_attacks | self.RX_bb)
+            return self.KX_attacks
+        # If this is KY, exclude positions attacked by player X on Y's turn
+        else:
+            if self.current_player is self.player_y:
+                return self.KY_attacks & ~self.x_attacks
+            return self.KY_attacks
     
     def king_filter(self, king):
         """
@@ -557,25 +1734,13 @@ class GameState(object):
                 king_filter -- a lambda function to sue as a filter function for the king's attacking positions,
                                 or a None value with can also be used as a filter function.
         """
-        # Assert argument is a king
-        assert isinstance(king, King)
-        
         # Default filter to None
         king_filter = None
         
-        # If this is KX and it's X's turn
-        if king.owner is self.player_x and self.current_player is self.player_x:
-            # Set the filter to exclude positions that would put the king in check
-            KX_attacking, _ = zip(*self.x_attacking_positions)
-            checked_attacking_positions = list(set(KX_attacking) & set(self.y_attacking_positions))
-            checked_attacking_positions.append(self.RX.position)
-            king_filter = lambda position: position not in checked_attacking_positions
-        # If this is KY and it's Y's turn
-        elif king.owner is self.player_y and self.current_player is self.player_y:
-            # Set the filter to exclude positions that would put the king in checkf
-            KX_attacking, RX_attacking = zip(*self.x_attacking_positions)
-            checked_attacking_positions = list((set(KX_attacking) & set(self.y_attacking_positions)) | (set(RX_attacking) & set(self.y_attacking_positions)))
-            king_filter = lambda position: position not in checked_attacking_positions
+        # Only filter the positions of the king whose turn it is
+        if king.owner is self.current_player:
+            mask = self.king_mask(king)
+            king_filter = lambda position: bool(mask >> GameUtils.square_index(position) & 1)
         return king_filter
     
     def cleanup(self, successor):
@@ -587,29 +1752,50 @@ class GameState(object):
             Returns:
                 None
         """
-        # Remove old data about attacking positions and legal moves
-        del self.x_attacking_positions
-        del self.y_attacking_positions
-        del self.legal_moves
-        if successor.KX != self.KX:
-            del self.KX.attacking_positions
-        if successor.RX != self.RX:
-            del self.RX.attacking_positions
-        if successor.KY != self.KY:
-            del self.KY.attacking_positions
+        # Remove old data about attacking positions and legal moves (if they were ever computed)
+        for attr in ('x_attacking_positions', 'y_attacking_positions', 'legal_moves'):
+            try:
+                delattr(self, attr)
+            except AttributeError:
+                pass
         # Remove old children list
         del self._children
         
-    def print_board(self, before=None):
+    def print_board(self, before=None, result_file=RESULT_FILE):
         """
         Prints the string representation of the current instance to the standard output and the file gameResults.txt.
+        A game played through GameUtils.play writes its boards through a GameRecord instead, which keeps the file open for the whole game.
             Arguments:
                 before -- a string to concatenate to the beginning of the board string. This is used to add
                             a message saying that the game is starting and mentioning if it is a test case or not.
                             This ensures that the description gets printed to the gameResults.txt file as well.
+                result_file -- the path of the file the board is appended to, or a file-like object to write it to instead.
+                                Default is RESULT_FILE.
             Returns:
                 None
         """
+        board_str_print, board_str_file = self.board_strings(before)
+
+        # Print the string onto the screen
+        print board_str_print
+        
+        # Append the other string to the end of the gameResult.txt file
+        if hasattr(result_file, 'write'):
+            result_file.write(board_str_file)
+        else:
+            game_result_file = open(result_file, 'a')
+            game_result_file.write(board_str_file)
+            game_result_file.close()
+    
+    def board_strings(self, before=None):
+        """
+        Renders the current instance as printed by print_board.
+            Arguments:
+                before -- a string to concatenate to the beginning of the board string. Default is None.
+            Returns:
+                board_str_print -- the string to print on the screen (with ANSI escape codes).
+                board_str_file -- the string to write to the result file (without ANSI escape codes).
+        """
         ## Set up the board representation
         self.board = Board([self.KX, self.RX, self.KY])
         ## Setting up separate strings to print on screen and to file
@@ -652,14 +1838,7 @@ class GameState(object):
         # Create a separate string to print to screen and to gameResults.txt (to get rid of ANSI escape codes in the text file)
         board_str_print = game_str + Board.__str__(self.board)
         board_str_file = game_str + Board.__repr__(self.board)
-
-        # Print the string onto the screen
-        print board_str_print
-        
-        # Append the other string to the end of the gameResult.txt file
-        game_result_file = open('gameResult.txt', 'a')
-        game_result_file.write(board_str_file)
-        game_result_file.close()
+        return (board_str_print, board_str_file)
     
     ## Private Methods
     def _positions_under_attack(self, player):
@@ -674,82 +1853,31 @@ class GameState(object):
         """
         assert player is self.player_x or player is self.player_y, 'Must be a player in the current state!'
         if player is self.player_x:
-            rook_filter = self.rook_filter()
-            return GameUtils.zip_longest(self.KX.attacking_positions, filter(rook_filter, self.RX.attacking_positions))
+            return GameUtils.zip_longest(Bitboards.positions(self.KX_attacks), Bitboards.positions(self.RX_attacks))
         else:
-            return self.KY.attacking_positions
+            return Bitboards.positions(self.KY_attacks)
  
     def _get_legal_moves(self):
         """
-        Returns all legal moves for the current state based on whose turn it is (the current_player property).
+        Returns all legal moves for the current state based on whose turn it is (the current_player property), as looked up in the status table.
             Arguments:
                 None
             Returns:
                 list of legal moves represented as pieces
         """
-        moves = []
-        # If it is player X's turn
-        if self.current_player is self.player_x:
-            # Iterate through X's attacking positions
-            king_filter = self.king_filter(self.KX)
-            for KX_position, RX_position in self.x_attacking_positions:
-                # Add them if they are not in Y's attacking positions
-                if KX_position is not None and KX_position not in self.y_attacking_positions and king_filter(KX_position):
-                    moves.append(self.KX.move(KX_position))
-                if RX_position is not None and RX_position not in self.y_attacking_positions:
-                    moves.append(self.RX.move(RX_position))
-            return moves
-        # If its player Y's turn
-        else:
-            # Set up the king filter
-            king_filter = self.king_filter(self.KY)
-            KY_attacking = filter(king_filter, self.y_attacking_positions)
-            # Iterate through KY attacking positions and add them if they are not in X's attacking positions.
-            for KY_position in KY_attacking:
-                if KY_position not in self.x_attacking_positions:
-                    moves.append(self.KY.move(KY_position))
-            return moves
+        # The shared pieces of each player, indexed by the piece index of the move codes (see Transposition.move_code)
+        pieces = (self.player_x.kings, self.player_x.rooks, self.player_y.kings)
+        return [pieces[code >> 6][code & 63] for code in StatusTable.legal_codes(self.table_index)]
         
     def _get_game_status(self):
         """
-        Computes the game_status attribute. The class constructor calls this function to set the attribute upon initialization.
+        Computes the game_status attribute by looking it up in the status table. __getattr__ calls this function to set the attribute on first access.
             Arguments:
                 None
             Returns:
                 the game status
         """
-        # Sanity check to make sure no piece shares a position (for user input and test case purposes)
-        if self.KX.position == self.RX.position or self.KY.position == self.RX.position or self.KX.position == self.KY.position:
-            return 'illegal'
-        
-        # If there are no legal moves for this turn,
-        if not self.legal_moves:
-            # and if it is player Y's turn and player Y's king is under attack,
-            if self.current_player is self.player_y:
-                if self.piece_under_attack(self.KY):
-                    # the status returns as checkmate.
-                    return 'checkmate'
-                # If player y's king is NOT under attack but player y has no legal moves left, then it is a stalemate.
-                else:
-                    return 'stalemate'
-            # This return shouldn't happen, but will occur if it is player x's turns but there are no legal moves left.
-            else:
-                return 'no moves left'
-        else:
-            # If there are still legal moves then check to see if any could end the game.
-            if self.current_player is self.player_y:
-                if self.piece_under_attack(self.RX):
-                    return 'insufficient materials'
-                if self.piece_under_attack(self.KX):
-                    return 'illegal'
-                if self.piece_under_attack(self.KY):
-                    return 'check'
-            else:
-                if self.piece_under_attack(self.KY):
-                    return 'illegal'
-        if self.level >= self.max_level:
-            return 'maximum turns reached'
-        return 'continue'
+        return StatusTable.game_status(self.table_index, self.level, self.max_level)
     
     """ PROPERTIES """
     @property
@@ -762,6 +1890,20 @@ class GameState(object):
         else:
             return self.player_y
     
+    @property
+    def table_index(self):
+        """
+        Returns the index of the state in the status table (see StatusTable.index).
+        """
+        return (self.level % 2) << 18 | self.placement
+    
+    @property
+    def squares(self):
+        """
+        Returns a tuple of the squares (0-63, see GameUtils.square_index) of KX, RX and KY.
+        """
+        return (self.KX_bb.bit_length() - 1, self.RX_bb.bit_length() - 1, self.KY_bb.bit_length() - 1)
+    
     @property    
     def children(self):
         """
@@ -0,0 +1,197 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+GameRecord.py
+
+This module contains the sink the boards of a game are written to. GameState.print_board opens the result
+file, appends one board and closes it again for every half-move; a GameRecord instead keeps one handle open
+(for a game, or for a whole batch of games), collects the boards of the current game in memory and writes
+them out in one go when the game ends. It can also skip rendering the boards altogether (quiet mode), and
+write one JSON object per game (JSON lines) instead of the boards.
+"""
+
+""" Imports """
+## Python Library Imports
+import json
+
+## Source code imports
+import MemoryMonitor
+import Transposition
+
+
+## Output formats: the boards as printed on the screen, or one JSON object per game
+TEXT, JSON = 'text', 'json'
+FORMATS = [TEXT, JSON]
+## Letters of the pieces in the test case syntax (e.g. W.K(5,6)), indexed by the piece index of a move code (see Transposition.move_code)
+PIECE_NAMES = ['W.K', 'W.R', 'B.K']
+
+
+### Notation Functions ###
+def square_name(piece_index, square):
+    """
+    Returns the name of a piece on a square in the syntax of the test case file, e.g. 'W.K(5,6)'.
+        Arguments:
+            piece_index -- the piece index (see Transposition.move_code).
+            square -- the square (0-63, see GameUtils.square_index).
+        Returns:
+            a string
+    """
+    return '%s(%i,%i)' % (PIECE_NAMES[piece_index], square % 8 + 1, square / 8 + 1)
+
+def move_name(code):
+    """
+    Returns the name of a move given as a move code, in the syntax of the test case file.
+        Arguments:
+            code -- a move code (see Transposition.move_code).
+        Returns:
+            a string
+    """
+    return square_name(code >> 6, code & 63)
+
+
+def game_peak_memory(root_state):
+    """
+    Returns the peak memory use of the game started from a root state, in bytes (see MemoryMonitor.usage). Each move
+    measures its own peak (see Player.search), so the peak of the game is the highest of them and of the peak since.
+        Arguments:
+            root_state -- the root state of the game.
+        Returns:
+            an int
+    """
+    return max(MemoryMonitor.usage()[1], root_state.player_x.peak_memory, root_state.player_y.peak_memory)
+
+
+class GameRecord(object):
+    """
+    A buffered sink for the boards (or JSON records) of the games played through GameUtils.play.
+    """
+    def __init__(self, result_file, output_format=TEXT, quiet=False):
+        """
+        Initializer for the game record.
+            Arguments:
+                result_file -- the path of the file the games are appended to, a file-like object to write them to instead,
+                                or None to not write them (GameUtils.play uses GameClasses.RESULT_FILE).
+                output_format -- TEXT to write the boards, or JSON to write one JSON object per game. Default is TEXT.
+                quiet -- a Boolean value indicating whether to skip rendering the boards, both on the screen and in the file.
+                            In quiet mode a text record only gets one line per game with its outcome. Default is False.
+        """
+        assert output_format in FORMATS, 'The output format must be one of %s.' % ', '.join(FORMATS)
+        self.result_file = result_file
+        self.output_format = output_format
+        self.quiet = quiet
+        # The file is opened on the first game and stays open until close
+        self._handle = None
+        self._owns_handle = False
+        # Strings of the current game, written out by end_game
+        self._buffer = []
+        self._case_name = None
+        self._root = None
+        self._moves = []
+
+    """ METHODS """
+    def start_game(self, root_state, case_name=None, before=None):
+        """
+        Starts recording a game from its root state.
+            Arguments:
+                root_state -- the root state of the game.
+                case_name -- the name of the test case, or None. Default is None.
+                before -- a string to print above the first board (see GameState.print_board). Default is None.
+            Returns:
+                None
+        """
+        self._buffer = []
+        self._case_name = case_name
+        self._root = root_state
+        self._moves = []
+        self._render(root_state, before)
+
+    def add(self, state):
+        """
+        Records the state reached by a move of the current game.
+            Arguments:
+                state -- the new state.
+            Returns:
+                None
+        """
+        if state.last_move is not None:
+            self._moves.append(state.last_move)
+        self._render(state)
+
+    def end_game(self, final_state=None):
+        """
+        Writes the current game to the result file and flushes it.
+            Arguments:
+                final_state -- the last state of the game, or None if the game was stopped. Default is None.
+            Returns:
+                None
+        """
+        if final_state is None:
+            status, turns = 'stopped', len(self._moves)/2
+        else:
+            status, turns = final_state.game_status, final_state.level/2
+        if self.output_format == JSON:
+            KX_square, RX_square, KY_square = self._root.squares
+            game = {'case': self._case_name,
+                    'start': ' '.join([square_name(Transposition.KX_INDEX, KX_square), square_name(Transposition.RX_INDEX, RX_square),
+                                       square_name(Transposition.KY_INDEX, KY_square)]),
+                    'max_moves': self._root.max_level/2,
+                    'moves': [move_name(code) for code in self._moves],
+                    'status': status,
+                    'turns': turns,
+                    'peak_memory_mb': game_peak_memory(self._root)/float(MemoryMonitor.MB)}
+            self._buffer.append(json.dumps(game, sort_keys=True) + '\n')
+        elif self.quiet:
+            self._buffer.append('%s: %s after %i turns\n' % (self._case_name or 'Game', status, turns))
+        self.write(''.join(self._buffer))
+        self._buffer = []
+        if self._handle is not None:
+            self._handle.flush()
+
+    def write(self, text):
+        """
+        Writes a string to the result file, opening it first if needed.
+            Arguments:
+                text -- the string.
+            Returns:
+                None
+        """
+        if self.result_file is None or not text:
+            return
+        if self._handle is None:
+            if hasattr(self.result_file, 'write'):
+                self._handle = self.result_file
+            else:
+                self._handle = open(self.result_file, 'a')
+                self._owns_handle = True
+        self._handle.write(text)
+
+    def close(self):
+        """
+        Writes out a game that was not ended and closes the result file if the record opened it.
+            Arguments:
+                None
+            Returns:
+                None
+        """
+        if self._buffer:
+            self.write(''.join(self._buffer))
+            self._buffer = []
+        if self._owns_handle:
+            self._handle.close()
+        elif self._handle is not None:
+            self._handle.flush()
+        self._handle = None
+        self._owns_handle = False
+
+    ## Private Methods
+    def _render(self, state, before=None):
+        """
+        Prints a board on the screen and adds it to the buffer, unless the record is quiet. JSON records only print it.
+        """
+        if self.quiet:
+            return
+        board_str_print, board_str_file = state.board_strings(before)
+        print board_str_print
+        if self.output_format == TEXT:
+            self._buffer.append(board_str_file)
@@ -8,23 +8,34 @@ This module contains global functions and variables used in the game.
 """
 
 import GameClasses
+import GameRecord
 
 
 ### Play Function ###
-def play(root_state, test_mode, case_name=None):
+def play(root_state, test_mode, case_name=None, result_file=None, record=None):
     """
     The driving function for playing the KRK endgame.
         Arguments:
             root_state -- the root state of the current game that is about to start. It contains n, the maximum number of moves.
             test_mode -- a Boolean value indicating whether to play in test mode or not. If false, that indicates that this is competition mode.
             case_name -- a string containing the name of the test case as read from the test case file. Default value is set to None.
+            result_file -- the path of the file (or a file-like object) the boards are written to. Default is None, which uses GameClasses.RESULT_FILE.
+            record -- an instance of GameRecord.GameRecord the game is written to instead of result_file, which lets several games share
+                        one open file. Default is None, which writes the game to result_file through a GameRecord of its own.
         Returns:
-            None
+            the final state of the game, or None if the game was stopped
     """
     
     # Set up local objects referencing the players
     player_x = root_state.player_x
     player_y = root_state.player_y
+    # The boards are collected by the record and written out when the game ends, instead of reopening the file for every move
+    owns_record = record is None
+    if owns_record:
+        record = GameRecord.GameRecord(GameClasses.RESULT_FILE if result_file is None else result_file)
+    # Forget what the players remember from previous games
+    player_x.new_game()
+    player_y.new_game()
         
     if test_mode:
         assert case_name is not None and type(case_name) is str, 'Need to have a valid test case name for test mode!'
@@ -36,22 +47,41 @@ def play(root_state, test_mode, case_name=None):
         start_str += '*** TEST MODE ***\nImplementing %s\n' % case_name
     start_str += 'Starting game...\n'
     current_state = root_state
-    status = current_state.game_status
-    current_state.print_board(before=start_str)
+    final_state = None
+    try:
+        record.start_game(current_state, case_name, before=start_str)
+        final_state = _play_moves(current_state, player_x, player_y, record)
+        record.end_game(final_state)
+    finally:
+        if owns_record:
+            record.close()
+    return final_state
+
+def _play_moves(current_state, player_x, player_y, record):
+    """
+    Lets the players take turns from the given state until the game is over, adding each state to the record.
+    Returns the final state of the game, or None if the game was stopped.
+    """
     # Iterate the game play until either the maximum number of moves have been made or stalemate/checkmate is returned
     while not current_state.is_leaf:
-        # Player X makes a move
-        current_state = player_x.move(current_state)
-        # Check if the game is over
-        if current_state is None:
-            return
-        current_state.print_board()
-        # Player Y makes a move
-        current_state = player_y.move(current_state)
-        # Check if the game is over
-        if current_state is None:
-            return
-        current_state.print_board()
+        for player, opponent in [(player_x, player_y), (player_y, player_x)]:
+            # While a person (or another program) enters the move, the opponent searches its replies to the likely moves
+            pondering = player.input_mode and opponent.ponder and not opponent.input_mode
+            if pondering:
+                opponent.start_pondering(current_state)
+            next_state = None
+            try:
+                # The player makes a move
+                next_state = player.move(current_state)
+            finally:
+                if pondering:
+                    opponent.stop_pondering(next_state)
+            # Check if the game is over (no move is made from a finished game) or was stopped
+            if next_state is None:
+                return current_state if current_state.is_leaf else None
+            current_state = next_state
+            record.add(current_state)
+    return current_state
         
     
 ### Distance Functions ###
@@ -67,6 +97,9 @@ CMD = [
     [6, 5, 4, 3, 3, 4, 5, 6]
 ]
 
+## Center Manhattan distance indexed by square (see square_index)
+CMD_BY_SQUARE = [CMD[7 - square/8][square % 8] for square in range(64)]
+
 def cent_man_dist(position):
     """
     Returns the center Manhattan distance of a given piece, which is the Manhattan distance to the nearest of the 4 centered positions.
@@ -114,6 +147,17 @@ def chesbyshev_distance(pos1, pos2):
     # Return the max of the two distances
     return max(df, dr)
 
+def square_index(position):
+    """
+    Returns the index of a position on the board, counting from file 1, rank 1 (0) to file 8, rank 8 (63).
+    Used for looking positions up in precomputed tables.
+        Arguments:
+            position -- an instance of Position.
+        Returns:
+            an int between 0 and 63
+    """
+    return (position.file - 1) + 8*(position.rank - 1)
+
 ### Miscellaneous Functions ###
 def query_until(prompt, condition, default=None):
     """
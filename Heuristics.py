@@ -0,0 +1,287 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Heuristics.py
+
+This module contains the heuristic functions of player X and player Y computed from the squares of the
+three pieces, so that they can be used both for GameState instances (through Player.heuristic) and for the
+mutable board of the make/unmake search, which has no piece objects. See the README for the strategies behind them.
+
+Most of each heuristic only depends on the position, so that part is precomputed with NumPy for every
+position (indexed like StatusTable) when the module is first used: the sum of the distance and mobility terms,
+plus flags for the bonuses and penalties that depend on the position. The lookup functions evaluate_x and
+evaluate_y add the terms that depend on the game status, the cycle check and the depth, in the same order as
+heuristic_x and heuristic_y, so that they give exactly the same values.
+"""
+
+""" Imports """
+## Python Library Imports
+from array import array
+import numpy as np
+
+## Source code imports
+import Bitboards
+import GameUtils
+import StatusTable
+
+
+### Constants ###
+## Side to move, which matches the parity of GameState.level
+X_TO_MOVE = 0
+Y_TO_MOVE = 1
+## Flags of the position-dependent bonuses and penalties
+X_ROOK_PENALTY = 1      # player Y to move and KY next to RX
+X_KING_BONUS = 2        # player Y to move and KY two steps from KX
+Y_CHECK_PENALTY = 1     # KY attacked by player X
+Y_ROOK_BONUS = 2        # player X to move and KY next to RX
+Y_KING_BONUS = 4        # player X to move and KY two steps from KX
+
+## The position-only values and flags of both heuristics, computed on first use
+_x_values = None
+_x_flags = None
+_y_values = None
+_y_flags = None
+
+
+### Helper Functions ###
+def _chebyshev(square1, square2):
+    """
+    Returns the Chebyshev distance of two squares.
+    """
+    return max(abs(square1 % 8 - square2 % 8), abs(square1 / 8 - square2 / 8))
+
+def ky_moves(KX, RX, KY, side):
+    """
+    Returns the bitboard of player Y's king's attacking positions, leaving out the positions attacked by player X when
+    it is player Y's turn (the same as GameState.king_mask for KY).
+        Arguments:
+            KX -- the square of player X's king.
+            RX -- the square of player X's rook.
+            KY -- the square of player Y's king.
+            side -- X_TO_MOVE or Y_TO_MOVE.
+        Returns:
+            a bitboard of positions
+    """
+    if side == Y_TO_MOVE:
+        return Bitboards.KING_MASKS[KY] & ~(Bitboards.KING_MASKS[KX] | Bitboards.rook_attacks(RX, KX))
+    return Bitboards.KING_MASKS[KY]
+
+
+### Heuristic Functions ###
+def heuristic_x(KX, RX, KY, side, game_status, cycle, depth):
+    """
+    Returns the heuristic value of player x.
+        Arguments:
+            KX -- the square (0-63) of player X's king.
+            RX -- the square (0-63) of player X's rook.
+            KY -- the square (0-63) of player Y's king.
+            side -- X_TO_MOVE or Y_TO_MOVE.
+            game_status -- the game status of the position (see GameState.game_status).
+            cycle -- a Boolean value indicating whether the position ends a cycle of repeated states (see GameState.check_cycle).
+            depth -- the distance of the position from the current game state as given by the mini-max algorithm.
+    """
+    # Initialize values for bonus and penalty
+    bonus = 0
+    penalty = 0
+
+    # Count the number of attacking positions KY has. The more it has, the more deduction from the heuristic value.
+    # The deduction gets reduced as KY moves away from the center or gets blocked by the rook
+    KY_moves_n = Bitboards.popcount(ky_moves(KX, RX, KY, side))
+    # Center Manhattan distance of KY
+    KY_cmd = GameUtils.CMD_BY_SQUARE[KY]
+
+    # Got to avoid cycles!
+    if cycle:
+        penalty += 1000
+
+    # Allot bonus/penalties based on game status
+    if game_status == 'checkmate':
+        bonus += 1000/float(depth+1)
+    elif game_status in ['stalemate', 'insufficient materials']:
+        penalty += 1000/float(depth+1)
+
+    if side == Y_TO_MOVE:
+        # Allot penalty for moving rook to a space where the king can take it out
+        if _chebyshev(KY, RX) == 1:
+            penalty += 1000
+        # Small bonus for pushing the King against the opposing King
+        if _chebyshev(KY, KX) == 2:
+            bonus += 20
+
+    # Absolute difference between the x and y distances of RX and KY
+    # The larger the better --> this indicates that the king is more vulnerable to the rook
+    RX_KY_df = abs(KY % 8 - RX % 8)
+    RX_KY_dr = abs(KY / 8 - RX / 8)
+    RX_KY_test = (max(RX_KY_df, RX_KY_dr)/float(min(RX_KY_df, RX_KY_dr)+1))-1
+    if Bitboards.BETWEEN[RX << 6 | KY] >> KX & 1:
+        # But this should be punished if KX is blocking because this protects KY
+        RX_KY_test = -2*RX_KY_test
+    # Manhattan distance between KX and KY
+    KX_KY_man = abs(KX % 8 - KY % 8) + abs(KX / 8 - KY / 8)
+
+    return 9.7*KY_cmd + 1.6*(14 - KX_KY_man) + RX_KY_test - (10*KY_moves_n/float(KY_cmd+1)) + bonus - penalty
+
+def heuristic_y(KX, RX, KY, side, game_status, depth):
+    """
+    Returns the heuristic value of player y.
+        Arguments:
+            KX -- the square (0-63) of player X's king.
+            RX -- the square (0-63) of player X's rook.
+            KY -- the square (0-63) of player Y's king.
+            side -- X_TO_MOVE or Y_TO_MOVE.
+            game_status -- the game status of the position (see GameState.game_status).
+            depth -- the distance of the position from the current game state as given by the mini-max algorithm.
+    """
+    # Initialize values for bonus and penalty
+    bonus = 0
+    penalty = 0
+
+    # Allot bonus for checkmate
+    if game_status == 'checkmate':
+        penalty += 1000/float(depth+1)
+    elif game_status in ['stalemate', 'insufficient materials']:
+        bonus += 1000/float(depth+1)
+
+    # Allot penalty for rook having same row or column as king, aka "check" or "checkmate"
+    if (Bitboards.KING_MASKS[KX] | Bitboards.rook_attacks(RX, KX)) >> KY & 1:
+        penalty += 500
+
+    # Bonus for offensive moves
+    if side == X_TO_MOVE:
+        if _chebyshev(KY, RX) == 1:
+            bonus += 250
+        if _chebyshev(KY, KX) == 2:
+            bonus += 10
+
+    # Count the number of legal moves KY has. The more moves it has, the greater the heuristic value.
+    # This addition is worth less if KY moves away from center of the board
+    KY_moves = Bitboards.popcount(ky_moves(KX, RX, KY, side))
+
+    # Center Manhattan distance for KY
+    KY_cmd = GameUtils.CMD_BY_SQUARE[KY]
+
+    # Absolute difference between the x and y distances of RX and KY
+    # The closer to zero the better --> this indicates that the king is less vulnerable to the rook
+    RX_KY_diff = abs(abs(KY % 8 - RX % 8) - abs(KY / 8 - RX / 8))
+
+    return -9.3*RX_KY_diff - 5.7*KY_cmd + (10*KY_moves/float(KY_cmd+1)) + penalty - bonus
+
+
+### Heuristic Tables ###
+def generate():
+    """
+    Computes the position-only part of both heuristics for every position, with the same operations in the same order as
+    heuristic_x and heuristic_y so that the floating point values are identical.
+        Arguments:
+            None
+        Returns:
+            x_values, x_flags, y_values, y_flags -- NumPy arrays of StatusTable.TABLE_SIZE values (float64) and flags (uint8)
+    """
+    positions = np.arange(StatusTable.TABLE_SIZE, dtype=np.int64)
+    y_to_move = (positions >> 18) == Y_TO_MOVE
+    KX = (positions >> 12) & 63
+    RX = (positions >> 6) & 63
+    KY = positions & 63
+    one = np.uint64(1)
+    king_masks = np.array(Bitboards.KING_MASKS, dtype=np.uint64)
+    rook_attacks = np.array(Bitboards.ROOK_ATTACKS, dtype=np.uint64)
+    between = np.array(Bitboards.BETWEEN, dtype=np.uint64)
+    cmd_by_square = np.array(GameUtils.CMD_BY_SQUARE, dtype=np.int64)
+    # Number of squares in a bitboard, counted one byte at a time
+    byte_counts = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.int64)
+
+    x_attacks = king_masks[KX] | rook_attacks[RX << 6 | KX]
+    KY_moves = np.where(y_to_move, king_masks[KY] & ~x_attacks, king_masks[KY])
+    KY_moves_n = byte_counts[KY_moves.view(np.uint8).reshape(-1, 8)].sum(axis=1)
+    KY_cmd = cmd_by_square[KY]
+    KY_RX_chebyshev = np.maximum(abs(KY % 8 - RX % 8), abs(KY / 8 - RX / 8))
+    KY_KX_chebyshev = np.maximum(abs(KY % 8 - KX % 8), abs(KY / 8 - KX / 8))
+
+    # Player X
+    RX_KY_df = abs(KY % 8 - RX % 8)
+    RX_KY_dr = abs(KY / 8 - RX / 8)
+    RX_KY_test = (np.maximum(RX_KY_df, RX_KY_dr)/(np.minimum(RX_KY_df, RX_KY_dr)+1).astype(np.float64))-1
+    KX_between = (between[RX << 6 | KY] >> KX.astype(np.uint64)) & one != 0
+    RX_KY_test = np.where(KX_between, -2*RX_KY_test, RX_KY_test)
+    KX_KY_man = abs(KX % 8 - KY % 8) + abs(KX / 8 - KY / 8)
+    x_values = 9.7*KY_cmd + 1.6*(14 - KX_KY_man) + RX_KY_test - (10*KY_moves_n/(KY_cmd+1).astype(np.float64))
+    x_flags = (np.where(y_to_move & (KY_RX_chebyshev == 1), X_ROOK_PENALTY, 0) |
+               np.where(y_to_move & (KY_KX_chebyshev == 2), X_KING_BONUS, 0)).astype(np.uint8)
+
+    # Player Y
+    RX_KY_diff = abs(abs(KY % 8 - RX % 8) - abs(KY / 8 - RX / 8))
+    y_values = -9.3*RX_KY_diff - 5.7*KY_cmd + (10*KY_moves_n/(KY_cmd+1).astype(np.float64))
+    y_flags = (np.where((x_attacks >> KY.astype(np.uint64)) & one != 0, Y_CHECK_PENALTY, 0) |
+               np.where(~y_to_move & (KY_RX_chebyshev == 1), Y_ROOK_BONUS, 0) |
+               np.where(~y_to_move & (KY_KX_chebyshev == 2), Y_KING_BONUS, 0)).astype(np.uint8)
+    return (x_values, x_flags, y_values, y_flags)
+
+def load():
+    """
+    Computes the heuristic tables if they have not been computed yet.
+        Arguments:
+            None
+        Returns:
+            None
+    """
+    global _x_values, _x_flags, _y_values, _y_flags
+    if _x_values is not None:
+        return
+    x_values, x_flags, y_values, y_flags = generate()
+    # Plain arrays give floats and ints that are faster to work with than NumPy scalars
+    _x_flags = array('B', x_flags.tostring())
+    _y_flags = array('B', y_flags.tostring())
+    _y_values = array('d', y_values.astype(np.float64).tostring())
+    _x_values = array('d', x_values.astype(np.float64).tostring())
+
+def evaluate_x(table_index, game_status, cycle, depth):
+    """
+    Returns the heuristic value of player x from the heuristic tables, which is the same as heuristic_x.
+        Arguments:
+            table_index -- the index of the position (see StatusTable.index).
+            game_status -- the game status of the position (see GameState.game_status).
+            cycle -- a Boolean value indicating whether the position ends a cycle of repeated states (see GameState.check_cycle).
+            depth -- the distance of the position from the current game state as given by the mini-max algorithm.
+    """
+    if _x_values is None:
+        load()
+    bonus = 0
+    penalty = 0
+    if cycle:
+        penalty += 1000
+    if game_status == 'checkmate':
+        bonus += 1000/float(depth+1)
+    elif game_status in ['stalemate', 'insufficient materials']:
+        penalty += 1000/float(depth+1)
+    flags = _x_flags[table_index]
+    if flags & X_ROOK_PENALTY:
+        penalty += 1000
+    if flags & X_KING_BONUS:
+        bonus += 20
+    return _x_values[table_index] + bonus - penalty
+
+def evaluate_y(table_index, game_status, depth):
+    """
+    Returns the heuristic value of player y from the heuristic tables, which is the same as heuristic_y.
+        Arguments:
+            table_index -- the index of the position (see StatusTable.index).
+            game_status -- the game status of the position (see GameState.game_status).
+            depth -- the distance of the position from the current game state as given by the mini-max algorithm.
+    """
+    if _y_values is None:
+        load()
+    bonus = 0
+    penalty = 0
+    if game_status == 'checkmate':
+        penalty += 1000/float(depth+1)
+    elif game_status in ['stalemate', 'insufficient materials']:
+        bonus += 1000/float(depth+1)
+    flags = _y_flags[table_index]
+    if flags & Y_CHECK_PENALTY:
+        penalty += 500
+    if flags & Y_ROOK_BONUS:
+        bonus += 250
+    if flags & Y_KING_BONUS:
+        bonus += 10
+    return _y_values[table_index] + penalty - bonus
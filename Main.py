@@ -2,6 +2,8 @@
 # -*- coding: utf-8 -*-
 
 # Imports
+import sys
+import BatchUtils
 import SetupUtils
 
 def main():
@@ -28,7 +30,12 @@ if __name__ == '__main__':
     """
     This is the script that is run upon executing the file. It goes through the setup functions,
     which subsequently call the play function to start the game.
+    Given any command line arguments (e.g. python Main.py 35 --workers 4 --quiet), it plays the test cases
+    without prompts instead (see BatchUtils.main).
     """
+    if len(sys.argv) > 1:
+        BatchUtils.main(sys.argv[1:])
+        sys.exit(0)
     
     # Print opening banner
     print '*******************************************'
@@ -0,0 +1,125 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+MemoryMonitor.py
+
+This module contains the functions that measure how much memory the program uses, for the per-move statistics
+(see SearchStats) and the memory ceiling of Player. When tracemalloc is available (Python 3, or the pytracemalloc
+backport) and tracing has been started with start, the memory allocated by Python objects is measured. Otherwise
+the resident set size of the process is measured instead, which costs nothing to keep track of: the current size
+and its peak are both read from /proc/self/status where there is one, otherwise both come from resource.getrusage.
+"""
+
+""" Imports """
+## Python Library Imports
+import resource
+import sys
+
+## tracemalloc is optional, since it is not part of Python 2
+try:
+    import tracemalloc
+except ImportError:
+    tracemalloc = None
+
+
+## Bytes per megabyte, the unit the memory ceiling is given in
+MB = 1024*1024
+## ru_maxrss is given in kilobytes on Linux but in bytes on macOS
+MAXRSS_UNIT = 1 if sys.platform == 'darwin' else 1024
+
+
+### Tracing Functions ###
+def start(frames=1):
+    """
+    Starts tracing the memory allocated by Python objects, if tracemalloc is available. Tracing slows the program
+    down, so it is only started when asked for.
+        Arguments:
+            frames -- the number of frames stored per allocation. Default is 1.
+        Returns:
+            a Boolean value indicating whether memory is being traced
+    """
+    if tracemalloc is None:
+        return False
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+    return True
+
+def stop():
+    """
+    Stops tracing the memory allocated by Python objects, if it was started.
+    """
+    if tracing():
+        tracemalloc.stop()
+
+def tracing():
+    """
+    Returns a Boolean value indicating whether the memory allocated by Python objects is being traced.
+    """
+    return tracemalloc is not None and tracemalloc.is_tracing()
+
+
+### Measuring Functions ###
+def usage():
+    """
+    Returns the current and the peak memory use in bytes: of the traced Python objects if tracing was started,
+    otherwise of the whole process (the resident set size). The peak is measured since the last reset_peak that
+    succeeded, and is never below the current memory use.
+        Arguments:
+            None
+        Returns:
+            (current, peak) in bytes
+    """
+    if tracing():
+        current, peak = tracemalloc.get_traced_memory()
+    else:
+        current, peak = _resident_sizes()
+    return (current, max(current, peak))
+
+def reset_peak():
+    """
+    Starts measuring the peak again from the current memory use, so that the peak of a single move can be measured.
+    While tracing, this needs a tracemalloc that has reset_peak (Python 3.9 or later). Otherwise the peak of the resident
+    set size is reset through /proc/self/clear_refs (Linux 4.0 or later). Where neither is possible, the peak keeps covering
+    the whole life of the process.
+        Arguments:
+            None
+        Returns:
+            a Boolean value indicating whether the peak was reset
+    """
+    if tracing():
+        if hasattr(tracemalloc, 'reset_peak'):
+            tracemalloc.reset_peak()
+            return True
+        return False
+    try:
+        clear_refs = open('/proc/self/clear_refs', 'w')
+        try:
+            # Writing 5 resets the peak resident set size to the current one
+            clear_refs.write('5')
+        finally:
+            clear_refs.close()
+    except (IOError, OSError):
+        return False
+    return True
+
+def _resident_sizes():
+    """
+    Returns the current and the peak resident set size of the process in bytes, both read from /proc/self/status (VmRSS and VmHWM).
+    Where that file does not exist, both are the peak from resource.getrusage, since the current size cannot be read.
+    """
+    try:
+        status = open('/proc/self/status')
+        try:
+            sizes = {}
+            for line in status:
+                name, _, value = line.partition(':')
+                if name in ('VmRSS', 'VmHWM'):
+                    # The sizes are given in kB
+                    sizes[name] = int(value.split()[0])*1024
+        finally:
+            status.close()
+        return (sizes['VmRSS'], sizes['VmHWM'])
+    except (IOError, OSError, IndexError, KeyError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss*MAXRSS_UNIT
+        return (peak, peak)
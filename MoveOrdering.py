@@ -0,0 +1,181 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+MoveOrdering.py
+
+This module contains the move ordering used by the alpha-beta search. Alpha-beta prunes the most when the
+best move of a node is searched first, so the legal moves of each node are sorted by how promising they
+look before their child states are created: the best move stored in the transposition table comes first,
+then rook moves that give check, then the killer moves of the node's depth (moves that caused a cutoff in a
+sibling node), then king moves that approach their target, and the rest by their history-heuristic score
+(how often and how deep the move has caused cutoffs so far).
+"""
+
+""" Imports """
+## Source code imports
+import Bitboards
+import GameUtils
+import Transposition
+
+
+### Constants ###
+## Ordering scores of the move categories; the history score of a move is capped below KING_APPROACH_SCORE
+TT_MOVE_SCORE = 1 << 22
+CHECK_SCORE = 1 << 20
+KILLER_SCORES = [1 << 19, 1 << 18]
+KING_APPROACH_SCORE = 1 << 17
+HISTORY_CAP = (1 << 17) - 1
+## Number of killer moves kept per depth
+KILLERS_PER_DEPTH = len(KILLER_SCORES)
+## Number of different move codes (3 pieces times 64 squares)
+MOVE_CODES = 3*64
+
+
+### Distance Functions ###
+def _chebyshev(square1, square2):
+    """
+    Returns the Chebyshev distance of two squares.
+    """
+    return max(abs(square1 % 8 - square2 % 8), abs(square1 / 8 - square2 / 8))
+
+
+class MoveOrderer(object):
+    """
+    Keeps the killer moves and history scores of a player's searches and uses them to sort the legal moves of a state.
+    It also counts how many cutoffs were caused by the first move searched, which is how well the ordering works.
+    """
+    def __init__(self, max_depth=64):
+        """
+        Initializer for the move orderer.
+            Arguments:
+                max_depth -- the number of depths to keep killer moves for. Default value is 64.
+        """
+        self.max_depth = max_depth
+        self.clear()
+
+    """ METHODS """
+    def clear(self):
+        """
+        Forgets all killer moves and history scores and resets the counters. Should be called at the start of each game.
+        """
+        self.killers = [[None] * KILLERS_PER_DEPTH for depth in range(self.max_depth)]
+        self.history = [0] * MOVE_CODES
+        self.reset_counters()
+
+    def reset_counters(self):
+        """
+        Resets the cutoff counters.
+        """
+        self.cutoffs = 0
+        self.first_move_cutoffs = 0
+
+    def new_search(self):
+        """
+        Prepares for the search of a new move: killer moves are forgotten since the depths now count from a new root,
+        and history scores are halved so that recent cutoffs weigh more than old ones.
+        """
+        self.killers = [[None] * KILLERS_PER_DEPTH for depth in range(self.max_depth)]
+        self.history = [score >> 1 for score in self.history]
+
+    def order(self, state, depth, tt_move=None):
+        """
+        Sorts the legal moves of a state, most promising first.
+            Arguments:
+                state -- the GameState whose legal moves are sorted.
+                depth -- the depth of the state from the root of the search.
+                tt_move -- the move code of the best move stored in the transposition table for the state, or None.
+            Returns:
+                a list of (move code, move) tuples
+        """
+        codes = [state.move_code(move) for move in state.legal_moves]
+        moves = dict(zip(codes, state.legal_moves))
+        KX_square, _, KY_square = state.squares
+        return [(code, moves[code]) for code in self.order_codes(codes, KX_square, KY_square, depth, tt_move)]
+
+    def order_codes(self, codes, KX_square, KY_square, depth, tt_move=None):
+        """
+        Sorts moves given as move codes, most promising first.
+            Arguments:
+                codes -- a list of the move codes of the legal moves.
+                KX_square -- the square of player X's king.
+                KY_square -- the square of player Y's king.
+                depth -- the depth of the position from the root of the search.
+                tt_move -- the move code of the best move stored in the transposition table for the position, or None.
+            Returns:
+                a list of move codes
+        """
+        KY_bb = 1 << KY_square
+        killers = self.killers[depth] if depth < self.max_depth else ()
+        scored = []
+        for code in codes:
+            piece_index, square = code >> 6, code & 63
+            if code == tt_move:
+                score = TT_MOVE_SCORE
+            elif piece_index == Transposition.RX_INDEX and Bitboards.rook_attacks(square, KX_square) & KY_bb:
+                score = CHECK_SCORE
+            elif code in killers:
+                score = KILLER_SCORES[killers.index(code)]
+            else:
+                score = min(self.history[code], HISTORY_CAP)
+                # Player X's king approaches player Y's king, while player Y's king heads for the center
+                if piece_index == Transposition.KX_INDEX:
+                    if _chebyshev(square, KY_square) < _chebyshev(KX_square, KY_square):
+                        score += KING_APPROACH_SCORE
+                elif piece_index == Transposition.KY_INDEX:
+                    if GameUtils.CMD_BY_SQUARE[square] < GameUtils.CMD_BY_SQUARE[KY_square]:
+                        score += KING_APPROACH_SCORE
+            scored.append((score, code))
+        scored.sort(key=lambda tup: tup[0], reverse=True)
+        return [code for _, code in scored]
+
+    def record_cutoff(self, code, depth, draft, index):
+        """
+        Records a move that caused a beta cutoff (or an alpha cutoff at a MIN node).
+            Arguments:
+                code -- the move code of the move.
+                depth -- the depth from the root of the node where the cutoff happened.
+                draft -- the number of plies searched below that node.
+                index -- the position of the move in the order it was searched in (0 for the first move).
+            Returns:
+                None
+        """
+        self.cutoffs += 1
+        if index == 0:
+            self.first_move_cutoffs += 1
+        # Deeper cutoffs save more work, so they count for more
+        self.history[code] += draft*draft
+        if depth < self.max_depth:
+            killers = self.killers[depth]
+            if killers[0] != code:
+                killers.pop()
+                killers.insert(0, code)
+
+    def first_move_cutoff_rate(self):
+        """
+        Returns the fraction of cutoffs that were caused by the first move searched, or 0.0 if there were no cutoffs yet.
+        """
+        if not self.cutoffs:
+            return 0.0
+        return self.first_move_cutoffs / float(self.cutoffs)
+
+    def stats(self):
+        """
+        Returns a dictionary of the cutoff counters.
+        """
+        return {'cutoffs': self.cutoffs, 'first_move_cutoffs': self.first_move_cutoffs,
+                'first_move_cutoff_rate': self.first_move_cutoff_rate()}
+
+    def counters(self):
+        """
+        Returns the cutoff counters, for sending them between processes (see merge).
+        """
+        return (self.cutoffs, self.first_move_cutoffs)
+
+    def merge(self, counters):
+        """
+        Adds the cutoff counters of a move orderer elsewhere (see counters), e.g. in a worker process of the parallel search.
+        """
+        cutoffs, first_move_cutoffs = counters
+        self.cutoffs += cutoffs
+        self.first_move_cutoffs += first_move_cutoffs
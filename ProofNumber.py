@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+ProofNumber.py
+
+This module contains the proof-number search player X uses to find forced checkmates. The heuristic search only sees
+as far as its depth, while a forced checkmate is often further away than that. The proof-number search proves (or
+disproves) that X can force a checkmate within a number of moves. It keeps the tree it has searched in memory and
+always expands its most-proving node next. The proof number of a node is the fewest nodes that would still have to be
+proven to prove it, and its disproof number the fewest that would have to be disproven to disprove it. So the search
+goes deep along the lines where Y has few replies, instead of searching every line to the same depth. The positions are
+played on a SearchBoard (see SearchBoard.py) on the way down to the node that is expanded and taken back on the way up.
+"""
+
+""" Imports """
+## Python Library Imports
+from numpy import inf
+
+
+## Outcomes of a proof-number search
+PROVEN, DISPROVEN, UNKNOWN = 'proven', 'disproven', 'unknown'
+## Default number of nodes a search may create
+DEFAULT_NODE_BUDGET = 20000
+
+
+class ProofNode(object):
+    """
+    A node of the tree of a proof-number search: the position reached by a move, with its proof and disproof numbers.
+    """
+    # Attributes are kept in slots instead of a __dict__ since a search creates many nodes
+    __slots__ = ('code', 'proof', 'disproof', 'children', 'distance')
+
+    def __init__(self, code, proof, disproof, distance=None):
+        """
+        Initializer for a node.
+            Arguments:
+                code -- the move code of the move that reaches the node (see Transposition.move_code), or None for the root.
+                proof -- the proof number: 0 if the node is proven, inf if it is disproven.
+                disproof -- the disproof number: 0 if the node is disproven, inf if it is proven.
+                distance -- the number of plies to checkmate if the node is proven, otherwise None. Default is None.
+        """
+        self.code = code
+        self.proof = proof
+        self.disproof = disproof
+        # The children are created when the node is expanded
+        self.children = None
+        self.distance = distance
+
+    def __repr__(self):
+        """
+        String representation for objects of class ProofNode, used for debugging.
+        """
+        return 'ProofNode(code=%r, proof=%r, disproof=%r, distance=%r)' % (self.code, self.proof, self.disproof, self.distance)
+
+    """ METHODS """
+    def child(self, code):
+        """
+        Returns the child reached by the given move, or None if the node has not been expanded or has no such child.
+        """
+        for child in self.children or ():
+            if child.code == code:
+                return child
+        return None
+
+    def mating_child(self):
+        """
+        Returns the proven child with the fewest plies to checkmate, which is player X's move in a proven node where X is to move.
+        """
+        proven = [child for child in self.children or () if child.proof == 0]
+        return min(proven, key=lambda child: child.distance) if proven else None
+
+    def mating_line(self):
+        """
+        Returns the move codes of a line to checkmate from a proven node where X is to move: X's fastest checkmate, against
+        Y's reply that delays it the most.
+        """
+        line = []
+        node, x_to_move = self, True
+        while node.children:
+            if x_to_move:
+                node = node.mating_child()
+            else:
+                node = max(node.children, key=lambda child: child.distance)
+            line.append(node.code)
+            x_to_move = not x_to_move
+        return line
+
+    """ PROPERTIES """
+    @property
+    def outcome(self):
+        """
+        Returns PROVEN, DISPROVEN or UNKNOWN.
+        """
+        if self.proof == 0:
+            return PROVEN
+        if self.disproof == 0:
+            return DISPROVEN
+        return UNKNOWN
+
+
+class ProofNumberSearch(object):
+    """
+    A proof-number search for a forced checkmate by player X from the position on a SearchBoard where X is to move.
+    """
+    def __init__(self, board, max_moves, node_budget=DEFAULT_NODE_BUDGET):
+        """
+        Initializer for the search.
+            Arguments:
+                board -- the SearchBoard of the root position, with player X to move. It is left unchanged by the search.
+                max_moves -- the number of moves of player X within which the checkmate must happen.
+                node_budget -- the number of nodes the search may create. Default is DEFAULT_NODE_BUDGET.
+        """
+        assert board.level % 2 == 0, 'The proof-number search looks for a checkmate by player X, who must be to move.'
+        assert max_moves > 0
+        self.board = board
+        # A checkmate by X happens on an odd ply, so X's last move is at ply 2*max_moves - 2
+        self.max_depth = 2*max_moves - 1
+        self.node_budget = node_budget
+        self.nodes = 0
+        self.root = self._new_node(None, 0)
+
+    """ METHODS """
+    def search(self):
+        """
+        Expands the most-proving node until the root is proven or disproven, or the node budget runs out.
+            Arguments:
+                None
+            Returns:
+                PROVEN, DISPROVEN or UNKNOWN (if the node budget ran out first)
+        """
+        root, board = self.root, self.board
+        while root.proof and root.disproof and self.nodes < self.node_budget:
+            # Walk down to the most-proving node: the child with the smallest proof number where X is to move,
+            # and the one with the smallest disproof number where Y is to move
+            path = [root]
+            node = root
+            while node.children is not None:
+                if len(path) % 2:
+                    node = min(node.children, key=lambda child: child.proof)
+                else:
+                    node = min(node.children, key=lambda child: child.disproof)
+                board.make_move(node.code)
+                path.append(node)
+            try:
+                self._expand(node, len(path) - 1)
+            finally:
+                for _ in range(len(path) - 1):
+                    board.unmake_move()
+            # Update the proof and disproof numbers of the ancestors
+            for depth in range(len(path) - 1, -1, -1):
+                self._update(path[depth], depth)
+        return root.outcome
+
+    ## Private Methods
+    def _new_node(self, code, depth):
+        """
+        Creates the node of the position on the board, reached by the given move at the given depth.
+        Checkmates are proven, while the other ends of the game and the positions at the depth limit are disproven.
+        The others start out with the number of moves of the side to move as the disproof number (X to move) or proof number (Y to move).
+        """
+        self.nodes += 1
+        board = self.board
+        if board.game_status == 'checkmate':
+            return ProofNode(code, 0, inf, 0)
+        if board.is_leaf or depth >= self.max_depth:
+            return ProofNode(code, inf, 0)
+        moves = len(board.legal_codes())
+        if depth % 2 == 0:
+            return ProofNode(code, 1, moves)
+        return ProofNode(code, moves, 1)
+
+    def _expand(self, node, depth):
+        """
+        Creates the children of a node, whose position is on the board.
+        """
+        board = self.board
+        children = []
+        for code in board.legal_codes():
+            board.make_move(code)
+            try:
+                children.append(self._new_node(code, depth + 1))
+            finally:
+                board.unmake_move()
+        node.children = children
+
+    def _update(self, node, depth):
+        """
+        Sets the proof and disproof numbers (and the distance to checkmate once proven) of an expanded node from those of its children.
+        """
+        children = node.children
+        if depth % 2 == 0:
+            # X to move: proven by any child, disproven by all of them
+            node.proof = min(child.proof for child in children)
+            node.disproof = sum(child.disproof for child in children)
+            if node.proof == 0:
+                node.distance = node.mating_child().distance + 1
+        else:
+            # Y to move: proven by all children, disproven by any of them
+            node.proof = sum(child.proof for child in children)
+            node.disproof = min(child.disproof for child in children)
+            if node.proof == 0:
+                node.distance = max(child.distance for child in children) + 1
@@ -0,0 +1,236 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SearchBoard.py
+
+This module contains the mutable board used by the make/unmake search. Searching with GameState creates a
+new object for every node, each with its own list of legal moves, game status and reference to its parent.
+A SearchBoard instead holds the squares of the three pieces and changes them in place: make_move plays a move
+(given as a move code, see Transposition.move_code) and unmake_move takes it back, so the search walks the
+whole game tree on one board. It offers the attributes the search and the heuristics read from a GameState
+(squares, table_index, level, zobrist, game_status, is_leaf and check_cycle) and looks the game status
+and legal moves up in the same status table (see StatusTable.py).
+"""
+
+""" Imports """
+## Source code imports
+import StatusTable
+import Transposition
+
+
+### Placement Keys ###
+def placement_key(KX_square, RX_square, KY_square):
+    """
+    Returns an int that identifies the placement of the three pieces, which is what GameState instances are compared by.
+        Arguments:
+            KX_square -- the square (0-63) of player X's king.
+            RX_square -- the square (0-63) of player X's rook.
+            KY_square -- the square (0-63) of player Y's king.
+        Returns:
+            an int between 0 and 2**18 - 1
+    """
+    return KX_square << 12 | RX_square << 6 | KY_square
+
+
+### Repetition Detection ###
+## Cycle lengths whose repetitions are tracked, and the longest max_length check_cycle can be asked for with them
+CYCLE_LENGTHS = (2, 4, 6)
+MAX_CYCLE_LENGTH = 8
+
+def history_entry(history, key):
+    """
+    Returns the repetition entry of a position, which is a tuple of its placement key and, for each of CYCLE_LENGTHS,
+    the number of positions in a row (ending with this one) that equal the position that many plies earlier.
+    A run of at least l such positions means that the last 2*l positions are the same cycle of length l played twice.
+        Arguments:
+            history -- the entries of the positions before this one, oldest first (at least the last 6).
+            key -- the placement key of the position.
+        Returns:
+            a (key, run_2, run_4, run_6) tuple
+    """
+    n = len(history)
+    if not n:
+        return (key, 0, 0, 0)
+    last = history[-1]
+    return (key,
+            last[1] + 1 if n >= 2 and history[-2][0] == key else 0,
+            last[2] + 1 if n >= 4 and history[-4][0] == key else 0,
+            last[3] + 1 if n >= 6 and history[-6][0] == key else 0)
+
+def has_cycle(history, level, min_length, max_length):
+    """
+    Checks the repetition entries of a line of positions for a cycle, the same way GameState.check_cycle always has:
+    the last max_length*2 ancestors of the position (or all of them if there are fewer) are taken, oldest first, and
+    for each even length l from min_length to below max_length, the first l of them are compared to the next l.
+    Each comparison is answered by one run counter instead of comparing the positions.
+        Arguments:
+            history -- the repetition entries (see history_entry) of the line, oldest first and ending with the position itself.
+                        It must contain at least the last max_length*2 ancestors, or all of them.
+            level -- the level of the position.
+            min_length -- the minimum length of a cycle to check.
+            max_length -- the maximum length of a cycle to check, at most MAX_CYCLE_LENGTH.
+        Returns:
+            a boolean value indicating whether a cycle has been detected
+    """
+    if level < 4:
+        return False
+    # The ancestors compared are history[start:-1]
+    start = max(0, len(history) - 1 - max_length*2)
+    ancestors = len(history) - 1 - start
+    if ancestors < min_length*2:
+        return False
+    for l in range(min_length, max_length, 2):
+        if 2*l > ancestors:
+            break
+        # The first l ancestors equal the next l if the l positions ending with ancestor 2*l-1 all repeat the position l plies earlier
+        if history[start + 2*l - 1][l/2] >= l:
+            return True
+    return False
+
+def may_cycle(history, level, plies, min_length, max_length):
+    """
+    Checks whether has_cycle could detect a cycle at any position up to the given number of plies below the end of a line,
+    whatever moves are played below it. The runs of the positions below the line are not known, but a run grows by at most
+    one per ply, so each is bounded by the run of the last position of the line plus the number of plies played since.
+    If this returns False, the cycle checks below the line do not depend on the line at all.
+        Arguments:
+            history -- the repetition entries (see history_entry) of the line, oldest first and ending with its last position.
+            level -- the level of the last position of the line.
+            plies -- the number of plies below the last position that are checked.
+            min_length -- the minimum length of a cycle to check.
+            max_length -- the maximum length of a cycle to check, at most MAX_CYCLE_LENGTH.
+        Returns:
+            a boolean value indicating whether a cycle may be detected
+    """
+    n = len(history)
+    last = history[-1]
+    for k in range(max(1, 4 - level), plies + 1):
+        # The same window as has_cycle, for a line of n + k positions
+        start = max(0, n + k - 1 - max_length*2)
+        ancestors = n + k - 1 - start
+        for l in range(min_length, max_length, 2):
+            if 2*l > ancestors:
+                break
+            index = start + 2*l - 1
+            run = history[index][l/2] if index < n else last[l/2] + index - n + 1
+            if run >= l:
+                return True
+    return False
+
+
+class SearchBoard(object):
+    """
+    A board that is changed in place by making and unmaking moves, used by the search instead of creating a GameState per node.
+    """
+    def __init__(self, state):
+        """
+        Initializer for the search board.
+            Arguments:
+                state -- the GameState the board starts from. Its ancestors are remembered for detecting cycles.
+        """
+        self.KX, self.RX, self.KY = state.squares
+        self.level = state.level
+        self.max_level = state.max_level
+        self.zobrist = state.zobrist
+        # Repetition entries of the game line and the search path up to the current position, oldest first
+        self.history = list(state.history)
+        # Stack of (piece index, old square, zobrist key, game status, is_leaf) tuples for unmaking moves
+        self._undo = []
+        self._set_status()
+
+    def __str__(self):
+        """
+        String format for objects of class SearchBoard.
+        """
+        return 'Level = %r. KX: %r, RX: %r, KY: %r' % (self.level, self.KX, self.RX, self.KY)
+
+    """ METHODS """
+    def legal_codes(self):
+        """
+        Returns the move codes of the legal moves of the side to move, in the same order as GameState.legal_moves.
+            Arguments:
+                None
+            Returns:
+                a list of move codes
+        """
+        return StatusTable.legal_codes(self.table_index)
+
+    def make_move(self, code):
+        """
+        Plays a move on the board.
+            Arguments:
+                code -- the move code of a legal move.
+            Returns:
+                None
+        """
+        piece_index, square = code >> 6, code & 63
+        if piece_index == Transposition.KX_INDEX:
+            old_square, self.KX = self.KX, square
+        elif piece_index == Transposition.RX_INDEX:
+            old_square, self.RX = self.RX, square
+        else:
+            old_square, self.KY = self.KY, square
+        self._undo.append((piece_index, old_square, self.zobrist, self.game_status, self.is_leaf))
+        keys = Transposition.PIECE_KEYS[piece_index]
+        self.zobrist ^= keys[old_square] ^ keys[square] ^ Transposition.SIDE_KEY
+        self.level += 1
+        self.history.append(history_entry(self.history, placement_key(self.KX, self.RX, self.KY)))
+        self._set_status()
+
+    def unmake_move(self):
+        """
+        Takes back the last move made with make_move.
+            Arguments:
+                None
+            Returns:
+                None
+        """
+        piece_index, old_square, self.zobrist, self.game_status, self.is_leaf = self._undo.pop()
+        if piece_index == Transposition.KX_INDEX:
+            self.KX = old_square
+        elif piece_index == Transposition.RX_INDEX:
+            self.RX = old_square
+        else:
+            self.KY = old_square
+        self.level -= 1
+        self.history.pop()
+
+    def check_cycle(self, min_length=2, max_length=6):
+        """
+        Checks to see if the current position is in a cycle, i.e. if the positions have been repeating.
+        Same as GameState.check_cycle, but answered from the repetition entries of the line (see has_cycle) in constant time.
+            Arguments:
+                min_length -- the minimum length of a cycle to check.
+                max_length -- the maximum length of a cycle to check, at most MAX_CYCLE_LENGTH. Both should be even since
+                                there are 2 players, so cycles will have an even length.
+            Returns:
+                a boolean value indicating whether a cycle has been detected
+        """
+        # Must be even
+        assert min_length % 2 == 0 and max_length % 2 == 0 and max_length > min_length
+        assert max_length <= MAX_CYCLE_LENGTH, 'Only cycles shorter than %i plies are tracked.' % MAX_CYCLE_LENGTH
+        return has_cycle(self.history, self.level, min_length, max_length)
+
+    ## Private Methods
+    def _set_status(self):
+        """
+        Sets the game_status and is_leaf attributes for the current position, like the GameState constructor does.
+        """
+        self.game_status = StatusTable.game_status(self.table_index, self.level, self.max_level)
+        self.is_leaf = not (self.game_status in ['continue', 'check'] and self.max_level > self.level)
+
+    """ PROPERTIES """
+    @property
+    def squares(self):
+        """
+        Returns a tuple of the squares (0-63) of KX, RX and KY.
+        """
+        return (self.KX, self.RX, self.KY)
+
+    @property
+    def table_index(self):
+        """
+        Returns the index of the current position in the status table (see StatusTable.index).
+        """
+        return (self.level % 2) << 18 | self.history[-1][0]
@@ -0,0 +1,161 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+SearchStats.py
+
+This module contains the statistics of the search for one move: how many nodes were visited and how many of them
+were expanded, evaluated as leaves or stopped early because of a cycle, where the cutoffs happened, how the
+transposition table did, how long each depth of the search took and how much memory was in use (see MemoryMonitor).
+Player.search returns them alongside the chosen move, and a player can append them to a file as one JSON object per move.
+"""
+
+""" Imports """
+## Python Library Imports
+import json
+
+
+class SearchStats(object):
+    """
+    The counters of the search for one move.
+    """
+    def __init__(self):
+        """
+        Initializer for the statistics, with all counters at zero.
+        """
+        # How the move was found: 'search', 'tablebase', 'mate search' or 'stopped'
+        self.source = 'search'
+        # Level of the state searched from
+        self.level = None
+        # Nodes visited, counted by Player._count_node
+        self.nodes = 0
+        # Nodes evaluated with the heuristic, and those among them that were evaluated because of a cycle
+        self.leaves = 0
+        self.cycle_stops = 0
+        # Nodes created by the proof-number search for a forced checkmate (see ProofNumber.py)
+        self.mate_nodes = 0
+        # Beta (or alpha) cutoffs, in total and indexed by the depth they happened at
+        self.cutoffs = 0
+        self.cutoffs_by_depth = []
+        # Cutoff counters of the player's move orderer during this search (see MoveOrdering.MoveOrderer.stats), or None without one
+        self.move_ordering = None
+        # Transposition table counters during this search
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.tt_cutoffs = 0
+        # Nodes settled by transposition table entries stored during the searches of earlier moves (only values that do not depend
+        # on the line that leads to a position are stored, see Player._path_dependent), and states of the tree search that were kept
+        # from the searches of earlier moves instead of created again (see Player.prune_tree)
+        self.reused = 0
+        self.reused_states = 0
+        # Whether the move was searched while the opponent was entering its move (see Player.start_pondering)
+        self.pondered = False
+        # Value of the move chosen by the search (None if it came from the tablebase or the proof-number search)
+        self.score = None
+        # Depth of the deepest completed iteration and the seconds each iteration took
+        self.depth = 0
+        self.depth_times = []
+        self.time = 0.0
+        # Memory in use after the move and the peak (in bytes, see MemoryMonitor.usage), and whether the player's memory
+        # ceiling was reached so that it released its cached states
+        self.memory = 0
+        self.peak_memory = 0
+        self.released = False
+
+    def __str__(self):
+        """
+        String format for objects of class SearchStats, used for logging one line per move.
+        """
+        first_move = '' if self.move_ordering is None else ' (%.0f%% by the first move)' % (100*self.move_ordering['first_move_cutoff_rate'])
+        return ('%s at level %s: depth %i, %i nodes (%i expanded, %i leaves, %i cycle stops), %i cutoffs%s, '
+                'branching factor %.2f, TT hits %i/%i (%i reused), %.3f s, %.1f MB' % (self.source, self.level, self.depth, self.nodes, self.expanded, self.leaves,
+                                                                                    self.cycle_stops, self.cutoffs, first_move, self.branching_factor(), self.tt_hits,
+                                                                                    self.tt_probes, self.reused, self.time, self.memory/1048576.0))
+
+    """ METHODS """
+    def record_cutoff(self, depth):
+        """
+        Counts a cutoff at the given depth from the root.
+        """
+        self.cutoffs += 1
+        by_depth = self.cutoffs_by_depth
+        while len(by_depth) <= depth:
+            by_depth.append(0)
+        by_depth[depth] += 1
+
+    def merge(self, counters):
+        """
+        Adds the counters of a search done elsewhere (see counters), e.g. in a worker process of the parallel search.
+            Arguments:
+                counters -- a tuple as returned by counters.
+            Returns:
+                None
+        """
+        leaves, cycle_stops, reused, cutoffs_by_depth = counters
+        self.leaves += leaves
+        self.cycle_stops += cycle_stops
+        self.reused += reused
+        for depth, cutoffs in enumerate(cutoffs_by_depth):
+            if cutoffs:
+                self.cutoffs += cutoffs
+                while len(self.cutoffs_by_depth) <= depth:
+                    self.cutoffs_by_depth.append(0)
+                self.cutoffs_by_depth[depth] += cutoffs
+
+    def counters(self):
+        """
+        Returns the counters the search adds to (the nodes are counted by the player), for sending them between processes.
+        """
+        return (self.leaves, self.cycle_stops, self.reused, self.cutoffs_by_depth)
+
+    def branching_factor(self):
+        """
+        Returns the effective branching factor b of the search: the one with which a uniform tree of the completed depth
+        d would have as many nodes, i.e. nodes = b + b**2 + ... + b**d. Returns 0.0 if nothing was searched.
+        """
+        if not self.nodes or not self.depth:
+            return 0.0
+        nodes, depth = float(self.nodes), self.depth
+        low, high = 0.0, max(1.0, nodes)
+        # Bisection, since the sum grows with b
+        for _ in range(100):
+            b = (low + high)/2
+            if sum(b**d for d in range(1, depth + 1)) < nodes:
+                low = b
+            else:
+                high = b
+        return (low + high)/2
+
+    def stats(self):
+        """
+        Returns a dictionary of the statistics.
+        """
+        return {'source': self.source, 'level': self.level, 'nodes': self.nodes, 'expanded': self.expanded, 'leaves': self.leaves,
+                'cycle_stops': self.cycle_stops, 'mate_nodes': self.mate_nodes, 'cutoffs': self.cutoffs, 'cutoffs_by_depth': self.cutoffs_by_depth,
+                'move_ordering': self.move_ordering, 'branching_factor': self.branching_factor(), 'tt_probes': self.tt_probes, 'tt_hits': self.tt_hits,
+                'tt_cutoffs': self.tt_cutoffs, 'reused': self.reused, 'reused_states': self.reused_states, 'score': self.score, 'pondered': self.pondered, 'depth': self.depth, 'depth_times': self.depth_times, 'time': self.time,
+                'memory': self.memory, 'peak_memory': self.peak_memory, 'released': self.released}
+
+    def write(self, stats_file):
+        """
+        Appends the statistics as one JSON object on a line of its own.
+            Arguments:
+                stats_file -- the path of the file, or a file-like object.
+            Returns:
+                None
+        """
+        line = json.dumps(self.stats(), sort_keys=True) + '\n'
+        if hasattr(stats_file, 'write'):
+            stats_file.write(line)
+        else:
+            log_file = open(stats_file, 'a')
+            log_file.write(line)
+            log_file.close()
+
+    """ PROPERTIES """
+    @property
+    def expanded(self):
+        """
+        Returns the number of nodes whose children were searched: the nodes that were neither leaves nor settled by the transposition table.
+        """
+        return max(0, self.nodes - self.leaves - self.tt_cutoffs)
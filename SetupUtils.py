@@ -11,11 +11,15 @@ This module contains global functions used in the setup/menu portion of the prog
 from re import split
 import numpy as np
 import GameClasses
+import GameRecord
 import GameUtils
+import MemoryMonitor
 import Pieces
 import Board
-#from pympler.tracker import SummaryTracker
-#tracker = SummaryTracker()
+
+
+## The file the test cases are read from
+TEST_CASE_FILE = 'testCase.txt'
 
 
 """ Setup Functions """
@@ -58,35 +62,81 @@ def test_mode_setup(n):
             None
     """
     # Read the test case file and break up new lines as separate strings
-    test_case_file = open('testCase.txt')
-    test_cases = []
-   
-    test_cases = []
-    for line in test_case_file:
-        if line != '\n' and line[0] != '#':
-            test_cases.append(line.strip())
-    test_case_file.close()
+    test_cases = read_test_cases()
     print test_cases
 
     # Initialize players
-    player_x = GameClasses.Player('W')
-    player_y = GameClasses.Player('B')
-    #tracker.print_diff()
+    player_x, player_y = player_setup()
     # Parse and run each test case
    
-    for case in test_cases:
-	
-        if parse_test_case(case, player_x, player_y) is not None:
-            test_case_name, KX, RX, KY = parse_test_case(case, player_x, player_y)
-        else:
-            print 'There was an error parsing the following test case: %s. Skipping to the next case.' % case
-            continue
-        root_state = GameClasses.GameState(KX, RX, KY, n*2)
-        if root_state.game_status != 'continue':
-            print 'Test case "%s" root state is not a legitimate starting state (status: %s). Skipping to the next case if there is one.' % (test_case_name, root_state.game_status)
-            continue
-        GameUtils.play(root_state, test_mode=True, case_name=test_case_name)
-        #tracker.print_diff()
+    # The games share one open result file
+    record = GameRecord.GameRecord(GameClasses.RESULT_FILE)
+    try:
+        for case in test_cases:
+            test_case = test_case_root(case, n, player_x, player_y)
+            if test_case is None:
+                continue
+            test_case_name, root_state = test_case
+            GameUtils.play(root_state, test_mode=True, case_name=test_case_name, record=record)
+            current, peak = MemoryMonitor.usage()[0], GameRecord.game_peak_memory(root_state)
+            print 'Memory in use after %s: %.1f MB (peak %.1f MB)' % (test_case_name, current/float(MemoryMonitor.MB), peak/float(MemoryMonitor.MB))
+    finally:
+        record.close()
+
+def player_setup():
+    """
+    A function to set up the players. The user may enter the moves of player Y instead of the program, and in that case chooses whether
+    player X ponders, i.e. searches its replies to the likely moves of player Y while the user enters them (see Player.start_pondering).
+        Arguments:
+            None
+        Returns:
+            player_x -- an instance of Player representing player x
+            player_y -- an instance of Player representing player y
+    """
+    yes_no_condition = lambda response: response.upper() in ['Y','YES','N','NO']
+    input_str = query_until('Would you like to enter the moves of player Y yourself? (Y/N) [default: N]', yes_no_condition, default='N')
+    if input_str.upper() in ['N', 'NO']:
+        return (GameClasses.Player('W'), GameClasses.Player('B'))
+    ponder_str = query_until('Shall player X think about its replies while you enter your moves? (Y/N) [default: Y]', yes_no_condition, default='Y')
+    return (GameClasses.Player('W', ponder=ponder_str.upper() in ['Y', 'YES']), GameClasses.Player('B', input_mode=True))
+
+def test_case_root(case, n, player_x, player_y):
+    """
+    Creates the root state of a test case, printing why the test case is skipped if it cannot be played.
+        Arguments:
+            case -- a line from the test case file.
+            n -- the maximum number of moves.
+            player_x -- an instance of Player representing player x
+            player_y -- an instance of Player representing player y
+        Returns:
+            a (test_case_name, root_state) tuple, or None if the test case is invalid
+    """
+    if parse_test_case(case, player_x, player_y) is not None:
+        test_case_name, KX, RX, KY = parse_test_case(case, player_x, player_y)
+    else:
+        print 'There was an error parsing the following test case: %s. Skipping to the next case.' % case
+        return None
+    root_state = GameClasses.GameState(KX, RX, KY, n*2)
+    if root_state.game_status != 'continue':
+        print 'Test case "%s" root state is not a legitimate starting state (status: %s). Skipping to the next case if there is one.' % (test_case_name, root_state.game_status)
+        return None
+    return (test_case_name, root_state)
+
+def read_test_cases(path=TEST_CASE_FILE):
+    """
+    Reads the test cases from the test case file, skipping empty lines and lines commented out with a hash symbol.
+        Arguments:
+            path -- the path of the test case file. Default is TEST_CASE_FILE.
+        Returns:
+            a list of strings, one per test case
+    """
+    test_case_file = open(path)
+    test_cases = []
+    for line in test_case_file:
+        if line.strip() and line[0] != '#':
+            test_cases.append(line.strip())
+    test_case_file.close()
+    return test_cases
         
 
 """ Parsing Functions """
@@ -156,15 +206,15 @@ def parse_test_case(tc, player_x, player_y):
         f, r = check_coordinates(s[4],s[6])
         if s[0].upper() == 'W':
             if s[2].upper() == 'R':
-                RX = Pieces.Rook(player_x, Pieces.Position(f, r))
+                RX = player_x.rooks[GameUtils.square_index(Pieces.Position(f, r))]
             elif s[2].upper() == 'K':
-                KX = Pieces.King(player_x, Pieces.Position(f, r))
+                KX = player_x.kings[GameUtils.square_index(Pieces.Position(f, r))]
             else:
                 print 'Player X can only be assigned a king or rook. Error came from the following test case: %s' % strs
                 return None
         elif s[0].upper() == 'B':
             if s[2].upper() == 'K':
-                KY = Pieces.King(player_y, Pieces.Position(f, r))
+                KY = player_y.kings[GameUtils.square_index(Pieces.Position(f, r))]
             else:
                 print 'Player Y can only be assigned a king. Error came from the following test case: %s' % strs
                 return None
@@ -0,0 +1,211 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+StatusTable.py
+
+This module contains the precomputed game status and legal moves of every placement of the three pieces
+with either side to move (2*64*64*64 positions), so that GameState and SearchBoard look them up instead of
+working them out for every state. The table is computed once with NumPy, vectorised over all positions,
+and cached in krkStatus.npz.
+
+For each position the table keeps a status code (one byte) and the legal moves packed into one int:
+bits 0-7 are the squares the king of the side to move can step to (one bit per neighbouring square, in
+increasing order of square), and when player X is to move, bits 8-21 are the squares the rook can move to
+(one bit per square of the rook's rank and file, in increasing order of square). The moves are unpacked into
+lists of move codes (see Transposition.move_code) through small lookup tables, in the same order as
+GameState.legal_moves.
+"""
+
+""" Imports """
+## Python Library Imports
+from array import array
+import os
+import numpy as np
+
+## Source code imports
+import Bitboards
+import Transposition
+
+
+### Constants ###
+## Status codes stored in the table, indexing STATUSES
+CONTINUE, CHECK, CHECKMATE, STALEMATE, INSUFFICIENT_MATERIALS, ILLEGAL, NO_MOVES_LEFT = range(7)
+STATUSES = ['continue', 'check', 'checkmate', 'stalemate', 'insufficient materials', 'illegal', 'no moves left']
+## 'maximum turns reached' depends on the level instead of the placement, so it replaces 'continue' when looking a position up
+MAXIMUM_TURNS_REACHED = 'maximum turns reached'
+## Number of positions in the table
+TABLE_SIZE = 2*64*64*64
+## File the table is cached in so that it only gets computed once
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'krkStatus.npz')
+
+## Squares a king can step to and squares on a rook's rank and file, in increasing order, indexed by square
+KING_TARGETS = [Bitboards.squares(mask) for mask in Bitboards.KING_MASKS]
+ROOK_TARGETS = [Bitboards.squares(Bitboards.rook_attacks(square, square)) for square in range(64)]
+## Number of bits of the packed king and rook moves
+KING_BITS = 8
+ROOK_BITS = 14
+ROOK_HALF_BITS = ROOK_BITS/2
+
+## The status codes (array of bytes) and packed moves (array of unsigned ints), loaded on first use
+_status = None
+_moves = None
+## Move codes of packed moves, indexed by square then by the bits of the king's moves or of one half of the rook's moves
+_KX_CODES = None
+_KY_CODES = None
+_RX_LOW_CODES = None
+_RX_HIGH_CODES = None
+
+
+### Indexing Functions ###
+def index(KX_square, RX_square, KY_square, side):
+    """
+    Returns the index of a position in the table (the same as Tablebase.index).
+        Arguments:
+            KX_square -- the square (0-63) of player X's king.
+            RX_square -- the square (0-63) of player X's rook.
+            KY_square -- the square (0-63) of player Y's king.
+            side -- 0 if player X is to move, 1 if player Y is to move.
+        Returns:
+            an int between 0 and TABLE_SIZE-1
+    """
+    return (((side << 6 | KX_square) << 6 | RX_square) << 6) | KY_square
+
+
+### Generation Functions ###
+def generate():
+    """
+    Computes the status code and packed legal moves of every position, following the rules of GameState.
+        Arguments:
+            None
+        Returns:
+            status -- a NumPy array of TABLE_SIZE status codes (uint8).
+            moves -- a NumPy array of TABLE_SIZE packed moves (uint32).
+    """
+    positions = np.arange(TABLE_SIZE, dtype=np.int64)
+    y_to_move = (positions >> 18) == 1
+    KX = (positions >> 12) & 63
+    RX = (positions >> 6) & 63
+    KY = positions & 63
+    one = np.uint64(1)
+    king_masks = np.array(Bitboards.KING_MASKS, dtype=np.uint64)
+    rook_attacks = np.array(Bitboards.ROOK_ATTACKS, dtype=np.uint64)
+
+    KX_attacks = king_masks[KX]
+    KY_attacks = king_masks[KY]
+    RX_attacks = rook_attacks[RX << 6 | KX]
+    x_attacks = KX_attacks | RX_attacks
+    # KX cannot move next to KY or onto RX, RX cannot move next to KY and KY cannot move to a position attacked by player X
+    KX_moves = KX_attacks & ~(KY_attacks | (one << RX.astype(np.uint64)))
+    RX_moves = RX_attacks & ~KY_attacks
+    KY_moves = KY_attacks & ~x_attacks
+    has_moves = np.where(y_to_move, KY_moves != 0, (KX_moves | RX_moves) != 0)
+    in_check = (x_attacks >> KY.astype(np.uint64)) & one != 0
+    takes_rook = (KY_attacks >> RX.astype(np.uint64)) & one != 0
+    kings_touch = (KY_attacks >> KX.astype(np.uint64)) & one != 0
+
+    # The first condition that holds decides the status, in the same order as GameState._get_game_status checked them
+    conditions = [(KX == RX) | (KX == KY) | (RX == KY),
+                  ~has_moves & y_to_move & in_check,
+                  ~has_moves & y_to_move,
+                  ~has_moves,
+                  y_to_move & takes_rook,
+                  y_to_move & kings_touch,
+                  y_to_move & in_check,
+                  ~y_to_move & in_check]
+    codes = [ILLEGAL, CHECKMATE, STALEMATE, NO_MOVES_LEFT, INSUFFICIENT_MATERIALS, ILLEGAL, CHECK, ILLEGAL]
+    status = np.select(conditions, codes, CONTINUE).astype(np.uint8)
+
+    # Pack the squares of the moves into bits, in increasing order of square
+    king = np.where(y_to_move, KY, KX)
+    king_moves = np.where(y_to_move, KY_moves, KX_moves)
+    RX_moves = np.where(y_to_move, np.uint64(0), RX_moves)
+    king_targets = np.array([targets + [0]*(KING_BITS - len(targets)) for targets in KING_TARGETS], dtype=np.uint64)
+    king_counts = np.array([len(targets) for targets in KING_TARGETS])
+    rook_targets = np.array(ROOK_TARGETS, dtype=np.uint64)
+    moves = np.zeros(TABLE_SIZE, dtype=np.uint32)
+    for bit in range(KING_BITS):
+        target_bits = ((king_moves >> king_targets[king, bit]) & one).astype(np.uint32)
+        moves |= np.where(king_counts[king] > bit, target_bits, 0).astype(np.uint32) << bit
+    for bit in range(ROOK_BITS):
+        moves |= ((RX_moves >> rook_targets[RX, bit]) & one).astype(np.uint32) << (KING_BITS + bit)
+    return (status, moves)
+
+def _code_table(targets, piece_index, bits):
+    """
+    Returns the table of move codes of a piece's packed moves, indexed by square then by the packed bits.
+    """
+    return [[[Transposition.move_code(piece_index, square) for bit, square in enumerate(targets[origin]) if packed >> bit & 1]
+             for packed in range(1 << bits)] for origin in range(64)]
+
+def load(path=TABLE_FILE):
+    """
+    Loads the table from the cache file, computing (and caching) it first if the file does not exist yet.
+        Arguments:
+            path -- the path of the cache file. Default is krkStatus.npz next to this module.
+        Returns:
+            None
+    """
+    global _status, _moves, _KX_CODES, _KY_CODES, _RX_LOW_CODES, _RX_HIGH_CODES
+    if _status is not None:
+        return
+    status = moves = None
+    if os.path.isfile(path):
+        try:
+            cached = np.load(path)
+            status, moves = cached['status'], cached['moves']
+            cached.close()
+        except (IOError, KeyError, ValueError):
+            status = moves = None
+    if status is None or status.shape != (TABLE_SIZE,) or moves.shape != (TABLE_SIZE,):
+        status, moves = generate()
+        # Caching is only an optimisation, so a read-only directory should not stop the game
+        try:
+            with open(path, 'wb') as table_file:
+                np.savez(table_file, status=status, moves=moves)
+        except IOError:
+            pass
+    # Plain arrays give ints that are faster to work with than NumPy scalars
+    _KX_CODES = _code_table(KING_TARGETS, Transposition.KX_INDEX, KING_BITS)
+    _KY_CODES = _code_table(KING_TARGETS, Transposition.KY_INDEX, KING_BITS)
+    _RX_LOW_CODES = _code_table([targets[:ROOK_HALF_BITS] for targets in ROOK_TARGETS], Transposition.RX_INDEX, ROOK_HALF_BITS)
+    _RX_HIGH_CODES = _code_table([targets[ROOK_HALF_BITS:] for targets in ROOK_TARGETS], Transposition.RX_INDEX, ROOK_HALF_BITS)
+    _moves = array('I', moves.astype(np.uint32).tostring())
+    _status = array('B', status.astype(np.uint8).tostring())
+
+
+### Lookup Functions ###
+def game_status(table_index, level, max_level):
+    """
+    Returns the game status of a position (see GameState.game_status).
+        Arguments:
+            table_index -- the index of the position, as returned by index.
+            level -- the level of the position.
+            max_level -- the maximum level of the game.
+        Returns:
+            the game status
+    """
+    if _status is None:
+        load()
+    status = _status[table_index]
+    if status == CONTINUE and level >= max_level:
+        return MAXIMUM_TURNS_REACHED
+    return STATUSES[status]
+
+def legal_codes(table_index):
+    """
+    Returns the move codes of the legal moves of the side to move in a position, in the same order as GameState.legal_moves
+    (the king's moves, then the rook's moves, each in increasing order of square).
+        Arguments:
+            table_index -- the index of the position, as returned by index.
+        Returns:
+            a new list of move codes
+    """
+    if _status is None:
+        load()
+    packed = _moves[table_index]
+    if table_index >> 18:
+        return _KY_CODES[table_index & 63][packed & 255][:]
+    RX_square = table_index >> 6 & 63
+    return (_KX_CODES[table_index >> 12 & 63][packed & 255] + _RX_LOW_CODES[RX_square][packed >> 8 & 127] +
+            _RX_HIGH_CODES[RX_square][packed >> 15])
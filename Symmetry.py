@@ -0,0 +1,100 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Symmetry.py
+
+This module contains the board symmetries used to share table entries between equivalent positions.
+Without pawns, the rules and both heuristics are unchanged by the 8 symmetries of the board (rotations by
+90 degrees and reflections), so every KRK position has up to 8 equivalents with the same value. Each position
+is mapped to a canonical form, the equivalent whose (KX, RX, KY) squares are the smallest, which puts player
+X's king in the triangle a1-d1-d4. Moves found in the canonical form are mapped back with the inverse transform.
+"""
+
+
+### Transforms ###
+def _transform_square(square, transform):
+    """
+    Applies a transform to a square. Bit 0 of the transform mirrors the files, bit 1 mirrors the ranks and
+    bit 2 swaps files and ranks (reflects the board in the a1-h8 diagonal); together they make up all 8 symmetries.
+    """
+    f, r = square % 8, square / 8
+    if transform & 1:
+        f = 7 - f
+    if transform & 2:
+        r = 7 - r
+    if transform & 4:
+        f, r = r, f
+    return r*8 + f
+
+## Number of symmetries of the board
+N_TRANSFORMS = 8
+## Transformed squares indexed by transform, then by square
+TRANSFORMS = [[_transform_square(square, transform) for square in range(64)] for transform in range(N_TRANSFORMS)]
+## The inverse of each transform
+INVERSES = [[u for u in range(N_TRANSFORMS) if all(TRANSFORMS[u][TRANSFORMS[t][square]] == square for square in range(64))][0]
+            for t in range(N_TRANSFORMS)]
+## Transforms that map each square to its smallest image, which are the only candidates for the canonical form
+## (player X's king decides the transform, unless it stands on a diagonal where two transforms tie)
+MIN_TRANSFORMS = [[t for t in range(N_TRANSFORMS) if TRANSFORMS[t][square] == min(table[square] for table in TRANSFORMS)]
+                  for square in range(64)]
+## Squares a canonical player X's king can stand on (the triangle a1-d1-d4) and their index in that list
+TRIANGLE = [square for square in range(64) if square / 8 <= square % 8 <= 3]
+TRIANGLE_INDEX = dict((square, i) for i, square in enumerate(TRIANGLE))
+
+
+### Canonicalisation Functions ###
+def canonicalise(KX_square, RX_square, KY_square, side):
+    """
+    Maps a position to its canonical form.
+        Arguments:
+            KX_square -- the square (0-63) of player X's king.
+            RX_square -- the square (0-63) of player X's rook.
+            KY_square -- the square (0-63) of player Y's king.
+            side -- the side to move, which no symmetry changes.
+        Returns:
+            position -- a (KX_square, RX_square, KY_square, side) tuple of the canonical form.
+            transform -- the transform that maps the position to its canonical form.
+    """
+    best = None
+    for transform in MIN_TRANSFORMS[KX_square]:
+        table = TRANSFORMS[transform]
+        candidate = (table[KX_square], table[RX_square], table[KY_square])
+        if best is None or candidate < best:
+            best = candidate
+            best_transform = transform
+    return (best + (side,), best_transform)
+
+def transform_square(square, transform):
+    """
+    Returns the square a transform maps a square to.
+    """
+    return TRANSFORMS[transform][square]
+
+def inverse_square(square, transform):
+    """
+    Returns the square that a transform maps to the given square.
+    """
+    return TRANSFORMS[INVERSES[transform]][square]
+
+def transform_move(code, transform):
+    """
+    Maps a move code (see Transposition.move_code) into the transformed board.
+        Arguments:
+            code -- the move code.
+            transform -- the transform, as returned by canonicalise.
+        Returns:
+            the move code of the same move on the transformed board.
+    """
+    return (code & ~63) | TRANSFORMS[transform][code & 63]
+
+def inverse_move(code, transform):
+    """
+    Maps a move code from the transformed board back to the original board.
+        Arguments:
+            code -- the move code on the transformed board.
+            transform -- the transform, as returned by canonicalise.
+        Returns:
+            the move code of the same move on the original board.
+    """
+    return (code & ~63) | TRANSFORMS[INVERSES[transform]][code & 63]
@@ -0,0 +1,251 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Tablebase.py
+
+This module contains the KRK endgame tablebase. Every placement of the three pieces is solved once,
+for both sides to move, by retrograde analysis starting from the checkmate positions. The number of
+plies left until checkmate (assuming perfect play from both players) is stored for every position
+that player X can win, so that a player can pick a perfect move from a table lookup instead of
+searching the game tree.
+
+Only the canonical form of each position (see Symmetry.py) is kept once the table is solved, which
+leaves player X's king on one of 10 squares instead of 64.
+
+The moves follow the same rules as GameState: the rook's lines are only blocked by its own king,
+neither piece of player X may move next to player Y's king, and player Y's king taking the rook
+(a rook standing next to it on Y's turn) ends the game as a draw.
+"""
+
+""" Imports """
+## Python Library Imports
+from array import array
+import os
+
+## Source code imports
+import Bitboards
+import GameUtils
+import Symmetry
+
+
+### Constants ###
+## Side to move, which matches the parity of GameState.level
+X_TO_MOVE = 0
+Y_TO_MOVE = 1
+## Table value for positions that cannot be won by player X (draws and illegal placements)
+DRAW = 255
+## Number of entries in the full table (side, KX, RX, KY) and in the stored table of canonical positions
+TABLE_SIZE = 2*64*64*64
+CANONICAL_SIZE = 2*len(Symmetry.TRIANGLE)*64*64
+## File the solved table is cached in so that it only gets generated once
+TABLE_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'krkTablebase.bin')
+
+## The solved table of canonical positions, loaded on first use
+_table = None
+
+
+### Indexing Functions ###
+def index(KX_square, RX_square, KY_square, side):
+    """
+    Returns the index of a position in the table.
+        Arguments:
+            KX_square -- the square (0-63) of player X's king, as returned by GameUtils.square_index.
+            RX_square -- the square (0-63) of player X's rook.
+            KY_square -- the square (0-63) of player Y's king.
+            side -- X_TO_MOVE or Y_TO_MOVE.
+        Returns:
+            an int between 0 and TABLE_SIZE-1
+    """
+    return (((side << 6 | KX_square) << 6 | RX_square) << 6) | KY_square
+
+def canonical_index(KX_square, RX_square, KY_square, side):
+    """
+    Returns the index of a canonical position (see Symmetry.canonicalise) in the stored table.
+        Arguments:
+            KX_square -- the square of player X's king, which must be one of Symmetry.TRIANGLE.
+            RX_square -- the square (0-63) of player X's rook.
+            KY_square -- the square (0-63) of player Y's king.
+            side -- X_TO_MOVE or Y_TO_MOVE.
+        Returns:
+            an int between 0 and CANONICAL_SIZE-1
+    """
+    return ((side*len(Symmetry.TRIANGLE) + Symmetry.TRIANGLE_INDEX[KX_square]) << 12) | RX_square << 6 | KY_square
+
+
+### Move Geometry ###
+## Squares a king can step to, indexed by square
+KING_SQUARES = [Bitboards.squares(mask) for mask in Bitboards.KING_MASKS]
+KING_MASKS = Bitboards.KING_MASKS
+## Squares attacked by a rook, indexed by rook*64 + king
+ROOK_SQUARES = [Bitboards.squares(mask) for mask in Bitboards.ROOK_ATTACKS]
+ROOK_MASKS = Bitboards.ROOK_ATTACKS
+
+
+### Generation Functions ###
+def generate():
+    """
+    Solves every KRK position by retrograde analysis.
+    All checkmates are found first, then the table is filled backwards one ply at a time: a position where player X
+    is to move is won in n+1 plies if one of its moves reaches a position lost in n plies, and a position where
+    player Y is to move is lost in n+1 plies once every one of its moves reaches a position won by player X.
+        Arguments:
+            None
+        Returns:
+            table -- an array of TABLE_SIZE unsigned bytes holding the plies to checkmate of every position, or DRAW.
+    """
+    table = array('B', [DRAW]) * TABLE_SIZE
+    # Number of moves not yet known to lose for every position with player Y to move
+    counts = array('B', [0]) * TABLE_SIZE
+    frontier = []
+
+    ## Find the checkmates and count player Y's moves in every other playable position
+    for KX in range(64):
+        KX_mask = KING_MASKS[KX]
+        for RX in range(64):
+            if RX == KX:
+                continue
+            rook_mask = ROOK_MASKS[RX*64 + KX]
+            attacked = KX_mask | rook_mask
+            for KY in range(64):
+                # Skip overlapping pieces and kings standing next to each other
+                if KY == KX or KY == RX or KX_mask >> KY & 1:
+                    continue
+                n = 0
+                for square in KING_SQUARES[KY]:
+                    if not attacked >> square & 1:
+                        n += 1
+                i = index(KX, RX, KY, Y_TO_MOVE)
+                if n == 0:
+                    # A checkmate if the king is in check, otherwise a stalemate (which remains a draw)
+                    if rook_mask >> KY & 1:
+                        table[i] = 0
+                        frontier.append((KX, RX, KY))
+                # The rook can be taken when it stands next to the king, which is a draw
+                elif not KING_MASKS[KY] >> RX & 1:
+                    counts[i] = n
+
+    ## Walk backwards from the checkmates
+    plies = 0
+    while frontier:
+        # Positions with player X to move that reach a lost position for player Y
+        x_frontier = []
+        for KX, RX, KY in frontier:
+            for KX_from, RX_from in _x_unmoves(KX, RX, KY):
+                i = index(KX_from, RX_from, KY, X_TO_MOVE)
+                if table[i] == DRAW:
+                    table[i] = plies + 1
+                    x_frontier.append((KX_from, RX_from, KY))
+        # Positions with player Y to move where this was the last move that did not lose
+        frontier = []
+        for KX, RX, KY in x_frontier:
+            for KY_from in KING_SQUARES[KY]:
+                if KY_from == KX or KY_from == RX:
+                    continue
+                i = index(KX, RX, KY_from, Y_TO_MOVE)
+                if counts[i]:
+                    counts[i] -= 1
+                    if not counts[i]:
+                        table[i] = plies + 2
+                        frontier.append((KX, RX, KY_from))
+        plies += 2
+    return table
+
+def _x_unmoves(KX, RX, KY):
+    """
+    Generates the placements of player X's pieces that can reach the given position with one legal move of player X.
+    Only placements that are legal with player X to move are generated, i.e. where player Y's king is not in check.
+        Arguments:
+            KX -- the square of player X's king after the move.
+            RX -- the square of player X's rook after the move.
+            KY -- the square of player Y's king.
+        Returns:
+            a generator of (KX, RX) tuples before the move
+    """
+    KY_mask = KING_MASKS[KY]
+    # King moves: the king can come from any neighbouring square that is not next to KY
+    for square in KING_SQUARES[KX]:
+        if square != RX and square != KY and not KY_mask >> square & 1 and not ROOK_MASKS[RX*64 + square] >> KY & 1:
+            yield (square, RX)
+    # Rook moves: the rook moves along its lines, so it can come from any square it attacks,
+    # but it is never allowed to move next to KY
+    if KY_mask >> RX & 1:
+        return
+    for square in ROOK_SQUARES[RX*64 + KX]:
+        if square != KY and not ROOK_MASKS[square*64 + KX] >> KY & 1:
+            yield (KX, square)
+
+
+def compress(table):
+    """
+    Keeps only the entries of a full table whose player X's king stands in the canonical triangle.
+        Arguments:
+            table -- a full table as returned by generate.
+        Returns:
+            an array of CANONICAL_SIZE unsigned bytes, indexed by canonical_index.
+    """
+    compact = array('B')
+    for side in (X_TO_MOVE, Y_TO_MOVE):
+        for KX in Symmetry.TRIANGLE:
+            start = index(KX, 0, 0, side)
+            compact.extend(table[start:start + 64*64])
+    return compact
+
+
+### Probing Functions ###
+def load(path=TABLE_FILE):
+    """
+    Loads the table from the cache file, generating (and caching) it first if the file does not exist yet.
+        Arguments:
+            path -- the path of the cache file. Default is krkTablebase.bin next to this module.
+        Returns:
+            the solved table of canonical positions
+    """
+    global _table
+    if _table is not None:
+        return _table
+    table = array('B')
+    if os.path.isfile(path) and os.path.getsize(path) == CANONICAL_SIZE:
+        with open(path, 'rb') as table_file:
+            table.fromfile(table_file, CANONICAL_SIZE)
+    else:
+        table = compress(generate())
+        # Caching is only an optimisation, so a read-only directory should not stop the game
+        try:
+            with open(path, 'wb') as table_file:
+                table.tofile(table_file)
+        except IOError:
+            pass
+    _table = table
+    return _table
+
+def probe(KX_square, RX_square, KY_square, side):
+    """
+    Looks up a position in the table.
+        Arguments:
+            KX_square -- the square (0-63) of player X's king.
+            RX_square -- the square (0-63) of player X's rook.
+            KY_square -- the square (0-63) of player Y's king.
+            side -- X_TO_MOVE or Y_TO_MOVE.
+        Returns:
+            the number of plies until player X checkmates, or None if player X cannot force a checkmate.
+    """
+    position, _ = Symmetry.canonicalise(KX_square, RX_square, KY_square, side)
+    value = load()[canonical_index(*position)]
+    if value == DRAW:
+        return None
+    return value
+
+def probe_pieces(KX, RX, KY, side):
+    """
+    Looks up a position given by its pieces in the table.
+        Arguments:
+            KX -- player X's king.
+            RX -- player X's rook.
+            KY -- player Y's king.
+            side -- X_TO_MOVE or Y_TO_MOVE.
+        Returns:
+            the number of plies until player X checkmates, or None if player X cannot force a checkmate.
+    """
+    square = GameUtils.square_index
+    return probe(square(KX.position), square(RX.position), square(KY.position), side)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Transposition.py
+
+This module contains the Zobrist keys used to hash game states and the transposition table used by the
+alpha-beta search to remember the results of positions it has already searched. A Zobrist key is the XOR
+of one random 64-bit number per (piece, square) and one for the side to move, so the key of a child state
+can be updated from its parent's key with three XORs.
+"""
+
+""" Imports """
+## Python Library Imports
+from collections import namedtuple
+from random import Random
+
+
+### Constants ###
+## Piece indices used for the Zobrist keys and the move codes
+KX_INDEX = 0
+RX_INDEX = 1
+KY_INDEX = 2
+## Bound types of the stored scores
+EXACT = 0
+LOWER = 1
+UPPER = 2
+## Default number of entries of a transposition table
+DEFAULT_SIZE = 2**16
+
+## Zobrist keys, generated from a fixed seed so that keys are the same in every run
+_random = Random(481)
+PIECE_KEYS = [[_random.getrandbits(64) for square in range(64)] for piece in range(3)]
+SIDE_KEY = _random.getrandbits(64)
+## Keys for the distance from the root of the search, since the heuristic values depend on it
+DEPTH_KEYS = [_random.getrandbits(64) for depth in range(64)]
+del _random
+
+
+### Key Functions ###
+def zobrist_key(KX_square, RX_square, KY_square, side):
+    """
+    Computes the Zobrist key of a position from scratch.
+        Arguments:
+            KX_square -- the square (0-63) of player X's king.
+            RX_square -- the square (0-63) of player X's rook.
+            KY_square -- the square (0-63) of player Y's king.
+            side -- 0 if player X is to move, 1 if player Y is to move.
+        Returns:
+            a 64-bit int
+    """
+    key = PIECE_KEYS[KX_INDEX][KX_square] ^ PIECE_KEYS[RX_INDEX][RX_square] ^ PIECE_KEYS[KY_INDEX][KY_square]
+    if side:
+        key ^= SIDE_KEY
+    return key
+
+def move_code(piece_index, square):
+    """
+    Packs a move into a small int so that it can be stored in tables.
+        Arguments:
+            piece_index -- KX_INDEX, RX_INDEX or KY_INDEX.
+            square -- the square (0-63) the piece moves to.
+        Returns:
+            an int between 0 and 191
+    """
+    return piece_index << 6 | square
+
+
+### Transposition Table ###
+## An entry of the table. draft is the number of plies that were searched below the position.
+TTEntry = namedtuple('TTEntry', ['key', 'draft', 'flag', 'score', 'best_move', 'generation'])
+
+class TranspositionTable(object):
+    """
+    A fixed-size hash table of search results indexed by Zobrist key. Each slot holds a single entry.
+    When two positions compete for a slot, the entry with the deeper draft is kept, unless the stored
+    entry comes from an earlier search (move) of the game, in which case it is always replaced.
+    """
+    def __init__(self, size=DEFAULT_SIZE):
+        """
+        Initializer for the transposition table.
+            Arguments:
+                size -- the number of entries of the table. Default value is DEFAULT_SIZE.
+        """
+        assert type(size) is int and size > 0, 'The size of the transposition table must be a positive int.'
+        self.size = size
+        self.clear()
+
+    def __len__(self):
+        """
+        Returns the number of occupied entries.
+        """
+        return self.size - self.entries.count(None)
+
+    """ METHODS """
+    def clear(self):
+        """
+        Removes all entries and resets the counters. Should be called at the start of each game.
+        """
+        self.entries = [None] * self.size
+        self.generation = 0
+        self.reset_counters()
+
+    def reset_counters(self):
+        """
+        Resets the hit-rate counters without touching the entries.
+        """
+        self.probes = 0
+        self.hits = 0
+        self.cutoffs = 0
+        self.stores = 0
+        self.overwrites = 0
+
+    def new_search(self):
+        """
+        Marks the start of a new search, so that entries of earlier searches become the first to be replaced.
+        """
+        self.generation += 1
+
+    def probe(self, key):
+        """
+        Looks up the entry of a position.
+            Arguments:
+                key -- the key of the position.
+            Returns:
+                the stored TTEntry, or None if the position is not in the table.
+        """
+        self.probes += 1
+        entry = self.entries[key % self.size]
+        if entry is not None and entry.key == key:
+            self.hits += 1
+            return entry
+        return None
+
+    def store(self, key, draft, flag, score, best_move):
+        """
+        Stores the result of searching a position, following the replacement policy of the table.
+            Arguments:
+                key -- the key of the position.
+                draft -- the number of plies searched below the position.
+                flag -- EXACT, LOWER or UPPER, depending on whether score is the exact value or a bound of it.
+                score -- the value returned by the search.
+                best_move -- the move code of the best move found, or None.
+            Returns:
+                None
+        """
+        slot = key % self.size
+        entry = self.entries[slot]
+        if entry is not None:
+            if entry.key != key and entry.generation == self.generation and entry.draft > draft:
+                return
+            if entry.key != key:
+                self.overwrites += 1
+            # Keep the best move of a previous search of the same position if this one did not find any
+            if best_move is None and entry.key == key:
+                best_move = entry.best_move
+        self.stores += 1
+        self.entries[slot] = TTEntry(key, draft, flag, score, best_move, self.generation)
+
+    def hit_rate(self):
+        """
+        Returns the fraction of probes that found their position, or 0.0 if nothing has been probed yet.
+        """
+        if not self.probes:
+            return 0.0
+        return self.hits / float(self.probes)
+
+    def stats(self):
+        """
+        Returns a dictionary of the counters of the table, for tuning its size.
+        """
+        return {'size': self.size, 'used': len(self), 'probes': self.probes, 'hits': self.hits,
+                'hit_rate': self.hit_rate(), 'cutoffs': self.cutoffs, 'stores': self.stores, 'overwrites': self.overwrites}
@@ -0,0 +1,3 @@
+"""
+The tests of the KRK endgame program. Run them from the top directory with python -m unittest discover -s tests -t .
+"""
@@ -0,0 +1,187 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+helpers.py
+
+This module contains the functions the tests share: creating the states of a game from the squares of the pieces,
+generating the squares the pieces attack and the legal moves naively, one square at a time, from the rules of the game,
+and playing game lines on which the searches of differently configured players are compared.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+
+## Source code imports
+import GameClasses
+import GameUtils
+import Pieces
+
+
+## Indices of the pieces in the (KX, RX, KY) tuples of squares, and in the (piece, square) tuples of the moves
+KX_INDEX, RX_INDEX, KY_INDEX = range(3)
+
+
+### State Functions ###
+def new_state(squares, player_x, player_y, max_moves=30, level=0):
+    """
+    Creates the root state of a game.
+        Arguments:
+            squares -- a (KX, RX, KY) tuple of squares (0-63, see GameUtils.square_index).
+            player_x -- the Player of player X.
+            player_y -- the Player of player Y.
+            max_moves -- the maximum number of moves. Default is 30.
+            level -- the level of the state, whose parity is the side to move. Default is 0 (player X to move).
+        Returns:
+            an instance of GameClasses.GameState
+    """
+    KX, RX, KY = squares
+    return GameClasses.GameState(player_x.kings[KX], player_x.rooks[RX], player_y.kings[KY], max_moves*2, level=level)
+
+def random_state(rnd, player_x, player_y, max_moves=30):
+    """
+    Creates the root state of a game from a random placement of the pieces that starts a game (game status 'continue').
+        Arguments:
+            rnd -- an instance of random.Random.
+            player_x -- the Player of player X.
+            player_y -- the Player of player Y.
+            max_moves -- the maximum number of moves. Default is 30.
+        Returns:
+            an instance of GameClasses.GameState
+    """
+    while True:
+        state = new_state(rnd.sample(range(64), 3), player_x, player_y, max_moves)
+        if state.game_status == 'continue':
+            return state
+
+def squares(state):
+    """
+    Returns the (KX, RX, KY) tuple of the squares of the pieces of a state.
+    """
+    return tuple(GameUtils.square_index(piece.position) for piece in (state.KX, state.RX, state.KY))
+
+def moves(state):
+    """
+    Returns the legal moves of a state as (piece index, square) tuples, in the order of state.legal_moves.
+    """
+    return [(KY_INDEX if move.owner is state.player_y else RX_INDEX if isinstance(move, Pieces.Rook) else KX_INDEX,
+             GameUtils.square_index(move.position)) for move in state.legal_moves]
+
+def players(**options):
+    """
+    Returns a (player_x, player_y) tuple of players created with the given keyword arguments (see GameClasses.Player).
+    """
+    return (GameClasses.Player('W', **options), GameClasses.Player('B', **options))
+
+
+### Naive Move Generation ###
+def king_squares(square):
+    """
+    Returns the squares next to a square, in increasing order.
+    """
+    f, r = square % 8, square / 8
+    return sorted((r + dr)*8 + f + df for df in (-1, 0, 1) for dr in (-1, 0, 1) if (df or dr) and 0 <= f + df < 8 and 0 <= r + dr < 8)
+
+def rook_squares(rook, king):
+    """
+    Returns the squares a rook attacks, walking its rank and file until the edge of the board or its own king, in increasing order.
+    """
+    squares = []
+    for df, dr in ((1, 0), (-1, 0), (0, 1), (0, -1)):
+        f, r = rook % 8 + df, rook / 8 + dr
+        while 0 <= f < 8 and 0 <= r < 8 and r*8 + f != king:
+            squares.append(r*8 + f)
+            f, r = f + df, r + dr
+    return sorted(squares)
+
+def naive_status(KX, RX, KY, side):
+    """
+    Returns the game status of a position below the maximum level and its legal moves as (piece index, square) tuples,
+    following the rules of GameState: player X's king moves first, then its rook, each to its squares in increasing order.
+        Arguments:
+            KX -- the square of player X's king.
+            RX -- the square of player X's rook.
+            KY -- the square of player Y's king.
+            side -- 0 if player X is to move, 1 if player Y is.
+        Returns:
+            a (game status, legal moves) tuple
+    """
+    KX_squares, RX_squares, KY_squares = king_squares(KX), rook_squares(RX, KX), king_squares(KY)
+    x_attacked = set(KX_squares) | set(RX_squares)
+    if side:
+        moves = [(KY_INDEX, square) for square in KY_squares if square not in x_attacked]
+    else:
+        moves = ([(KX_INDEX, square) for square in KX_squares if square not in KY_squares and square != RX] +
+                 [(RX_INDEX, square) for square in RX_squares if square not in KY_squares])
+    in_check = KY in x_attacked
+    if KX == RX or KX == KY or RX == KY:
+        return ('illegal', moves)
+    if not moves:
+        if not side:
+            return ('no moves left', moves)
+        return ('checkmate' if in_check else 'stalemate', moves)
+    if side:
+        if RX in KY_squares:
+            return ('insufficient materials', moves)
+        if KX in KY_squares:
+            return ('illegal', moves)
+        if in_check:
+            return ('check', moves)
+    elif in_check:
+        return ('illegal', moves)
+    return ('continue', moves)
+
+
+### Search Functions ###
+def root_values(player, state, ply):
+    """
+    Searches the children of a state ply plies deep like Player._search does, without picking a move.
+        Arguments:
+            player -- the Player to move.
+            state -- the state to search from.
+            ply -- the depth of the search.
+        Returns:
+            a list of (move code, value) tuples, sorted by move code
+    """
+    if player.move_orderer is not None:
+        player.move_orderer.new_search()
+    player.nodes = 0
+    return sorted((child.last_move, value) for value, child in player._search_root(state, ply))
+
+def best_moves(values):
+    """
+    Returns the best value of a list of (move code, value) tuples and the move codes that reach it, which is what the random
+    tie-break of Player._search picks from.
+    """
+    best = max(value for _, value in values)
+    return (best, [code for code, value in values if close(value, best)])
+
+def close(value, other):
+    """
+    Returns a Boolean value indicating whether two search values are equal up to rounding.
+    """
+    return abs(value - other) <= 1e-6*max(1.0, abs(other))
+
+def game_line(seed, ply, reference, others, max_moves=30, moves=None):
+    """
+    Plays a game line chosen by the searches of a reference pair of players, and yields the root values of every position
+    on it for the reference players and for each other pair of players. All the players keep what they remember from
+    move to move, like in a game. The line follows the best moves of the reference players, ties broken by the seed.
+        Arguments:
+            seed -- the seed of the starting position and the tie-breaks.
+            ply -- the depth of the searches.
+            reference -- the (player_x, player_y) pair that chooses the line.
+            others -- a list of (player_x, player_y) pairs that search the same positions.
+            max_moves -- the maximum number of moves. Default is 30.
+            moves -- the number of plies to play, or None to play until the game is over. Default is None.
+        Yields:
+            (state, reference values, [values of each other pair]) tuples (see root_values)
+    """
+    rnd = random.Random(seed)
+    state = random_state(rnd, reference[0], reference[1], max_moves)
+    while not state.is_leaf and (moves is None or state.level < moves):
+        side = state.level % 2
+        values = root_values(reference[side], state, ply)
+        yield (state, values, [root_values(pair[side], state, ply) for pair in others])
+        state = state.child_from_code(rnd.choice(best_moves(values)[1]))
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_anytime_search.py
+
+Tests of the anytime search (Player.anytime_search and CancellationToken): a search stopped at any time must still return
+the best move of the deepest iteration it completed.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+from threading import Timer
+from time import time
+import unittest
+
+## Source code imports
+import GameClasses
+from tests import helpers
+
+
+class CancellationTokenTest(unittest.TestCase):
+    def test_tokens_are_cancelled_by_cancel_or_their_deadline(self):
+        token = GameClasses.CancellationToken()
+        self.assertFalse(token.cancelled)
+        token.cancel()
+        self.assertTrue(token.cancelled)
+        self.assertFalse(GameClasses.CancellationToken(time() + 60).cancelled)
+        self.assertTrue(GameClasses.CancellationToken(time() - 1).cancelled)
+
+
+### Reference Searches ###
+def fresh_values(state, ply):
+    """
+    Returns the root values of a fresh search of the position of a state (player X to move), ply plies deep, made on a copy
+    of the state since a search cleans up the state it moves from.
+    """
+    player_x, player_y = helpers.players(use_tablebase=False)
+    return helpers.root_values(player_x, helpers.new_state(state.squares, player_x, player_y), ply)
+
+
+class AnytimeSearchTest(unittest.TestCase):
+    def check_best_move(self, result, state, ply):
+        """
+        Checks that the move and the value of a search result are the best ones of a fresh search ply plies deep.
+        """
+        best, codes = helpers.best_moves(fresh_values(state, ply))
+        self.assertEqual(result.depth, ply)
+        self.assertTrue(helpers.close(result.score, best))
+        self.assertIn(result.child.last_move, codes)
+
+    def test_a_cancelled_token_still_completes_the_first_iteration(self):
+        player_x, player_y = helpers.players(use_tablebase=False, ply=6)
+        state = helpers.random_state(random.Random(1), player_x, player_y)
+        token = GameClasses.CancellationToken()
+        token.cancel()
+        self.check_best_move(player_x.anytime_search(state, token), state, 1)
+
+    def test_without_budgets_the_search_goes_ply_plies_deep(self):
+        rnd = random.Random(2)
+        player_x, player_y = helpers.players(use_tablebase=False, ply=3)
+        state = helpers.random_state(rnd, player_x, player_y)
+        self.check_best_move(player_x.anytime_search(state, GameClasses.CancellationToken()), state, 3)
+        # Without a token, the search is the one of Player.search
+        state = helpers.random_state(rnd, player_x, player_y)
+        self.check_best_move(player_x.anytime_search(state), state, 3)
+
+    def test_cancelling_from_another_thread_returns_a_completed_iteration(self):
+        player_x, player_y = helpers.players(use_tablebase=False, ply=20)
+        state = helpers.random_state(random.Random(3), player_x, player_y)
+        token = GameClasses.CancellationToken()
+        timer = Timer(0.3, token.cancel)
+        start = time()
+        timer.start()
+        try:
+            result = player_x.anytime_search(state, token)
+        finally:
+            timer.cancel()
+        self.assertTrue(time() - start < 10)
+        self.assertTrue(1 <= result.depth < 20)
+        self.assertEqual(player_x.stats.depth, result.depth)
+        self.assertIn(result.child.last_move, [code for code, _ in fresh_values(state, 1)])
+
+    def test_the_deadline_of_a_token_stops_the_search(self):
+        player_x, player_y = helpers.players(use_tablebase=False, ply=20)
+        state = helpers.random_state(random.Random(4), player_x, player_y)
+        start = time()
+        result = player_x.anytime_search(state, GameClasses.CancellationToken(time() + 0.3))
+        self.assertTrue(time() - start < 10)
+        self.assertTrue(1 <= result.depth < 20)
+        self.assertEqual(len(player_x.stats.depth_times), result.depth)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_batch_utils.py
+
+Tests of the batch mode (BatchUtils.run_batch), of its headless command line (BatchUtils.main) and of the games it plays in its
+worker processes.
+"""
+
+""" Imports """
+## Python Library Imports
+from cStringIO import StringIO
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+## Source code imports
+import BatchUtils
+import GameRecord
+import SetupUtils
+
+
+## Test cases of the test case file
+TEST_CASE = 'testX3: W.K(6,2) W.R(1,8) B.K(4,5)'
+OTHER_TEST_CASE = 'testX1: W.K(1,2) W.R(8,6) B.K(4,4)'
+
+
+class BatchUtilsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.test_cases = os.path.join(self.directory, 'testCase.txt')
+        test_case_file = open(self.test_cases, 'w')
+        test_case_file.write('# A comment\n\n%s\n' % TEST_CASE)
+        test_case_file.close()
+        self.result_file = os.path.join(self.directory, 'gameResult.txt')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def run_main(self, *arguments):
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            results = BatchUtils.main(['6', '--workers', '1', '--quiet', '--test-cases', self.test_cases, '--result-file', self.result_file] + list(arguments))
+            return (results, sys.stdout.getvalue())
+        finally:
+            sys.stdout = stdout
+
+    def test_tablebase_moves_are_reported_apart_from_the_search(self):
+        results, output = self.run_main()
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0].moves_by_source.keys(), ['tablebase'])
+        self.assertEqual(results[0].nodes, 0)
+        self.assertIn('no move was searched', output)
+
+    def test_searched_moves_are_measured(self):
+        results, output = self.run_main('--no-tablebase', '--ply', '2', '--repetitions', '2', '--format', 'json')
+        self.assertEqual([(result.case_name, result.repetition, result.seed) for result in results], [('testX3', 0, 0), ('testX3', 1, 1)])
+        for result in results:
+            self.assertEqual(result.moves_by_source.keys(), ['search'])
+            self.assertTrue(result.nodes > 0 and result.search_time > 0 and result.peak_memory > 0)
+        self.assertIn('nodes/s', output)
+        self.assertIn('cutoffs', output)
+        self.assertIn('by the first move searched', output)
+        # One JSON object per game
+        self.assertEqual(len(open(self.result_file).read().splitlines()), 2)
+
+    def test_player_options_reach_the_players(self):
+        stats_file = os.path.join(self.directory, 'stats.jsonl')
+        results, _ = self.run_main('--no-tablebase', '--ply', '2', '--engine', 'pvs', '--mate-moves', '2', '--stats-file', stats_file)
+        moves = [json.loads(line) for line in open(stats_file).read().splitlines()]
+        self.assertEqual(len(moves), sum(results[0].moves_by_source.values()))
+        # Player X looks for a checkmate before each of its searches
+        self.assertTrue(all(move['mate_nodes'] > 0 for move in moves if move['level'] % 2 == 0 and move['source'] == 'search'))
+        self.assertTrue(all(move['mate_nodes'] == 0 for move in moves if move['level'] % 2 == 1))
+
+    def test_play_case_reports_its_own_game(self):
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            result = BatchUtils.play_case(TEST_CASE, 6, seed=0, player_options={'use_tablebase': False, 'ply': 2}, output_format=GameRecord.JSON)
+        finally:
+            sys.stdout = stdout
+        self.assertEqual(result.case_name, 'testX3')
+        self.assertTrue(result.status in ['checkmate', 'stalemate', 'maximum turns reached', 'insufficient materials'])
+        game = json.loads(result.record)
+        self.assertEqual(game['status'], result.status)
+        self.assertEqual(len(game['moves']), sum(result.moves_by_source.values()))
+
+    def test_test_case_file_skips_comments_and_empty_lines(self):
+        self.assertEqual(SetupUtils.read_test_cases(self.test_cases), [TEST_CASE])
+
+
+class RunBatchTest(unittest.TestCase):
+    def run_batch(self, *arguments, **options):
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            return BatchUtils.run_batch(*arguments, result_file=None, output_format=GameRecord.JSON, quiet=True, **options)
+        finally:
+            sys.stdout = stdout
+
+    def test_parallel_games_match_games_played_alone(self):
+        player_options = {'use_tablebase': False, 'ply': 2}
+        results = self.run_batch([TEST_CASE, OTHER_TEST_CASE], 6, workers=2, repetitions=2, seed=5, player_options=player_options)
+        self.assertEqual([(result.case_name, result.repetition, result.seed) for result in results],
+                         [('testX3', 0, 5), ('testX3', 1, 6), ('testX1', 0, 5), ('testX1', 1, 6)])
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            for case, result in zip([TEST_CASE, TEST_CASE, OTHER_TEST_CASE, OTHER_TEST_CASE], results):
+                alone = BatchUtils.play_case(case, 6, result.repetition, result.seed, player_options=player_options, output_format=GameRecord.JSON, quiet=True)
+                self.assertEqual((result.status, result.turns), (alone.status, alone.turns))
+                self.assertEqual(json.loads(result.record)['moves'], json.loads(alone.record)['moves'])
+        finally:
+            sys.stdout = stdout
+
+    def test_games_past_the_timeout_are_stopped(self):
+        results = self.run_batch([TEST_CASE], 35, workers=1, timeout=0.05, player_options={'use_tablebase': False, 'ply': 4})
+        self.assertEqual([result.status for result in results], ['timeout'])
+
+    def test_results_are_appended_to_the_result_file(self):
+        directory = tempfile.mkdtemp()
+        try:
+            result_file = os.path.join(directory, 'gameResult.txt')
+            stdout, sys.stdout = sys.stdout, StringIO()
+            try:
+                results = BatchUtils.run_batch([TEST_CASE], 6, workers=1, quiet=True, result_file=result_file,
+                                               player_options={'use_tablebase': False, 'ply': 2})
+            finally:
+                sys.stdout = stdout
+            self.assertEqual(open(result_file).read(), results[0].record)
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,75 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_benchmark.py
+
+Tests of the search benchmark suite (Benchmark.py): the positions it reads, the measures of a depth and the comparison
+of a run to a baseline.
+"""
+
+""" Imports """
+## Python Library Imports
+from cStringIO import StringIO
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+## Source code imports
+import Benchmark
+
+
+### Results ###
+def suite_results(**measures):
+    """
+    Returns the results of a suite of one depth (4) with the given measures.
+    """
+    return {'plies': {'4': measures}}
+
+
+class BenchmarkTest(unittest.TestCase):
+    def test_percentile_uses_the_nearest_rank(self):
+        values = [5, 1, 4, 2, 3]
+        self.assertEqual([Benchmark.percentile(values, p) for p in (0, 20, 50, 90, 100)], [1, 1, 3, 5, 5])
+        self.assertEqual(Benchmark.percentile([], 50), 0.0)
+
+    def test_positions_include_commented_test_cases(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'testCase.txt')
+            with open(path, 'w') as test_case_file:
+                test_case_file.write('## A comment\n#Testcase1: W.K(5,6) W.R(8,6) B.K(4,8)\ntestX1: x.K(1,2) x.R(8,6) y.K(4,4)\nbroken: W.K(1,1)\n')
+            self.assertEqual(Benchmark.read_positions(path), [('start', Benchmark.START_SQUARES), ('Testcase1', (44, 47, 59)), ('testX1', (8, 47, 27))])
+        finally:
+            shutil.rmtree(directory)
+
+    def test_search_benchmark_measures_the_searched_moves(self):
+        stdout, sys.stdout = sys.stdout, StringIO()
+        try:
+            measures = Benchmark.search_benchmark([('start', Benchmark.START_SQUARES)], 2, moves=3)
+        finally:
+            sys.stdout = stdout
+        self.assertEqual((measures['ply'], measures['positions'], measures['moves']), (2, 1, 3))
+        self.assertTrue(measures['nodes'] > 0 and measures['states'] > 0 and measures['nodes_per_second'] > 0)
+        self.assertTrue(measures['latency_p50'] <= measures['latency_p90'] <= measures['latency_p99'] <= measures['latency_max'])
+
+    def test_compare_reports_only_regressions_past_their_threshold(self):
+        baseline = suite_results(nodes_per_second=1000.0, latency_p50=10.0, peak_memory_mb=50.0)
+        results = suite_results(nodes_per_second=850.0, latency_p50=11.0, peak_memory_mb=40.0)
+        regressions = Benchmark.compare(results, baseline)
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('nodes_per_second', regressions[0])
+        # A latency 10% higher is only a regression with a threshold below 10%
+        regressions = Benchmark.compare(results, baseline, {'latency_p50': 0.05})
+        self.assertEqual(len(regressions), 1)
+        self.assertIn('latency_p50', regressions[0])
+
+    def test_compare_skips_missing_depths_and_measures(self):
+        self.assertEqual(Benchmark.compare(suite_results(nodes_per_second=1.0), {'plies': {'6': {'nodes_per_second': 1000.0}}}), [])
+        self.assertEqual(Benchmark.compare(suite_results(nodes_per_second=1.0), suite_results(nodes_per_second=0.0)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
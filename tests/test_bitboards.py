@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_bitboards.py
+
+Tests of the bitboards (Bitboards.py): the precomputed attack masks must hold the squares found by walking the board
+naively, and the game status and legal moves GameState derives from them must be the ones the rules give.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import Bitboards
+import GameUtils
+from tests import helpers
+
+
+class SquareFunctionTest(unittest.TestCase):
+    def test_squares_and_popcount_of_random_masks(self):
+        rnd = random.Random(1)
+        for _ in range(200):
+            chosen = sorted(rnd.sample(range(64), rnd.randrange(65)))
+            mask = sum(Bitboards.bit(square) for square in chosen)
+            self.assertEqual(Bitboards.squares(mask), chosen)
+            self.assertEqual(Bitboards.popcount(mask), len(chosen))
+
+    def test_positions_match_square_index(self):
+        for square in range(64):
+            self.assertEqual(GameUtils.square_index(Bitboards.position(square)), square)
+        self.assertEqual(Bitboards.positions(Bitboards.bit(0) | Bitboards.bit(63)), [Bitboards.position(0), Bitboards.position(63)])
+
+
+class AttackMaskTest(unittest.TestCase):
+    def test_king_masks_match_naive_squares(self):
+        for square in range(64):
+            self.assertEqual(Bitboards.squares(Bitboards.KING_MASKS[square]), helpers.king_squares(square))
+
+    def test_rook_attacks_match_naive_squares(self):
+        for rook in range(64):
+            for king in range(64):
+                if king != rook:
+                    self.assertEqual(Bitboards.squares(Bitboards.rook_attacks(rook, king)), helpers.rook_squares(rook, king), (rook, king))
+
+
+class GameStateTest(unittest.TestCase):
+    def setUp(self):
+        self.player_x, self.player_y = helpers.players(use_tablebase=False)
+
+    def assert_matches_naive_generation(self, state):
+        status, moves = helpers.naive_status(*(helpers.squares(state) + (state.level % 2,)))
+        self.assertEqual(state.game_status, status, state)
+        if status in ['continue', 'check']:
+            self.assertEqual(helpers.moves(state), moves, state)
+
+    def test_random_positions_match_naive_generation(self):
+        rnd = random.Random(2)
+        for _ in range(3000):
+            self.assert_matches_naive_generation(helpers.new_state([rnd.randrange(64) for _ in range(3)], self.player_x, self.player_y, level=rnd.randrange(2)))
+
+    def test_game_lines_match_naive_generation(self):
+        rnd = random.Random(3)
+        for _ in range(30):
+            state = helpers.random_state(rnd, self.player_x, self.player_y)
+            while not state.is_leaf:
+                self.assert_matches_naive_generation(state)
+                KX, RX, KY = helpers.squares(state)
+                x_attacked = set(helpers.king_squares(KX)) | set(helpers.rook_squares(RX, KX))
+                self.assertEqual(Bitboards.squares(state.x_attacks), sorted(x_attacked))
+                self.assertEqual(state.piece_under_attack(state.KY), KY in x_attacked)
+                self.assertEqual(state.piece_under_attack(state.RX), RX in helpers.king_squares(KY))
+                state = state.child_from_move(rnd.choice(state.legal_moves))
+
+
+if __name__ == '__main__':
+    unittest.main()
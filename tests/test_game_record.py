@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_game_record.py
+
+Tests of the buffered sink of the games (GameRecord.py): a game must be written out in one go when it ends, in the
+text or JSON format, through one handle shared by the games.
+"""
+
+""" Imports """
+## Python Library Imports
+from cStringIO import StringIO
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import unittest
+
+## Source code imports
+import GameRecord
+import Transposition
+from tests import helpers
+
+
+class NotationTest(unittest.TestCase):
+    def test_moves_are_named_like_the_test_cases(self):
+        self.assertEqual(GameRecord.square_name(Transposition.KX_INDEX, 0), 'W.K(1,1)')
+        self.assertEqual(GameRecord.move_name(Transposition.move_code(Transposition.RX_INDEX, 15)), 'W.R(8,2)')
+        self.assertEqual(GameRecord.move_name(Transposition.move_code(Transposition.KY_INDEX, 60)), 'B.K(5,8)')
+
+
+class GameRecordTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.result_file = os.path.join(self.directory, 'gameResult.txt')
+        self.player_x, self.player_y = helpers.players(use_tablebase=False)
+        self.stdout, sys.stdout = sys.stdout, StringIO()
+
+    def tearDown(self):
+        sys.stdout = self.stdout
+        shutil.rmtree(self.directory)
+
+    def play(self, record, seed, case_name='testX1', plies=6):
+        """
+        Records a game of random moves and returns its states.
+        """
+        rnd = random.Random(seed)
+        state = helpers.random_state(rnd, self.player_x, self.player_y)
+        line = [state]
+        record.start_game(state, case_name)
+        while not state.is_leaf and state.level < plies:
+            state = state.child_from_move(rnd.choice(state.legal_moves))
+            line.append(state)
+            record.add(state)
+        record.end_game(state)
+        return line
+
+    def read(self):
+        with open(self.result_file) as result_file:
+            return result_file.read()
+
+    def test_json_records_hold_one_game_per_line(self):
+        record = GameRecord.GameRecord(self.result_file, GameRecord.JSON)
+        states = [self.play(record, seed)[-1] for seed in (1, 2)]
+        record.close()
+        games = [json.loads(line) for line in self.read().splitlines()]
+        self.assertEqual(len(games), 2)
+        for game, state in zip(games, states):
+            self.assertEqual((game['case'], game['status'], game['turns'], game['max_moves']), ('testX1', state.game_status, state.level/2, 30))
+            self.assertEqual(len(game['moves']), state.level)
+            self.assertEqual(game['moves'][-1], GameRecord.move_name(state.last_move))
+            self.assertTrue(game['peak_memory_mb'] > 0)
+
+    def test_games_are_written_when_they_end(self):
+        handle = StringIO()
+        record = GameRecord.GameRecord(handle, quiet=True)
+        rnd = random.Random(3)
+        state = helpers.random_state(rnd, self.player_x, self.player_y)
+        record.start_game(state, 'testX2')
+        record.add(state.child_from_move(state.legal_moves[0]))
+        self.assertEqual(handle.getvalue(), '')
+        record.end_game(None)
+        self.assertEqual(handle.getvalue(), 'testX2: stopped after 0 turns\n')
+        # A file-like object is left open for the caller
+        record.close()
+        self.assertFalse(handle.closed)
+
+    def test_text_records_hold_the_boards(self):
+        record = GameRecord.GameRecord(self.result_file)
+        line = self.play(record, 4, plies=2)
+        record.close()
+        # The boards of the file are the ones printed without the escape codes of the screen
+        self.assertEqual(self.read(), ''.join(state.board_strings()[1] for state in line))
+
+    def test_no_result_file_writes_nothing(self):
+        record = GameRecord.GameRecord(None, GameRecord.JSON)
+        self.play(record, 5)
+        record.close()
+        self.assertFalse(os.path.exists(self.result_file))
+
+
+if __name__ == '__main__':
+    unittest.main()
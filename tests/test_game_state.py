@@ -0,0 +1,106 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_game_state.py
+
+Tests of GameState: the states keep their attributes in slots, share the pieces of their players, are compared by the
+placement of the pieces and only look up their game status and legal moves when they are first read.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import GameClasses
+import GameUtils
+import StatusTable
+from tests import helpers
+
+
+class SharedPieceTest(unittest.TestCase):
+    def setUp(self):
+        self.player_x, self.player_y = helpers.players(use_tablebase=False)
+
+    def test_states_have_no_instance_dictionary(self):
+        state = helpers.new_state((0, 9, 36), self.player_x, self.player_y)
+        self.assertFalse(hasattr(state, '__dict__'))
+        self.assertRaises(AttributeError, setattr, state, 'unknown', 1)
+
+    def assert_shared(self, piece):
+        square = GameUtils.square_index(piece.position)
+        shared = piece.owner.kings[square]
+        if shared is not piece and piece.owner.rooks is not None:
+            shared = piece.owner.rooks[square]
+        self.assertIs(piece, shared)
+
+    def test_moves_are_the_shared_pieces(self):
+        rnd = random.Random(1)
+        for _ in range(20):
+            state = helpers.random_state(rnd, self.player_x, self.player_y)
+            while not state.is_leaf:
+                for move in state.legal_moves:
+                    self.assert_shared(move)
+                state = state.child_from_move(rnd.choice(state.legal_moves))
+                for piece in (state.KX, state.RX, state.KY):
+                    self.assert_shared(piece)
+
+    def test_parsed_positions_are_the_shared_pieces(self):
+        self.assertIs(self.player_x.parse_position('K(2,3)'), self.player_x.kings[17])
+        self.assertIs(self.player_x.parse_position('R(8,1)'), self.player_x.rooks[7])
+        self.assertIs(self.player_y.parse_position('K(1,8)'), self.player_y.kings[56])
+        self.assertIsNone(self.player_y.parse_position('R(1,8)'))
+
+    def test_states_are_compared_by_placement(self):
+        state = helpers.new_state((0, 9, 36), self.player_x, self.player_y)
+        same = helpers.new_state((0, 9, 36), self.player_x, self.player_y, level=2)
+        other = helpers.new_state((0, 9, 37), self.player_x, self.player_y)
+        self.assertEqual(state, same)
+        self.assertNotEqual(state, other)
+        self.assertEqual(len(set([state, same, other])), 2)
+
+
+class LazyAttributeTest(unittest.TestCase):
+    def setUp(self):
+        self.player_x, self.player_y = helpers.players(use_tablebase=False)
+
+    def computed(self, state, attr):
+        """
+        Returns a Boolean value indicating whether an attribute of a state has been set, without computing it.
+        """
+        try:
+            super(GameClasses.GameState, state).__getattribute__(attr)
+            return True
+        except AttributeError:
+            return False
+
+    def test_children_look_nothing_up_until_read(self):
+        state = helpers.new_state((0, 9, 36), self.player_x, self.player_y)
+        for child in state.children:
+            for attr in ('game_status', 'is_leaf', 'legal_moves', 'x_attacks', 'x_attacking_positions'):
+                self.assertFalse(self.computed(child, attr), attr)
+            self.assertEqual(child.game_status, StatusTable.game_status(child.table_index, child.level, child.max_level))
+            self.assertTrue(self.computed(child, 'game_status'))
+            self.assertFalse(self.computed(child, 'legal_moves'))
+
+    def test_maximum_level_makes_a_leaf_without_a_lookup(self):
+        state = helpers.new_state((0, 9, 36), self.player_x, self.player_y, level=60)
+        self.assertTrue(state.is_leaf)
+        self.assertEqual(state.legal_moves, [])
+        self.assertFalse(self.computed(state, 'game_status'))
+        self.assertEqual(state.game_status, StatusTable.MAXIMUM_TURNS_REACHED)
+
+    def test_cleanup_skips_attributes_never_read(self):
+        state = helpers.new_state((0, 9, 36), self.player_x, self.player_y)
+        child = state.child_from_move(state.legal_moves[0])
+        state.cleanup(child)
+        self.assertFalse(self.computed(state, 'legal_moves'))
+        self.assertFalse(self.computed(state, 'x_attacking_positions'))
+        # They are looked up again if read after all
+        self.assertEqual(len(state.legal_moves), len(StatusTable.legal_codes(state.table_index)))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_heuristics.py
+
+Tests of the heuristic tables (Heuristics.py): looking a heuristic value up must give exactly the value of the heuristic
+function, for every game status, cycle check and depth.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import Heuristics
+import StatusTable
+from tests import helpers
+
+
+class HeuristicTableTest(unittest.TestCase):
+    def test_tables_match_the_heuristic_functions(self):
+        rnd = random.Random(1)
+        for _ in range(5000):
+            KX, RX, KY = rnd.sample(range(64), 3)
+            side = rnd.randrange(2)
+            table_index = StatusTable.index(KX, RX, KY, side)
+            status = StatusTable.game_status(table_index, 0, 60)
+            for game_status in set([status, 'checkmate', 'stalemate', 'continue']):
+                for depth in (0, 3):
+                    for cycle in (False, True):
+                        self.assertEqual(Heuristics.evaluate_x(table_index, game_status, cycle, depth),
+                                         Heuristics.heuristic_x(KX, RX, KY, side, game_status, cycle, depth))
+                    self.assertEqual(Heuristics.evaluate_y(table_index, game_status, depth),
+                                     Heuristics.heuristic_y(KX, RX, KY, side, game_status, depth))
+
+    def test_players_evaluate_states_with_the_tables(self):
+        rnd = random.Random(2)
+        player_x, player_y = helpers.players(use_tablebase=False)
+        for _ in range(20):
+            state = helpers.random_state(rnd, player_x, player_y)
+            while not state.is_leaf:
+                state = state.child_from_move(rnd.choice(state.legal_moves))
+                arguments = state.squares + (state.level % 2, state.game_status)
+                cycle = state.check_cycle(min_length=4, max_length=8)
+                self.assertEqual(player_x.heuristic(state, 2), Heuristics.heuristic_x(*(arguments + (cycle, 2))))
+                self.assertEqual(player_y.heuristic(state, 2), Heuristics.heuristic_y(*(arguments + (2,))))
+
+
+if __name__ == '__main__':
+    unittest.main()
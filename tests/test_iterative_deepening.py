@@ -0,0 +1,76 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_iterative_deepening.py
+
+Tests of the iterative deepening search (Player.iterative_deepening): its deepest iteration must find the values of a search
+of the same depth, and the time and node budgets must stop it after a completed iteration.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+from tests import helpers
+
+
+class IterativeDeepeningTest(unittest.TestCase):
+    def setUp(self):
+        self.player_x, self.player_y = helpers.players(use_tablebase=False)
+
+    def squares(self, seed, count):
+        rnd = random.Random(seed)
+        return [helpers.squares(helpers.random_state(rnd, self.player_x, self.player_y)) for _ in range(count)]
+
+    def test_deepest_iteration_matches_fixed_depth_search(self):
+        player = helpers.players(use_tablebase=False, node_budget=10**9, max_ply=3)[0]
+        reference = helpers.players(use_tablebase=False, tt_size=0)[0]
+        for squares in self.squares(1, 6):
+            state = helpers.new_state(squares, self.player_x, self.player_y)
+            child_values, depth = player.iterative_deepening(state)
+            self.assertEqual(depth, 3)
+            expected = dict((child.last_move, value) for value, child in reference._search_root(helpers.new_state(squares, self.player_x, self.player_y), 3))
+            self.assertEqual(sorted(child.last_move for _, child in child_values), sorted(expected))
+            for value, child in child_values:
+                self.assertAlmostEqual(value, expected[child.last_move], msg='%s, move %i' % (state, child.last_move))
+
+    def test_node_budget_completes_the_first_iteration(self):
+        player = helpers.players(use_tablebase=False, node_budget=1)[0]
+        for squares in self.squares(2, 4):
+            state = helpers.new_state(squares, self.player_x, self.player_y)
+            child_values, depth = player.iterative_deepening(state)
+            self.assertEqual(depth, 1)
+            self.assertEqual(len(child_values), len(state.legal_moves))
+
+    def test_node_budget_stops_the_deepening(self):
+        # A larger budget never searches less deep, and the deepening only stops early once the budget is spent
+        player = helpers.players(use_tablebase=False, max_ply=5)[0]
+        for squares in self.squares(3, 3):
+            depths = []
+            for budget in (100, 1000, 10000, 100000):
+                child_values, depth = player.iterative_deepening(helpers.new_state(squares, self.player_x, self.player_y), node_budget=budget)
+                if depth < 5:
+                    self.assertTrue(player.nodes > budget)
+                depths.append(depth)
+            self.assertEqual(depths, sorted(depths))
+            self.assertTrue(depths[-1] > depths[0])
+
+    def test_time_budget_completes_the_first_iteration(self):
+        player = helpers.players(use_tablebase=False, time_budget=0.0)[0]
+        for squares in self.squares(4, 4):
+            state = helpers.new_state(squares, self.player_x, self.player_y)
+            self.assertEqual(player.iterative_deepening(state)[1], 1)
+            child = player.alphabeta_search(helpers.new_state(squares, self.player_x, self.player_y))
+            self.assertEqual(child.level, 1)
+
+    def test_search_stops_at_the_end_of_the_game(self):
+        player = helpers.players(use_tablebase=False, node_budget=10**9)[0]
+        state = helpers.new_state((0, 9, 36), self.player_x, self.player_y, max_moves=30, level=58)
+        self.assertEqual(player.iterative_deepening(state)[1], 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
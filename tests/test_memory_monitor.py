@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_memory_monitor.py
+
+Tests of the memory measurements (MemoryMonitor.py) and of the memory limit of a player (see Player.check_memory).
+"""
+
+""" Imports """
+## Python Library Imports
+import unittest
+
+## Source code imports
+import GameRecord
+import MemoryMonitor
+from tests import helpers
+
+
+class MemoryMonitorTest(unittest.TestCase):
+    def test_peak_is_never_below_current(self):
+        current, peak = MemoryMonitor.usage()
+        self.assertTrue(0 < current <= peak)
+
+    def test_reset_peak_forgets_earlier_peak(self):
+        block = bytearray(64*MemoryMonitor.MB)
+        del block
+        if not MemoryMonitor.reset_peak():
+            self.skipTest('the peak memory cannot be reset here')
+        current, peak = MemoryMonitor.usage()
+        self.assertTrue(peak - current < 32*MemoryMonitor.MB)
+
+
+class MemoryLimitTest(unittest.TestCase):
+    def test_states_are_not_released_again_until_memory_grows(self):
+        player_x, player_y = helpers.players(use_tablebase=False, ply=2, memory_limit=1)
+        state = helpers.new_state((9, 47, 27), player_x, player_y)
+        child, stats = player_x.search(state)
+        self.assertTrue(stats.released)
+        self.assertFalse(player_x.check_memory(child))
+
+    def test_game_peak_covers_every_move(self):
+        player_x, player_y = helpers.players(use_tablebase=False, ply=2)
+        state = helpers.new_state((9, 47, 27), player_x, player_y)
+        peaks = []
+        for _ in range(4):
+            state, stats = state.current_player.search(state)
+            peaks.append(stats.peak_memory)
+            self.assertTrue(stats.memory <= stats.peak_memory)
+        self.assertTrue(GameRecord.game_peak_memory(state) >= max(peaks))
+
+
+if __name__ == '__main__':
+    unittest.main()
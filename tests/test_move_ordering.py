@@ -0,0 +1,97 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_move_ordering.py
+
+Tests of the move ordering (MoveOrdering.py): the moves must be sorted by their categories, the killer moves and history
+scores must follow the cutoffs, and ordering the moves must save nodes without changing the values the search finds.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import GameUtils
+import MoveOrdering
+import Transposition
+from tests import helpers
+
+
+### Move Codes ###
+KX = lambda square: Transposition.move_code(Transposition.KX_INDEX, square)
+RX = lambda square: Transposition.move_code(Transposition.RX_INDEX, square)
+KY = lambda square: Transposition.move_code(Transposition.KY_INDEX, square)
+
+
+class MoveOrdererTest(unittest.TestCase):
+    def setUp(self):
+        self.orderer = MoveOrdering.MoveOrderer(8)
+        self.player_x, self.player_y = helpers.players(use_tablebase=False)
+
+    def test_moves_are_sorted_by_category(self):
+        # KX on c3 (18), RX on h1 (7) and KY on e6 (44): the rook checks from e1 (4) and h6 (47), and the king
+        # approaches from c4 (26) and d4 (27)
+        state = helpers.new_state((18, 7, 44), self.player_x, self.player_y)
+        self.orderer.record_cutoff(RX(0), 2, 1, 1)
+        self.orderer.record_cutoff(RX(63), 5, 3, 0)
+        ordered = [code for code, _ in self.orderer.order(state, 2, tt_move=KX(9))]
+        self.assertEqual(ordered[0], KX(9))
+        self.assertEqual(set(ordered[1:3]), set([RX(4), RX(47)]))
+        self.assertEqual(ordered[3], RX(0))
+        self.assertEqual(set(ordered[4:6]), set([KX(26), KX(27)]))
+        self.assertEqual(ordered[6], RX(63))
+        self.assertEqual(sorted(ordered), sorted(state.move_code(move) for move in state.legal_moves))
+
+    def test_player_y_king_heads_for_the_center(self):
+        # KY on b7 (49) can go to the center, or to the corner and the edges
+        state = helpers.new_state((0, 15, 49), self.player_x, self.player_y, level=1)
+        ordered = [code & 63 for code, _ in self.orderer.order(state, 0)]
+        closer = [square for square in ordered if GameUtils.CMD_BY_SQUARE[square] < GameUtils.CMD_BY_SQUARE[49]]
+        self.assertIn(42, closer)
+        self.assertNotIn(56, closer)
+        self.assertEqual(ordered[:len(closer)], closer)
+
+    def test_moves_match_their_codes(self):
+        state = helpers.new_state((18, 7, 44), self.player_x, self.player_y)
+        self.assertTrue(all(state.move_code(move) == code for code, move in self.orderer.order(state, 0)))
+
+    def test_cutoffs_update_killers_and_history(self):
+        self.orderer.record_cutoff(RX(1), 3, 2, 0)
+        self.orderer.record_cutoff(RX(2), 3, 2, 1)
+        self.orderer.record_cutoff(RX(2), 3, 3, 0)
+        self.assertEqual(self.orderer.killers[3], [RX(2), RX(1)])
+        self.assertEqual((self.orderer.history[RX(1)], self.orderer.history[RX(2)]), (4, 13))
+        self.assertEqual((self.orderer.cutoffs, self.orderer.first_move_cutoffs), (3, 2))
+        self.assertAlmostEqual(self.orderer.first_move_cutoff_rate(), 2/3.0)
+        # A new search forgets the killers and halves the history scores
+        self.orderer.new_search()
+        self.assertEqual(self.orderer.killers[3], [None, None])
+        self.assertEqual((self.orderer.history[RX(1)], self.orderer.history[RX(2)]), (2, 6))
+
+
+class OrderedSearchTest(unittest.TestCase):
+    def test_ordering_saves_nodes_without_changing_values(self):
+        player_x, player_y = helpers.players(use_tablebase=False)
+        unordered = helpers.players(use_tablebase=False, tt_size=0, move_ordering=False)[0]
+        ordered = helpers.players(use_tablebase=False, tt_size=0)[0]
+        rnd = random.Random(3)
+        nodes = [0, 0]
+        for _ in range(5):
+            squares = helpers.squares(helpers.random_state(rnd, player_x, player_y))
+            results = []
+            for i, player in enumerate((unordered, ordered)):
+                player.nodes = 0
+                results.append(dict((child.last_move, value) for value, child in player._search_root(helpers.new_state(squares, player_x, player_y), 4)))
+                nodes[i] += player.nodes
+            self.assertEqual(sorted(results[0]), sorted(results[1]))
+            for code, value in results[0].items():
+                self.assertAlmostEqual(results[1][code], value, msg='%r, move %i' % (squares, code))
+        self.assertTrue(nodes[1] < nodes[0], nodes)
+        self.assertTrue(ordered.move_orderer.first_move_cutoff_rate() > 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_parallel_search.py
+
+Tests of the parallel root search (Player._parallel_search): searching the root moves in worker processes must pick the same
+moves as searching them in one process, and the workers must be kept from one search to the next until the game ends.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+from tests import helpers
+
+
+class ParallelSearchTest(unittest.TestCase):
+    def setUp(self):
+        self.parallel = []
+
+    def tearDown(self):
+        for player in self.parallel:
+            player.shutdown_workers()
+
+    def players(self, **options):
+        pair = helpers.players(use_tablebase=False, workers=2, **options)
+        self.parallel.extend(pair)
+        return pair
+
+    def test_workers_pick_the_same_moves(self):
+        reference = helpers.players(use_tablebase=False, tt_size=0)
+        others = [self.players(tt_size=0), self.players()]
+        for seed in (3, 7):
+            for state, values, other_values in helpers.game_line(seed, 3, reference, others, moves=10):
+                best, winners = helpers.best_moves(values)
+                for other in other_values:
+                    other_best, other_winners = helpers.best_moves(other)
+                    self.assertTrue(helpers.close(other_best, best), 'seed %i, level %i: %r != %r' % (seed, state.level, other_best, best))
+                    self.assertEqual(other_winners, winners)
+
+    def test_workers_are_kept_until_a_new_game(self):
+        player_x, player_y = self.players(ply=2)
+        state = helpers.random_state(random.Random(1), player_x, player_y)
+        n_moves = len(state.legal_moves)
+        child, stats = player_x.search(state, log=False)
+        pool = player_x._pool
+        self.assertIsNotNone(pool)
+        # The nodes of the workers are counted with the player's own
+        self.assertTrue(stats.nodes > n_moves)
+        child, _ = player_y.search(child, log=False)
+        player_x.search(child, log=False)
+        self.assertIs(player_x._pool, pool)
+        player_x.new_game()
+        self.assertIsNone(player_x._pool)
+
+    def test_time_budget_stops_the_workers_with_a_move(self):
+        player_x, player_y = self.players(time_budget=0.05)
+        state = helpers.random_state(random.Random(2), player_x, player_y)
+        moves = [state.move_code(move) for move in state.legal_moves]
+        child, stats = player_x.search(state, log=False)
+        self.assertIn(child.last_move, moves)
+        self.assertTrue(stats.depth >= 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
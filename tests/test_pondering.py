@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_pondering.py
+
+Tests of pondering (Player.start_pondering and Player.stop_pondering): the replies a player searches while the opponent enters
+its move must be the moves it would have searched after it, and the searches of the moves that were not made must be dropped.
+"""
+
+""" Imports """
+## Python Library Imports
+from cStringIO import StringIO
+import json
+import random
+import sys
+from time import sleep
+import unittest
+
+## Source code imports
+import GameClasses
+import GameRecord
+import GameUtils
+import SetupUtils
+from tests import helpers
+
+
+### States ###
+def y_to_move(rnd, player_x, player_y):
+    """
+    Returns the state reached by a random move of player X from a random position, with player Y to move.
+    """
+    state = helpers.random_state(rnd, player_x, player_y)
+    return state.child_from_move(rnd.choice(state.legal_moves))
+
+
+class PonderingTest(unittest.TestCase):
+    def test_pondered_replies_are_the_searched_ones(self):
+        rnd = random.Random(1)
+        player_x, player_y = helpers.players(use_tablebase=False, ply=3, ponder=True)
+        state = y_to_move(rnd, player_x, player_y)
+        move = rnd.choice(state.legal_moves)
+        player_x.start_pondering(state)
+        # The thread ends once the reply to every move of player Y has been searched
+        player_x._ponder_thread.join()
+        child = state.child_from_move(move)
+        self.assertTrue(player_x.stop_pondering(child))
+        self.assertEqual(player_x._pondered.keys(), [child.zobrist])
+        # The reply is the one of a fresh search of the same position
+        fresh_x, fresh_y = helpers.players(use_tablebase=False)
+        best, codes = helpers.best_moves(helpers.root_values(fresh_x, helpers.new_state(child.squares, fresh_x, fresh_y, level=2), 3))
+        reply = player_x.move(child)
+        self.assertTrue(player_x.stats.pondered)
+        self.assertTrue(helpers.close(player_x.stats.score, best))
+        self.assertIn(reply.last_move, codes)
+        self.assertEqual(player_x._pondered, {})
+
+    def test_moves_that_end_the_game_are_skipped(self):
+        player_x, player_y = helpers.players(use_tablebase=False, ply=2, ponder=True)
+        # Every move of player Y ends the game at the last move
+        state = helpers.new_state((0, 9, 36), player_x, player_y, max_moves=1, level=1)
+        self.assertTrue(all(state.child_from_move(move).is_leaf for move in state.legal_moves))
+        stderr, sys.stderr = sys.stderr, StringIO()
+        try:
+            player_x.start_pondering(state)
+            player_x._ponder_thread.join()
+            errors = sys.stderr.getvalue()
+        finally:
+            sys.stderr = stderr
+        # The thread does not fail on positions without a reply
+        self.assertEqual(errors, '')
+        self.assertFalse(player_x.stop_pondering(None))
+
+    def test_searches_of_other_moves_are_cancelled(self):
+        rnd = random.Random(2)
+        player_x, player_y = helpers.players(use_tablebase=False, ply=20, ponder=True)
+        state = y_to_move(rnd, player_x, player_y)
+        player_x.start_pondering(state)
+        # Wait until the thread searches the reply to one of the moves, then make another move
+        while player_x._ponder_key is None:
+            sleep(0.01)
+        pondering = player_x._ponder_key
+        child = [child for child in (state.child_from_move(move) for move in state.legal_moves) if child.zobrist != pondering][0]
+        self.assertFalse(player_x.stop_pondering(child))
+        self.assertEqual(player_x._pondered, {})
+        self.assertIsNone(player_x._ponder_thread)
+
+    def test_stopping_without_a_move_drops_everything(self):
+        player_x, player_y = helpers.players(use_tablebase=False, ply=2, ponder=True)
+        self.assertFalse(player_x.stop_pondering())
+        player_x.start_pondering(y_to_move(random.Random(3), player_x, player_y))
+        player_x._ponder_thread.join()
+        self.assertTrue(player_x._pondered)
+        self.assertFalse(player_x.stop_pondering(None))
+        self.assertEqual(player_x._pondered, {})
+
+
+class PonderedGameTest(unittest.TestCase):
+    def test_moves_after_the_input_come_from_pondering(self):
+        rnd = random.Random(4)
+        log = StringIO()
+        player_x = GameClasses.Player('W', use_tablebase=False, ply=2, ponder=True, stats_file=log)
+        player_y = GameClasses.Player('B', input_mode=True)
+        def enter_move(state):
+            # A slow opponent: the move is entered once every reply has been searched
+            player_x._ponder_thread.join()
+            children = [state.child_from_move(move) for move in state.legal_moves]
+            self.assertEqual(set(player_x._pondered), set(child.zobrist for child in children if not child.is_leaf))
+            return rnd.choice(children)
+        player_y.move = enter_move
+        state = helpers.random_state(rnd, player_x, player_y, max_moves=6)
+        final_state = GameUtils._play_moves(state, player_x, player_y, GameRecord.GameRecord(None, quiet=True))
+        self.assertTrue(final_state.is_leaf)
+        pondered = [json.loads(line)['pondered'] for line in log.getvalue().splitlines()]
+        # Only the first move of player X is searched on its turn
+        self.assertEqual(pondered, [False] + [True]*(len(pondered) - 1))
+        self.assertTrue(len(pondered) > 1)
+
+
+class PonderingSetupTest(unittest.TestCase):
+    def setup_players(self, *responses):
+        """
+        Returns the players of SetupUtils.player_setup given the responses to its prompts (empty for the default).
+        """
+        responses = list(responses)
+        query_until, SetupUtils.query_until = SetupUtils.query_until, lambda prompt, condition, default=None: responses.pop(0) or default
+        try:
+            return SetupUtils.player_setup()
+        finally:
+            SetupUtils.query_until = query_until
+
+    def test_setup_prompts_reach_a_pondering_player(self):
+        player_x, player_y = self.setup_players('y', '')
+        self.assertEqual((player_x.input_mode, player_x.ponder, player_y.input_mode), (False, True, True))
+        player_x, player_y = self.setup_players('Y', 'no')
+        self.assertEqual((player_x.ponder, player_y.input_mode), (False, True))
+        player_x, player_y = self.setup_players('')
+        self.assertEqual((player_x.ponder, player_y.input_mode), (False, False))
+
+
+if __name__ == '__main__':
+    unittest.main()
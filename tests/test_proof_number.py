@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_proof_number.py
+
+Tests of the proof-number search for forced checkmates (ProofNumber.py): what it proves and disproves must agree with the
+tablebase, and the checkmates it proves must be playable to the end.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import ProofNumber
+import SearchBoard
+import Tablebase
+from tests import helpers
+
+
+class ProofNumberTest(unittest.TestCase):
+    def setUp(self):
+        self.player_x, self.player_y = helpers.players(use_tablebase=False)
+
+    def positions(self, seed, count, max_plies=None):
+        """
+        Returns states of random positions with player X to move, optionally only the ones the tablebase solves within max_plies plies.
+        """
+        rnd = random.Random(seed)
+        states = []
+        while len(states) < count:
+            squares = rnd.sample(range(64), 3)
+            state = helpers.new_state(squares, self.player_x, self.player_y, max_moves=60)
+            plies = Tablebase.probe(*(squares + [Tablebase.X_TO_MOVE]))
+            if not state.is_leaf and (max_plies is None or plies <= max_plies):
+                states.append(state)
+        return states
+
+    def test_outcomes_agree_with_the_tablebase(self):
+        for state in self.positions(1, 40) + self.positions(2, 20, max_plies=3):
+            board = SearchBoard.SearchBoard(state)
+            search = ProofNumber.ProofNumberSearch(board, 2, node_budget=10**6)
+            outcome = search.search()
+            plies = Tablebase.probe(*(state.squares + (Tablebase.X_TO_MOVE,)))
+            self.assertEqual(outcome, ProofNumber.PROVEN if plies <= 3 else ProofNumber.DISPROVEN, '%s: tablebase %r' % (state, plies))
+            if outcome == ProofNumber.PROVEN:
+                # The proof need not be the fastest checkmate, but it cannot beat the tablebase
+                self.assertTrue(plies <= search.root.distance <= 3)
+            # The search leaves the board as it found it
+            self.assertEqual((board.squares, board.level, len(board.history)), (state.squares, state.level, len(state.history)))
+
+    def test_mating_lines_end_in_checkmate(self):
+        for state in self.positions(3, 20, max_plies=5):
+            search = ProofNumber.ProofNumberSearch(SearchBoard.SearchBoard(state), 3, node_budget=10**6)
+            self.assertEqual(search.search(), ProofNumber.PROVEN)
+            line = search.root.mating_line()
+            self.assertEqual(len(line), search.root.distance)
+            for code in line:
+                state = state.child_from_code(code)
+                self.assertIsNotNone(state)
+            self.assertEqual(state.game_status, 'checkmate')
+
+    def test_node_budget_leaves_the_outcome_unknown(self):
+        # Disproving a checkmate within 5 moves takes far more than 50 nodes
+        state = [state for state in self.positions(4, 10) if Tablebase.probe(*(state.squares + (Tablebase.X_TO_MOVE,))) > 9][0]
+        search = ProofNumber.ProofNumberSearch(SearchBoard.SearchBoard(state), 5, node_budget=50)
+        self.assertEqual(search.search(), ProofNumber.UNKNOWN)
+        self.assertTrue(search.nodes >= 50)
+
+    def test_player_follows_its_proof_tree_to_checkmate(self):
+        player_x, player_y = helpers.players(use_tablebase=False, mate_moves=3)
+        rnd = random.Random(5)
+        self.player_x, self.player_y = player_x, player_y
+        for state in self.positions(5, 10, max_plies=5):
+            while not state.is_leaf:
+                if state.level % 2:
+                    state = state.child_from_move(rnd.choice(state.legal_moves))
+                    continue
+                searched = state.level == 0
+                state, stats = player_x.search(state, log=False)
+                self.assertEqual(stats.source, 'mate search')
+                # Only the first move is searched, the next ones are looked up in the proof tree
+                self.assertEqual(stats.mate_nodes > 0, searched)
+            self.assertEqual(state.game_status, 'checkmate')
+            player_x.new_game()
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_repetition.py
+
+Tests of the repetition detection (SearchBoard.has_cycle): the run counters of the repetition entries must detect the same
+cycles as comparing the ancestors of a state one by one, which is how GameState.check_cycle used to detect them.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import SearchBoard
+from tests import helpers
+
+
+### Naive Cycle Detection ###
+def walk_cycle(state, min_length, max_length):
+    """
+    Checks a state for a cycle by walking its parents: the last max_length*2 ancestors are taken, oldest first, and for each
+    even length l from min_length to below max_length, the first l of them are compared to the next l.
+    """
+    if state.level < 4:
+        return False
+    ancestors = []
+    parent = state.parent
+    while parent is not None and len(ancestors) < max_length*2:
+        ancestors.insert(0, parent)
+        parent = parent.parent
+    if len(ancestors) < min_length*2:
+        return False
+    for l in range(min_length, max_length, 2):
+        if ancestors[:l] == ancestors[l:2*l]:
+            return True
+    return False
+
+def shuffling_line(rnd, player_x, player_y, plies=40):
+    """
+    Plays a line that picks one of the first two legal moves at every ply, which repeats positions often.
+    """
+    state = helpers.random_state(rnd, player_x, player_y, max_moves=plies/2)
+    line = [state]
+    while not state.is_leaf:
+        moves = state.legal_moves
+        state = state.child_from_move(moves[rnd.randrange(min(2, len(moves)))])
+        line.append(state)
+    return line
+
+
+class RepetitionTest(unittest.TestCase):
+    def setUp(self):
+        self.player_x, self.player_y = helpers.players(use_tablebase=False)
+
+    def test_run_counters_match_walking_the_parents(self):
+        rnd = random.Random(1)
+        cycles = 0
+        for _ in range(60):
+            for state in shuffling_line(rnd, self.player_x, self.player_y):
+                for min_length, max_length in ((2, 6), (4, 8), (2, 8), (4, 6), (2, 4)):
+                    found = walk_cycle(state, min_length, max_length)
+                    self.assertEqual(state.check_cycle(min_length=min_length, max_length=max_length), found, (str(state), min_length, max_length))
+                    cycles += found
+        self.assertTrue(cycles > 0)
+
+    def test_longer_cycles_walk_the_parents(self):
+        rnd = random.Random(2)
+        for _ in range(10):
+            for state in shuffling_line(rnd, self.player_x, self.player_y):
+                self.assertEqual(state.check_cycle(min_length=2, max_length=12), walk_cycle(state, 2, 12))
+
+    def test_states_keep_a_bounded_history(self):
+        rnd = random.Random(3)
+        line = shuffling_line(rnd, self.player_x, self.player_y)
+        for state in line:
+            self.assertTrue(len(state.history) <= 2*SearchBoard.MAX_CYCLE_LENGTH + 1)
+            self.assertEqual(state.history[-1][0], state.placement)
+        # A state cut off from its parents still detects its cycles
+        for state in line:
+            cycle = state.check_cycle(min_length=4, max_length=8)
+            state.parent = None
+            self.assertEqual(state.check_cycle(min_length=4, max_length=8), cycle)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_search_board.py
+
+Tests of the make/unmake search board (SearchBoard.py): making a move must reach the same position as creating the child
+GameState, unmaking it must restore the board, and searching on the board must find the values of the tree search.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import SearchBoard
+from tests import helpers
+
+
+class SearchBoardTest(unittest.TestCase):
+    def assert_same_position(self, board, state):
+        self.assertEqual(board.squares, state.squares)
+        self.assertEqual((board.level, board.zobrist, board.table_index), (state.level, state.zobrist, state.table_index))
+        self.assertEqual((board.game_status, board.is_leaf), (state.game_status, state.is_leaf))
+        self.assertEqual(board.check_cycle(min_length=4, max_length=8), state.check_cycle(min_length=4, max_length=8))
+        if not state.is_leaf:
+            self.assertEqual(board.legal_codes(), [state.move_code(move) for move in state.legal_moves])
+
+    def test_make_move_matches_child_states(self):
+        rnd = random.Random(1)
+        player_x, player_y = helpers.players(use_tablebase=False)
+        for _ in range(20):
+            state = helpers.random_state(rnd, player_x, player_y)
+            board = SearchBoard.SearchBoard(state)
+            while not state.is_leaf:
+                code = rnd.choice(board.legal_codes())
+                board.make_move(code)
+                state = state.child_from_code(code)
+                self.assert_same_position(board, state)
+
+    def test_unmake_move_restores_the_board(self):
+        rnd = random.Random(2)
+        player_x, player_y = helpers.players(use_tablebase=False)
+        for _ in range(20):
+            state = helpers.random_state(rnd, player_x, player_y)
+            board = SearchBoard.SearchBoard(state)
+            line = [state]
+            while not line[-1].is_leaf and len(line) < 20:
+                code = rnd.choice(board.legal_codes())
+                board.make_move(code)
+                line.append(line[-1].child_from_code(code))
+            history = list(board.history)
+            while len(line) > 1:
+                line.pop()
+                board.unmake_move()
+                history.pop()
+                self.assert_same_position(board, line[-1])
+                self.assertEqual(board.history, history)
+
+    def test_board_search_matches_tree_search(self):
+        reference = helpers.players(use_tablebase=False, tt_size=0, search_mode='tree')
+        others = [helpers.players(use_tablebase=False, tt_size=0), helpers.players(use_tablebase=False)]
+        for state, values, other_values in helpers.game_line(6, 3, reference, others, moves=16):
+            for other in other_values:
+                self.assertEqual([code for code, _ in other], [code for code, _ in values])
+                for (code, value), (_, expected) in zip(other, values):
+                    self.assertTrue(helpers.close(value, expected), 'level %i, move %i: %r != %r' % (state.level, code, value, expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_search_engines.py
+
+Tests of the search engines a player can choose (see Player.search_engine): principal variation search and MTD(f)
+must pick the same best value and the same best moves as the plain alpha-beta search, along whole game lines.
+"""
+
+""" Imports """
+## Python Library Imports
+import unittest
+
+## Source code imports
+import GameClasses
+from tests import helpers
+
+
+class SearchEngineTest(unittest.TestCase):
+    def assert_same_best_moves(self, seeds, ply, moves=None, **options):
+        reference = helpers.players(use_tablebase=False, tt_size=0)
+        engines = [helpers.players(use_tablebase=False, search_engine=engine, **options) for engine in GameClasses.SEARCH_ENGINES]
+        try:
+            for seed in seeds:
+                for state, values, others in helpers.game_line(seed, ply, reference, engines, moves=moves):
+                    best, winners = helpers.best_moves(values)
+                    for engine, other in zip(GameClasses.SEARCH_ENGINES, others):
+                        other_best, other_winners = helpers.best_moves(other)
+                        self.assertTrue(helpers.close(other_best, best), '%s, seed %i, level %i: %r != %r' % (engine, seed, state.level, other_best, best))
+                        self.assertEqual(other_winners, winners)
+        finally:
+            for pair in engines:
+                for player in pair:
+                    player.shutdown_workers()
+
+    def test_engines_pick_the_same_moves_along_game_lines(self):
+        self.assert_same_best_moves((11, 14), 4)
+
+    def test_engines_pick_the_same_moves_in_tree_mode(self):
+        self.assert_same_best_moves((2,), 3, search_mode='tree')
+
+    def test_parallel_engines_pick_the_same_moves(self):
+        self.assert_same_best_moves((11,), 3, moves=12, workers=2)
+
+
+class SearchOptionsTest(unittest.TestCase):
+    def test_options_object_and_keyword_arguments_give_the_same_player(self):
+        options = GameClasses.SearchOptions(ply=3, search_engine='pvs', time_budget=2.0, tree_budget=10, tt_size=0, memory_limit=100.0)
+        for player in (GameClasses.Player('W', options=options),
+                       GameClasses.Player('W', ply=3, search_engine='pvs', time_budget=2.0, tree_budget=10, tt_size=0, memory_limit=100.0)):
+            self.assertEqual((player.ply, player.search_engine, player.time_budget, player.tree_budget, player.memory_limit), (3, 'pvs', 2.0, 10, 100.0))
+            self.assertIsNone(player.transposition_table)
+            self.assertEqual(vars(player.options), vars(options))
+        self.assertRaises(AssertionError, GameClasses.Player, 'W', options=options, ply=4)
+        self.assertRaises(TypeError, GameClasses.Player, 'W', plies=4)
+
+
+if __name__ == '__main__':
+    unittest.main()
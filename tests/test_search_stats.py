@@ -0,0 +1,109 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_search_stats.py
+
+Tests of the per-move search statistics (SearchStats.py) and of the statistics Player.search returns with its move.
+"""
+
+""" Imports """
+## Python Library Imports
+from cStringIO import StringIO
+import json
+import random
+import unittest
+
+## Source code imports
+import SearchStats
+from tests import helpers
+
+
+class SearchStatsTest(unittest.TestCase):
+    def test_cutoffs_are_counted_by_depth(self):
+        stats = SearchStats.SearchStats()
+        for depth in (2, 0, 2):
+            stats.record_cutoff(depth)
+        self.assertEqual((stats.cutoffs, stats.cutoffs_by_depth), (3, [1, 0, 2]))
+
+    def test_merge_adds_the_counters_of_another_search(self):
+        stats, other = SearchStats.SearchStats(), SearchStats.SearchStats()
+        stats.record_cutoff(1)
+        other.leaves, other.cycle_stops, other.reused = 5, 1, 2
+        for depth in (0, 3):
+            other.record_cutoff(depth)
+        stats.merge(other.counters())
+        self.assertEqual((stats.leaves, stats.cycle_stops, stats.reused), (5, 1, 2))
+        self.assertEqual((stats.cutoffs, stats.cutoffs_by_depth), (3, [1, 1, 0, 1]))
+
+    def test_branching_factor_of_a_uniform_tree(self):
+        stats = SearchStats.SearchStats()
+        self.assertEqual(stats.branching_factor(), 0.0)
+        stats.nodes, stats.depth = 3 + 9 + 27, 3
+        self.assertAlmostEqual(stats.branching_factor(), 3.0, places=6)
+
+    def test_write_appends_one_json_object(self):
+        stats = SearchStats.SearchStats()
+        stats.nodes, stats.leaves, stats.tt_cutoffs = 10, 6, 1
+        log = StringIO()
+        stats.write(log)
+        stats.write(log)
+        lines = log.getvalue().splitlines()
+        self.assertEqual(len(lines), 2)
+        self.assertEqual(json.loads(lines[0]), json.loads(json.dumps(stats.stats())))
+        self.assertEqual(json.loads(lines[0])['expanded'], 3)
+
+
+class PlayerStatsTest(unittest.TestCase):
+    def test_search_returns_the_statistics_of_its_move(self):
+        log = StringIO()
+        player_x, player_y = helpers.players(use_tablebase=False, ply=3, stats_file=log)
+        state = helpers.random_state(random.Random(1), player_x, player_y)
+        for _ in range(4):
+            player = state.current_player
+            child, stats = player.search(state)
+            self.assertEqual((stats.source, stats.level, stats.depth), ('search', state.level, 3))
+            self.assertEqual(stats.nodes, player.nodes)
+            self.assertEqual(stats.cutoffs, sum(stats.cutoffs_by_depth))
+            self.assertTrue(stats.leaves <= stats.nodes and stats.tt_hits <= stats.tt_probes and stats.tt_cutoffs <= stats.tt_hits)
+            self.assertIsNotNone(stats.score)
+            self.assertTrue(stats.time > 0 and stats.peak_memory >= stats.memory > 0)
+            state = child
+        self.assertEqual([json.loads(line)['level'] for line in log.getvalue().splitlines()], [0, 1, 2, 3])
+
+    def test_move_ordering_is_reported_per_move(self):
+        for workers in (1, 2):
+            log = StringIO()
+            player_x, player_y = helpers.players(use_tablebase=False, ply=3, stats_file=log, workers=workers)
+            state = helpers.random_state(random.Random(3), player_x, player_y)
+            cutoffs = first_move_cutoffs = 0
+            try:
+                for _ in range(3):
+                    child, stats = player_x.search(state)
+                    # The move orderer sees the cutoffs of this move only, including the ones in the worker processes
+                    self.assertEqual(stats.move_ordering['cutoffs'], stats.cutoffs)
+                    self.assertTrue(stats.move_ordering['first_move_cutoffs'] <= stats.cutoffs)
+                    self.assertAlmostEqual(stats.move_ordering['first_move_cutoff_rate'], stats.move_ordering['first_move_cutoffs']/float(max(stats.cutoffs, 1)))
+                    self.assertEqual(json.loads(log.getvalue().splitlines()[-1])['move_ordering'], stats.move_ordering)
+                    self.assertIn('by the first move', str(stats))
+                    cutoffs += stats.cutoffs
+                    first_move_cutoffs += stats.move_ordering['first_move_cutoffs']
+                    state, _ = player_y.search(child)
+            finally:
+                player_x.shutdown_workers()
+                player_y.shutdown_workers()
+            self.assertEqual((player_x.cutoffs, player_x.first_move_cutoffs), (cutoffs, first_move_cutoffs))
+        unordered = helpers.players(use_tablebase=False, ply=3, move_ordering=False)[0]
+        _, stats = unordered.search(helpers.random_state(random.Random(3), unordered, player_y))
+        self.assertIsNone(stats.move_ordering)
+
+    def test_tablebase_moves_are_reported_as_such(self):
+        player_x, player_y = helpers.players()
+        state = helpers.random_state(random.Random(2), player_x, player_y)
+        child, stats = player_x.search(state)
+        self.assertEqual((stats.source, stats.nodes, stats.score), ('tablebase', 0, None))
+        self.assertEqual((player_x.moves_by_source, player_x.total_nodes), ({'tablebase': 1}, 0))
+
+
+if __name__ == '__main__':
+    unittest.main()
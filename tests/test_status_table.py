@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_status_table.py
+
+Tests of the status table (StatusTable.py): the game status and legal moves it holds for a position must be the ones
+found by generating the moves naively, one square at a time, from the rules of the game.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import StatusTable
+import Transposition
+from tests import helpers
+
+
+### Naive Move Generation ###
+def naive_status(KX, RX, KY, side):
+    """
+    Returns the game status and the move codes of the legal moves of a position, following the rules of GameState (see helpers.naive_status).
+    """
+    status, moves = helpers.naive_status(KX, RX, KY, side)
+    return (status, [Transposition.move_code(piece_index, square) for piece_index, square in moves])
+
+
+class StatusTableTest(unittest.TestCase):
+    def assert_matches_naive_generation(self, positions):
+        for KX, RX, KY, side in positions:
+            table_index = StatusTable.index(KX, RX, KY, side)
+            status, codes = naive_status(KX, RX, KY, side)
+            self.assertEqual(StatusTable.game_status(table_index, 0, 60), status, (KX, RX, KY, side))
+            if status in ['continue', 'check']:
+                self.assertEqual(StatusTable.legal_codes(table_index), codes, (KX, RX, KY, side))
+
+    def test_random_positions_match_naive_generation(self):
+        rnd = random.Random(1)
+        self.assert_matches_naive_generation([(rnd.randrange(64), rnd.randrange(64), rnd.randrange(64), rnd.randrange(2)) for _ in range(20000)])
+
+    def test_edge_and_corner_positions_match_naive_generation(self):
+        # Kings in the corners and on the edges, with the rook on every square
+        kings = [0, 7, 56, 63, 3, 24, 39, 60, 27]
+        self.assert_matches_naive_generation([(KX, RX, KY, side) for KX in kings for KY in kings for RX in range(64) for side in (0, 1)])
+
+    def test_maximum_level_ends_only_ongoing_games(self):
+        table_index = StatusTable.index(0, 9, 36, 1)
+        self.assertEqual(StatusTable.game_status(table_index, 59, 60), 'continue')
+        self.assertEqual(StatusTable.game_status(table_index, 60, 60), StatusTable.MAXIMUM_TURNS_REACHED)
+        # A checkmate stays a checkmate at the maximum level
+        table_index = StatusTable.index(41, 63, 56, 1)
+        self.assertEqual(StatusTable.game_status(table_index, 60, 60), 'checkmate')
+
+    def test_game_states_use_the_table(self):
+        rnd = random.Random(2)
+        player_x, player_y = helpers.players(use_tablebase=False)
+        for _ in range(50):
+            state = helpers.random_state(rnd, player_x, player_y)
+            while not state.is_leaf:
+                status, codes = naive_status(*(state.squares + (state.level % 2,)))
+                self.assertEqual(state.game_status, status)
+                self.assertEqual([state.move_code(move) for move in state.legal_moves], codes)
+                state = state.child_from_move(rnd.choice(state.legal_moves))
+
+
+if __name__ == '__main__':
+    unittest.main()
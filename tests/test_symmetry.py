@@ -0,0 +1,92 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_symmetry.py
+
+Tests of the board symmetries (Symmetry.py): the transforms must be undone by their inverses, equivalent positions must
+share one canonical form, and the rules, the heuristics and the tablebase must give equivalent positions the same values.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import Heuristics
+import StatusTable
+import Symmetry
+import Tablebase
+from tests import helpers
+
+
+class TransformTest(unittest.TestCase):
+    def test_transforms_are_permutations_undone_by_their_inverses(self):
+        for transform in range(Symmetry.N_TRANSFORMS):
+            self.assertEqual(sorted(Symmetry.TRANSFORMS[transform]), range(64))
+            for square in range(64):
+                self.assertEqual(Symmetry.inverse_square(Symmetry.transform_square(square, transform), transform), square)
+            for code in range(3*64):
+                self.assertEqual(Symmetry.inverse_move(Symmetry.transform_move(code, transform), transform), code)
+                self.assertEqual(Symmetry.transform_move(code, transform) >> 6, code >> 6)
+
+    def test_transforms_keep_neighbours_and_lines(self):
+        for transform in range(Symmetry.N_TRANSFORMS):
+            image = Symmetry.TRANSFORMS[transform]
+            for square in range(64):
+                self.assertEqual(sorted(image[other] for other in helpers.king_squares(square)), helpers.king_squares(image[square]))
+                self.assertEqual(sorted(image[other] for other in helpers.rook_squares(square, square)), helpers.rook_squares(image[square], image[square]))
+
+
+class CanonicalFormTest(unittest.TestCase):
+    def positions(self, seed, count):
+        rnd = random.Random(seed)
+        return [tuple(rnd.sample(range(64), 3)) + (rnd.randrange(2),) for _ in range(count)]
+
+    def transformed(self, position):
+        """
+        Yields a position under each of the symmetries of the board.
+        """
+        KX, RX, KY, side = position
+        for transform in range(Symmetry.N_TRANSFORMS):
+            image = Symmetry.TRANSFORMS[transform]
+            yield (image[KX], image[RX], image[KY], side)
+
+    def test_equivalent_positions_share_a_canonical_form(self):
+        for position in self.positions(1, 500):
+            canonical, transform = Symmetry.canonicalise(*position)
+            self.assertIn(canonical[0], Symmetry.TRIANGLE)
+            self.assertEqual(canonical[:3], tuple(Symmetry.transform_square(square, transform) for square in position[:3]))
+            for equivalent in self.transformed(position):
+                self.assertEqual(Symmetry.canonicalise(*equivalent)[0], canonical)
+
+    def test_equivalent_positions_have_the_same_values(self):
+        for position in self.positions(2, 300):
+            table_index = StatusTable.index(*position)
+            status = StatusTable.game_status(table_index, 0, 60)
+            x_value = Heuristics.evaluate_x(table_index, status, False, 2)
+            y_value = Heuristics.evaluate_y(table_index, status, 2)
+            plies = Tablebase.probe(*position)
+            for equivalent in self.transformed(position):
+                equivalent_index = StatusTable.index(*equivalent)
+                self.assertEqual(StatusTable.game_status(equivalent_index, 0, 60), status)
+                self.assertEqual(len(StatusTable.legal_codes(equivalent_index)), len(StatusTable.legal_codes(table_index)))
+                self.assertTrue(helpers.close(Heuristics.evaluate_x(equivalent_index, status, False, 2), x_value), (position, equivalent))
+                self.assertTrue(helpers.close(Heuristics.evaluate_y(equivalent_index, status, 2), y_value), (position, equivalent))
+                self.assertEqual(Tablebase.probe(*equivalent), plies)
+
+
+class SymmetricSearchTest(unittest.TestCase):
+    def test_shared_entries_do_not_change_values_along_game_lines(self):
+        reference = helpers.players(use_tablebase=False, use_symmetry=False)
+        others = [helpers.players(use_tablebase=False)]
+        for seed in (4, 9):
+            for state, values, (other,) in helpers.game_line(seed, 4, reference, others, moves=16):
+                self.assertEqual([code for code, _ in other], [code for code, _ in values])
+                for (code, value), (_, expected) in zip(other, values):
+                    self.assertTrue(helpers.close(value, expected), 'seed %i, level %i, move %i: %r != %r' % (seed, state.level, code, value, expected))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_tablebase.py
+
+Tests of the KRK tablebase (Tablebase.py): the plies to checkmate it holds must agree with a search of the game tree,
+and a player that picks its moves from it must checkmate in that many plies.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import Tablebase
+from tests import helpers
+
+
+### Search Functions ###
+def probe(state):
+    """
+    Returns the plies to checkmate the tablebase holds for a state, or None if player X cannot force a checkmate.
+    """
+    return Tablebase.probe_pieces(state.KX, state.RX, state.KY, state.level % 2)
+
+def forces_checkmate(state, plies):
+    """
+    Searches every line of a state up to the given number of plies for a checkmate that player X can force.
+    """
+    if state.game_status == 'checkmate':
+        return True
+    if state.is_leaf or plies == 0:
+        return False
+    x_to_move = state.level % 2 == 0
+    for child in state.children:
+        if forces_checkmate(child, plies - 1) == x_to_move:
+            return x_to_move
+    return not x_to_move
+
+
+class TablebaseTest(unittest.TestCase):
+    def setUp(self):
+        self.player_x, self.player_y = helpers.players()
+
+    def positions(self, rnd, side, count, max_plies=None):
+        """
+        Returns states of random positions that start a game with the given side to move, optionally only the ones
+        the tablebase solves within max_plies plies.
+        """
+        states = []
+        while len(states) < count:
+            state = helpers.new_state(rnd.sample(range(64), 3), self.player_x, self.player_y, max_moves=60, level=side)
+            if state.is_leaf:
+                continue
+            plies = probe(state)
+            if max_plies is None or (plies is not None and plies <= max_plies):
+                states.append(state)
+        return states
+
+    def assert_agrees_with_search(self, states, plies):
+        for state in states:
+            value = probe(state)
+            found = forces_checkmate(state, plies)
+            self.assertEqual(found, value is not None and value <= plies, '%s: tablebase %r, search %r' % (state, value, found))
+
+    def test_short_checkmates_agree_with_search(self):
+        rnd = random.Random(4)
+        self.assert_agrees_with_search(self.positions(rnd, Tablebase.X_TO_MOVE, 20, max_plies=3), 3)
+        self.assert_agrees_with_search(self.positions(rnd, Tablebase.Y_TO_MOVE, 20, max_plies=4), 4)
+
+    def test_random_positions_agree_with_search(self):
+        rnd = random.Random(5)
+        self.assert_agrees_with_search(self.positions(rnd, Tablebase.X_TO_MOVE, 20), 3)
+        self.assert_agrees_with_search(self.positions(rnd, Tablebase.Y_TO_MOVE, 20), 4)
+
+    def test_values_follow_from_the_children(self):
+        # Player X wins one ply after its best move, and player Y loses one ply after its best move
+        rnd = random.Random(7)
+        for side in (Tablebase.X_TO_MOVE, Tablebase.Y_TO_MOVE):
+            for state in self.positions(rnd, side, 500):
+                values = [probe(child) for child in state.children]
+                if side == Tablebase.X_TO_MOVE:
+                    best = min(value for value in values if value is not None)
+                else:
+                    self.assertNotIn(None, values)
+                    best = max(values)
+                self.assertEqual(probe(state), best + 1, state)
+
+    def test_player_checkmates_in_the_plies_of_the_table(self):
+        rnd = random.Random(6)
+        for state in self.positions(rnd, Tablebase.X_TO_MOVE, 20, max_plies=Tablebase.DRAW - 1):
+            value = probe(state)
+            start = state.level
+            while not state.is_leaf:
+                if state.level % 2:
+                    # Player Y plays random moves, which can only bring the checkmate closer
+                    state = state.child_from_move(rnd.choice(state.legal_moves))
+                else:
+                    before = probe(state)
+                    state = self.player_x.move(state)
+                    self.assertEqual(probe(state), before - 1)
+            self.assertEqual(state.game_status, 'checkmate')
+            self.assertTrue(state.level - start <= value)
+
+    def test_player_y_delays_the_checkmate(self):
+        rnd = random.Random(8)
+        for state in self.positions(rnd, Tablebase.Y_TO_MOVE, 20):
+            longest = max(probe(child) for child in state.children)
+            self.assertEqual(probe(self.player_y.move(state)), longest)
+
+
+if __name__ == '__main__':
+    unittest.main()
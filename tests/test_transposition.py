@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_transposition.py
+
+Tests of the Zobrist keys and the transposition table (Transposition.py), and of the searches that share it across the moves of a game.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import GameClasses
+import SearchBoard
+import Transposition
+from tests import helpers
+
+
+### Search Functions ###
+def searched_moves(player, state, pick):
+    """
+    Lets a player search a state and returns the move codes of the children tied for the best value, which the search picks from
+    at random, sorted, along with the child picked. pick is a number in [0, 1) that chooses the child from the sorted codes instead.
+    """
+    winners = []
+    def choose(children):
+        winners.extend(sorted(child.last_move for child in children))
+        return [child for child in children if child.last_move == winners[int(pick*len(winners))]][0]
+    choice, GameClasses.choice = GameClasses.choice, choose
+    try:
+        child = player.alphabeta_search(state)
+    finally:
+        GameClasses.choice = choice
+    return (winners, child)
+
+
+class ZobristKeyTest(unittest.TestCase):
+    def test_incremental_keys_match_keys_from_scratch(self):
+        rnd = random.Random(3)
+        player_x, player_y = helpers.players(use_tablebase=False)
+        for _ in range(20):
+            state = helpers.random_state(rnd, player_x, player_y)
+            while not state.is_leaf and state.level < 12:
+                self.assertEqual(state.zobrist, Transposition.zobrist_key(*(helpers.squares(state) + (state.level % 2,))))
+                child = state.child_from_move(rnd.choice(state.legal_moves))
+                self.assertIs(state.child_from_code(child.last_move), state._children[-1][1])
+                self.assertEqual(state.child_from_code(child.last_move), child)
+                state = child
+
+
+class TranspositionTableTest(unittest.TestCase):
+    def test_probe_finds_stored_entry(self):
+        tt = Transposition.TranspositionTable(16)
+        tt.store(5, 3, Transposition.EXACT, 1.5, 7)
+        entry = tt.probe(5)
+        self.assertEqual((entry.draft, entry.flag, entry.score, entry.best_move), (3, Transposition.EXACT, 1.5, 7))
+        self.assertIsNone(tt.probe(21))
+        self.assertEqual((tt.probes, tt.hits), (2, 1))
+
+    def test_deeper_entry_of_same_search_is_kept(self):
+        tt = Transposition.TranspositionTable(16)
+        tt.new_search()
+        tt.store(5, 3, Transposition.EXACT, 1.5, 7)
+        tt.store(21, 1, Transposition.EXACT, 2.5, 8)
+        self.assertIsNotNone(tt.probe(5))
+        # An entry of an earlier search is always replaced
+        tt.new_search()
+        tt.store(21, 1, Transposition.EXACT, 2.5, 8)
+        self.assertIsNone(tt.probe(5))
+        self.assertEqual(tt.probe(21).score, 2.5)
+
+    def test_best_move_is_kept_when_none_is_found(self):
+        tt = Transposition.TranspositionTable(16)
+        tt.store(5, 1, Transposition.EXACT, 1.5, 7)
+        tt.store(5, 2, Transposition.UPPER, 1.0, None)
+        self.assertEqual(tt.probe(5).best_move, 7)
+
+    def test_new_game_clears_the_table(self):
+        player_x, player_y = helpers.players(use_tablebase=False)
+        player_x.alphabeta_search(helpers.random_state(random.Random(4), player_x, player_y))
+        self.assertTrue(player_x.transposition_table.stores > 0)
+        player_x.new_game()
+        self.assertIsNone(player_x.transposition_table.probe(helpers.random_state(random.Random(4), player_x, player_y).zobrist))
+
+
+class PathDependenceTest(unittest.TestCase):
+    def test_may_cycle_covers_every_cycle_below_a_line(self):
+        # Lines that shuffle back and forth between few squares repeat often
+        rnd = random.Random(5)
+        player_x, player_y = helpers.players(use_tablebase=False)
+        checked = 0
+        for _ in range(30):
+            state = helpers.random_state(rnd, player_x, player_y, max_moves=40)
+            line = [state]
+            while not state.is_leaf and state.level < 40:
+                moves = state.legal_moves
+                state = state.child_from_move(moves[rnd.randrange(min(2, len(moves)))])
+                line.append(state)
+            for i, top in enumerate(line):
+                for k in range(1, min(6, len(line) - i)):
+                    if line[i + k].check_cycle(min_length=4, max_length=8):
+                        checked += 1
+                        self.assertTrue(SearchBoard.may_cycle(top.history, top.level, k, 4, 8))
+        self.assertTrue(checked > 0)
+
+    def test_table_does_not_change_the_moves_along_game_lines(self):
+        # The searches of a player that keeps its table from move to move must find the same best moves as searches without
+        # a table, although the cycle checks and the leaves at the maximum level depend on how a position was reached.
+        # Each pair of players plays the same line on states of its own, since a search cleans up the state it moves from.
+        for seed in (11,):
+            rnd = random.Random(seed)
+            reference = helpers.players(use_tablebase=False, tt_size=0)
+            persistent = helpers.players(use_tablebase=False)
+            squares = helpers.squares(helpers.random_state(rnd, *reference))
+            states = [helpers.new_state(squares, *reference, max_moves=8), helpers.new_state(squares, *persistent, max_moves=8)]
+            while not states[0].is_leaf:
+                side, pick = states[0].level % 2, rnd.random()
+                (winners, child), (other, other_child) = [searched_moves(pair[side], state, pick) for pair, state in zip((reference, persistent), states)]
+                self.assertEqual(winners, other, 'seed %i, level %i' % (seed, states[0].level))
+                states = [child, other_child]
+
+
+if __name__ == '__main__':
+    unittest.main()
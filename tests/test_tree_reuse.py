@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+test_tree_reuse.py
+
+Tests of what the searches reuse from one move to the next (see Player.prune_tree and SearchStats.reused): the states the
+tree search keeps below the move that was played, and the values it finds with them.
+"""
+
+""" Imports """
+## Python Library Imports
+import random
+import unittest
+
+## Source code imports
+import SearchBoard
+from tests import helpers
+
+
+def cached_states(state):
+    """
+    Yields the (parent, child) pairs of the states cached below a state by the tree search.
+    """
+    states = [state]
+    while states:
+        parent = states.pop()
+        for _, child in getattr(parent, '_children', None) or ():
+            yield (parent, child)
+            states.append(child)
+
+
+class TreeReuseTest(unittest.TestCase):
+    def play(self, seed, tree_budget, ply=3):
+        """
+        Plays a game in tree mode and checks every move against a search on a board without a table, which only reads the state itself.
+        Returns the sums of the reused counters and the number of states kept below the last move.
+        """
+        random.seed(seed)
+        player_x, player_y = helpers.players(use_tablebase=False, ply=ply, search_mode='tree', tree_budget=tree_budget)
+        reference = helpers.players(use_tablebase=False, ply=ply, tt_size=0)
+        state = helpers.random_state(random.Random(seed), player_x, player_y)
+        reused = reused_states = 0
+        while not state.is_leaf:
+            side = state.level % 2
+            best, winners = helpers.best_moves(helpers.root_values(reference[side], state, ply))
+            child, stats = (player_x, player_y)[side].search(state)
+            self.assertTrue(helpers.close(stats.score, best), 'seed %i, level %i: %r != %r' % (seed, state.level, stats.score, best))
+            reused += stats.reused
+            reused_states += stats.reused_states
+            # The kept states are the ones the line of the game leads to
+            kept = 0
+            for parent, cached in cached_states(child):
+                kept += 1
+                self.assertEqual(cached.level, parent.level + 1)
+                self.assertEqual(cached.history, parent.history[-2*SearchBoard.MAX_CYCLE_LENGTH:] + (SearchBoard.history_entry(parent.history, cached.placement),))
+            if tree_budget is not None:
+                self.assertTrue(kept <= tree_budget)
+            state = child
+        return (reused, reused_states)
+
+    def test_kept_states_give_the_same_values(self):
+        reused, reused_states = self.play(4, None)
+        self.assertTrue(reused > 0 and reused_states > 0)
+
+    def test_budget_limits_the_kept_states(self):
+        self.play(4, 0)
+        self.play(4, 200)
+
+    def test_reused_states_counts_the_kept_states_searched_again(self):
+        for engine in ['alphabeta', 'pvs', 'mtdf']:
+            random.seed(2)
+            # Iterative deepening and the re-searches of the engines visit the states of the same search more than once
+            player_x, player_y = helpers.players(use_tablebase=False, search_mode='tree', time_budget=60, max_ply=3, search_engine=engine)
+            state = helpers.random_state(random.Random(2), player_x, player_y)
+            child, _ = player_x.search(state)
+            kept = [cached for _, cached in cached_states(child)]
+            # Every visit of the tree search ends at the heuristic or at a lookup in the transposition table
+            visited = set()
+            def recorded(function):
+                def visit(state, *arguments):
+                    visited.add(id(state))
+                    return function(state, *arguments)
+                return visit
+            player_y.heuristic, player_y._tt_lookup = recorded(player_y.heuristic), recorded(player_y._tt_lookup)
+            _, stats = player_y.search(child)
+            expected = len(visited & set(id(cached) for cached in kept))
+            self.assertTrue(expected > 0)
+            self.assertEqual(stats.reused_states, expected, '%s: %i != %i' % (engine, stats.reused_states, expected))
+
+
+if __name__ == '__main__':
+    unittest.main()